@@ -0,0 +1,437 @@
+# benchmarks/run.py
+"""Hot-path benchmarks, run against the simulated backend.
+
+    python -m benchmarks.run --out bench_results.json
+    python -m benchmarks.run --out new.json --compare bench_results.json
+
+Reports step rate / step-interval jitter for goto_steps and the tracker,
+homing time and repeatability,
+EventBus dispatch cost, menu/status render time and pot-to-motor latency
+in manual mode, how smoothly each follow mode tracks a turning knob, and
+catalog refresh/query cost.
+Results are JSON so runs on different commits can be diffed.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from hardware.backend import set_backend
+from hardware.sim import SimBackend
+
+# Installed before anything imports hardware modules that bind devices at import
+backend = SimBackend()
+set_backend(backend)
+
+from core.event_bus import EventBus, event_bus                # noqa: E402
+from hardware.display_pipeline import DisplayPipeline          # noqa: E402
+from hardware.oled_display import OLEDDisplay                  # noqa: E402
+from hardware.stepper_controller import StepperController      # noqa: E402
+from utils.motion_planner import MotionProfile                 # noqa: E402
+
+JITTER_BINS_US = [0, 10, 25, 50, 100, 250, 500, 1000, 5000, float("inf")]
+
+
+# ---------------- Helpers ----------------
+def percentiles(samples, scale=1.0):
+    a = np.asarray(samples, dtype=np.float64) * scale
+    if a.size == 0:
+        return {}
+    return {
+        "n": int(a.size),
+        "mean": float(a.mean()),
+        "p50": float(np.percentile(a, 50)),
+        "p90": float(np.percentile(a, 90)),
+        "p99": float(np.percentile(a, 99)),
+        "max": float(a.max()),
+    }
+
+
+def interval_stats(step_times, commanded_interval):
+    """Achieved rate and |interval - commanded| histogram (µs) for a run of steps."""
+    t = np.asarray(step_times, dtype=np.float64)
+    if t.size < 3:
+        return {"steps": int(t.size)}
+    intervals = np.diff(t)
+    dev_us = np.abs(intervals - commanded_interval) * 1e6
+    counts, _ = np.histogram(dev_us, bins=JITTER_BINS_US)
+    labels = [f"{lo:g}-{hi:g}" for lo, hi in zip(JITTER_BINS_US[:-1], JITTER_BINS_US[1:])]
+    return {
+        "steps": int(t.size),
+        "commanded_rate": 1.0 / commanded_interval,
+        "achieved_rate": float(intervals.size / (t[-1] - t[0])),
+        "jitter_us": percentiles(dev_us),
+        "jitter_histogram_us": dict(zip(labels, counts.tolist())),
+    }
+
+
+def new_controller():
+    ctrl = StepperController(event_bus, backend=backend, ms_mode=(1, 1))     # as main.py; the sim axes count eighths
+    for axis, sim_axis in backend.axes.items():
+        setattr(ctrl, f"{axis}_position", sim_axis.position)
+        setattr(ctrl, f"{axis}_target", sim_axis.position)
+    return ctrl
+
+
+def steps_since(sim_axis, t_start):
+    return [t for t in sim_axis.step_times if t >= t_start]
+
+
+async def wait_idle(sim_axis, quiet_s=0.3, timeout_s=5.0):
+    """Wait until the axis has not stepped for ``quiet_s``."""
+    deadline = time.perf_counter() + timeout_s
+    while time.perf_counter() < deadline:
+        if not sim_axis.step_times or backend.clock() - sim_axis.step_times[-1] > quiet_s:
+            return
+        await asyncio.sleep(0.02)
+
+
+def flatten(d, prefix=""):
+    out = {}
+    for k, v in d.items():
+        key = f"{prefix}.{k}" if prefix else str(k)
+        if isinstance(v, dict):
+            out.update(flatten(v, key))
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            out[key] = v
+    return out
+
+
+# ---------------- Motion ----------------
+async def bench_goto(rates, seconds):
+    ctrl = new_controller()
+    sim_axis = backend.axes["az"]
+    results, sustained, all_ok = {}, 0, True   # highest rate with every lower rate also held
+    try:
+        for i, rate in enumerate(rates):
+            n = int(rate * seconds)
+            target = ctrl.az_position + (n if i % 2 == 0 else -n)
+            profile = MotionProfile(v_max=rate, accel=1e9, v_start=rate)   # constant rate
+            missed_before = ctrl.engine.stats()["az"]["missed"]
+            t_start = backend.clock()
+            await ctrl.goto_steps("az", target, profile)
+            res = interval_stats(steps_since(sim_axis, t_start), 1.0 / rate)
+            res["missed_deadlines"] = ctrl.engine.stats()["az"]["missed"] - missed_before
+            results[str(rate)] = res
+            ok = res.get("achieved_rate", 0) >= 0.98 * rate and res["missed_deadlines"] <= 0.01 * n
+            if ok and all_ok:
+                sustained = rate
+            all_ok = all_ok and ok
+    finally:
+        ctrl.disable_all()
+    return {"max_sustained_rate": sustained, "rates": results}
+
+
+async def bench_tracker(rate, seconds):
+    ctrl = new_controller()
+    ctrl.track_profile = MotionProfile(v_max=rate, accel=1e9, v_start=rate)
+    sim_axis = backend.axes["az"]
+    try:
+        ctrl.start_tasks()
+        await asyncio.sleep(0.2)
+        t_start = backend.clock()
+        # Far target, written repeatedly so the median-of-5 input filter accepts it
+        for _ in range(5):
+            ctrl.az_target = ctrl.az_position + int(rate * seconds * 2)
+        await asyncio.sleep(seconds)
+        times = steps_since(sim_axis, t_start)
+        # Skip the filter's approach transient
+        res = interval_stats(times[len(times) // 4:], 1.0 / rate)
+        res["engine"] = ctrl.engine.stats()["az"]
+    finally:
+        ctrl.disable_all()
+        await asyncio.sleep(0.1)
+    return res
+
+
+async def bench_homing(start_steps, runs):
+    """Home from ``start_steps`` away, then re-home from mid travel ``runs`` times."""
+    ctrl = new_controller()
+    sim_axis = backend.axes["alt"]
+    try:
+        sim_axis.position += start_steps - ctrl.alt_position
+        ctrl.alt_position = start_steps
+        first = await ctrl.home_axis("alt")
+        repeats = []
+        for _ in range(runs):
+            await ctrl.goto_steps("alt", ctrl.max_steps // 2)
+            repeats.append(await ctrl.home_axis("alt"))
+        return {
+            "from_far_end": first,
+            "rehome_s": percentiles([r["duration_s"] for r in repeats]),
+            "home_error_steps": percentiles([abs(r["home_error_steps"]) for r in repeats]),
+            "repeatability_steps": repeats[-1].get("repeatability_steps") if repeats else None,
+        }
+    finally:
+        ctrl.disable_all()
+        await asyncio.sleep(0.1)
+
+
+# ---------------- Event bus ----------------
+async def bench_event_bus(subscriber_counts, emits):
+    results = {}
+    for n in subscriber_counts:
+        bus = EventBus()
+        bus.loop = asyncio.get_running_loop()
+        for _ in range(n):
+            bus.subscribe("bench", lambda data: None)
+
+        t = time.perf_counter()
+        for i in range(emits):
+            bus.emit("bench", i)
+        sync_s = time.perf_counter() - t
+
+        # Cross-thread: gpiozero callbacks emit from their own thread
+        received = []
+        done = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def on_xt(sent_at):
+            received.append(time.perf_counter() - sent_at)
+            if len(received) == emits:
+                loop.call_soon(done.set)
+
+        bus.subscribe("xt", on_xt)
+
+        def producer():
+            for _ in range(emits):
+                bus.emit("xt", time.perf_counter())
+
+        threading.Thread(target=producer).start()
+        await asyncio.wait_for(done.wait(), timeout=30)
+
+        results[str(n)] = {
+            "emit_us": sync_s / emits * 1e6,
+            "emits_per_s": emits / sync_s,
+            "dispatches_per_s": emits * n / sync_s,
+            "cross_thread_latency_us": percentiles(received, 1e6),
+        }
+    return results
+
+
+# ---------------- Display ----------------
+def bench_display(iterations):
+    from core.menu_system import MenuSystem
+    menu = MenuSystem(OLEDDisplay(0x3C, backend=backend), OLEDDisplay(0x3D, backend=backend), EventBus())
+
+    def timed(fn):
+        samples = []
+        for i in range(iterations):
+            t = time.perf_counter()
+            fn(i)
+            samples.append(time.perf_counter() - t)
+        return percentiles(samples, 1e3)
+
+    def menu_step(i):
+        menu.selected_index = i % menu.num_items
+        menu.draw_menu()
+
+    results = {
+        "draw_menu_ms": timed(menu_step),
+        "draw_status_ms": timed(lambda i: menu.draw_status("Slewing to target, please wait", icon="!")),
+        "draw_status_animated_ms": timed(lambda i: menu.draw_status("Homing...", animate=True, frame=i)),
+    }
+
+    # Same menu spin through the display pipeline: caller cost and frames that hit the bus
+    pipeline = DisplayPipeline([menu.menu_oled, menu.status_oled])
+    pipeline.start()
+    try:
+        results["pipelined_draw_menu_ms"] = timed(menu_step)
+        time.sleep(0.2)
+        results["pipeline"] = dict(pipeline.stats)
+    finally:
+        pipeline.stop()
+    return results
+
+
+# ---------------- Catalog ----------------
+def bench_catalog(n_objects, iterations):
+    from core.catalog import CATALOG_DTYPE, Catalog
+
+    rng = np.random.default_rng(0)
+    records = np.zeros(n_objects, dtype=CATALOG_DTYPE)
+    records["ra"] = rng.uniform(0.0, 360.0, n_objects)
+    records["dec"] = np.degrees(np.arcsin(rng.uniform(-1.0, 1.0, n_objects)))
+    records["mag"] = rng.uniform(-1.5, 6.5, n_objects)
+    records["name"] = [f"HIP {k}".encode() for k in range(n_objects)]
+    t0 = time.time()
+    catalog = Catalog(records, clock=lambda: t0)
+
+    def timed(fn):
+        samples = []
+        for i in range(iterations):
+            t = time.perf_counter()
+            fn(i)
+            samples.append(time.perf_counter() - t)
+        return percentiles(samples, 1e3)
+
+    return {
+        "objects": n_objects,
+        "refresh_ms": timed(lambda i: catalog.refresh(t0 + 60.0 * i, force=True)),
+        "page_ms": timed(lambda i: catalog.page(i, 6, by="altitude" if i % 2 else "magnitude")),
+        "nearest_ms": timed(lambda i: catalog.nearest(20.0 + i % 60, (7.0 * i) % 360.0)),
+        "visible": int(len(catalog.visible())),
+    }
+
+
+# ---------------- Manual mode end to end ----------------
+async def bench_pot_latency(trials, timeout_s=3.0):
+    import core.homing
+    import core.manual_mode as manual
+    from core.mode_manager import switch_mode
+    from hardware.ads1115 import sampler
+
+    ctrl = new_controller()
+    core.homing.stepper_ctrl = ctrl
+    event_bus.loop = asyncio.get_running_loop()
+    ctrl.start_tasks()
+    sampler.start()
+    manual.start_manual_mode()
+    pot = backend.adc[2]
+    sim_axis = backend.axes["az"]
+    latencies, timeouts = [], 0
+    try:
+        await asyncio.sleep(0.5)
+        for i in range(trials):
+            await wait_idle(sim_axis)
+            base, t0 = pot.value, backend.clock()
+            sign = 1 if i % 2 == 0 else -1
+            # Knob turned at a steady ~2000 counts/s from t0
+            pot.script = lambda t, base=base, t0=t0, sign=sign: base + sign * 2000 * (t - t0)
+            deadline = time.perf_counter() + timeout_s
+            while time.perf_counter() < deadline:
+                moved = steps_since(sim_axis, t0)
+                if moved:
+                    latencies.append(moved[0] - t0)
+                    break
+                await asyncio.sleep(0.001)
+            else:
+                timeouts += 1
+            pot.set(pot.value)
+    finally:
+        switch_mode(asyncio.sleep(0))
+        manual.stop_manual_mode()
+        sampler.stop()
+        ctrl.disable_all()
+        await asyncio.sleep(0.1)
+    return {"latency_ms": percentiles(latencies, 1e3), "timeouts": timeouts}
+
+
+async def bench_pot_follow(counts_per_s, seconds):
+    """Knob turned at a steady rate then stopped: step smoothness and overshoot per follow mode."""
+    import core.homing
+    import core.manual_mode as manual
+    from core.mode_manager import switch_mode
+    from hardware.ads1115 import sampler
+
+    pot = backend.adc[2]
+    sim_axis = backend.axes["az"]
+    results = {}
+    for mode in ("position", "velocity"):
+        ctrl = new_controller()
+        core.homing.stepper_ctrl = ctrl
+        event_bus.loop = asyncio.get_running_loop()
+        manual.FOLLOW_MODE = mode
+        pot.set(round(sim_axis.position * 65535 / ctrl.max_steps))   # start on target
+        ctrl.start_tasks()
+        sampler.start()
+        manual.start_manual_mode()
+        try:
+            await asyncio.sleep(0.2)
+            await wait_idle(sim_axis, timeout_s=10.0)
+            base, t0 = pot.value, backend.clock()
+            pot.script = lambda t, base=base, t0=t0: base + counts_per_s * (t - t0)
+            await asyncio.sleep(seconds)
+            pot.set(pot.value)
+            t_stop, peak = backend.clock(), ctrl.az_position
+            while backend.clock() - t_stop < 1.5:
+                peak = max(peak, ctrl.az_position)
+                await asyncio.sleep(0.005)
+            times = steps_since(sim_axis, t0)
+            steady = [t for t in times if t0 + seconds / 3 <= t < t_stop]
+            rate = counts_per_s * ctrl.max_steps / 65535
+            res = interval_stats(steady, 1.0 / rate)
+            res["overshoot_steps"] = max(0, peak - ctrl.az_target)
+            res["final_error_steps"] = ctrl.az_position - ctrl.az_target
+            res["total_steps"] = len(times)
+            results[mode] = res
+        finally:
+            switch_mode(asyncio.sleep(0))
+            manual.stop_manual_mode()
+            sampler.stop()
+            ctrl.disable_all()
+            await asyncio.sleep(0.1)
+    manual.FOLLOW_MODE = "velocity"
+    return results
+
+
+# ---------------- Runner ----------------
+async def run_all(only, quick):
+    scale = 0.25 if quick else 1.0
+    suites = {
+        "goto_steps": lambda: bench_goto([500, 1000, 1250, 2000, 3000, 5000, 8000], 0.5 * scale),
+        "track_axis_loop": lambda: bench_tracker(1250, 2.0 * scale),
+        "homing": lambda: bench_homing(20000, max(1, int(4 * scale))),
+        "event_bus": lambda: bench_event_bus([1, 10, 100], int(20000 * scale)),
+        "display": lambda: asyncio.to_thread(bench_display, int(200 * scale)),
+        "pot_to_motor": lambda: bench_pot_latency(max(2, int(10 * scale))),
+        "pot_follow": lambda: bench_pot_follow(3000, 1.5),
+        "catalog": lambda: asyncio.to_thread(bench_catalog, 5000, int(200 * scale)),
+    }
+    results = {}
+    for name, suite in suites.items():
+        if only and name not in only:
+            continue
+        print(f"[Bench] {name}...", flush=True)
+        results[name] = await suite()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(new, old_path):
+    with open(old_path) as f:
+        old = flatten(json.load(f)["results"])
+    for key, value in flatten(new).items():
+        if key in old and old[key]:
+            change = (value - old[key]) / abs(old[key]) * 100
+            if abs(change) >= 5:
+                print(f"{key:70s} {old[key]:>12.4g} -> {value:>12.4g}  ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="optiscopePrime hot-path benchmarks (simulated backend)")
+    parser.add_argument("--out", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--only", nargs="*", help="run only these suites")
+    parser.add_argument("--quick", action="store_true", help="shorter runs")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_all(args.only, args.quick))
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[Bench] wrote {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,9 @@
 MENU_ITEMS = [
     {"label": "Manual Mode", "event": "manual_mode_entered"},
     {"label": "Auto Mode", "event": "auto_mode_entered"},
+    {"label": "GOTO Target", "event": "goto_list_entered"},
     {"label": "Go to Calibration", "event": "goto_calibration_entered"},
     {"label": "Auto Homing", "event": "auto_homing_entered"},
+    {"label": "Diagnostics", "event": "diagnostics_entered"},
     {"label": "Stop", "event": "stop_mode_entered"},
 ]
@@ -1,17 +1,222 @@
 from core.mode_manager import switch_mode
 from core.event_bus import event_bus
+from core import calibration
+from utils.astro import altaz_to_radec, local_sidereal_time, radec_to_altaz
 import asyncio
+import math
+import numpy as np
 
-async def auto_mode_loop(_=None):
+# ---- Optional config (site falls back to Greenwich) ----
+try:
+    from config.settings import SITE_LATITUDE
+except Exception:
+    SITE_LATITUDE = 51.4769     # degrees north
+try:
+    from config.settings import SITE_LONGITUDE
+except Exception:
+    SITE_LONGITUDE = 0.0        # degrees east
+
+RESYNC_S = 30.0          # re-derive phase and rate from the exact sky position this often
+STEP_THRESHOLD = 0.75    # |phase| in steps that makes a step due (0.5 step hysteresis on reversal)
+SLEW_STEPS = 50          # errors larger than this are closed with a slew, not single steps
+GOTO_LIST_SIZE = 20      # brightest visible objects offered by the GOTO Target menu
+
+tracker = None           # SiderealTracker while auto mode is running
+
+
+class PhaseAccumulator:
+    """Fractional steps owed to one axis, growing at ``rate`` steps/s.
+
+    A step is due when the phase reaches +/- ``threshold``; taking it moves
+    the phase by one whole step, so fractions carry over exactly and rates
+    far below 1 step/s keep their long-term timing.
+    """
+
+    def __init__(self, threshold=STEP_THRESHOLD):
+        self.threshold = threshold
+        self.phase = 0.0
+        self.rate = 0.0
+
+    def advance(self, dt):
+        self.phase += self.rate * dt
+
+    def time_to_step(self):
+        """Seconds until the next step is due (0 if already due, inf if never)."""
+        if abs(self.phase) >= self.threshold:
+            return 0.0
+        if self.rate > 0.0:
+            return (self.threshold - self.phase) / self.rate
+        if self.rate < 0.0:
+            return (-self.threshold - self.phase) / self.rate
+        return math.inf
+
+    def take_step(self):
+        """Consume one whole step; returns its direction."""
+        forward = self.phase > 0.0
+        self.phase -= 1.0 if forward else -1.0
+        return forward
+
+
+class SiderealTracker:
+    """Keeps both axes on a fixed RA/Dec.
+
+    Every ``RESYNC_S`` the phase and rate of each axis are recomputed from
+    the exact sky position at the wall clock, so errors never accumulate.
+    In between, each axis sleeps until its accumulator says the next step
+    is due and queues that step on the step engine at its exact instant:
+    an axis moving 0.3 steps/s wakes the loop 0.3 times a second.
+    """
+
+    def __init__(self, stepper_ctrl, ra, dec, lat=SITE_LATITUDE, lon=SITE_LONGITUDE):
+        self.ctrl = stepper_ctrl
+        self.ra = ra
+        self.dec = dec
+        self.lat = lat
+        self.lon = lon
+        self.wall_time = stepper_ctrl.backend.wall_time
+        self.steps_per_degree = stepper_ctrl.STEPS_PER_DEGREE
+        self.stats = {axis: {"steps": 0, "resyncs": 0, "max_error_steps": 0.0} for axis in ("az", "alt")}
+
+    @classmethod
+    def at_current_pointing(cls, stepper_ctrl, lat=SITE_LATITUDE, lon=SITE_LONGITUDE):
+        """Track whatever the mount points at right now."""
+        spd = stepper_ctrl.STEPS_PER_DEGREE
+        lst = local_sidereal_time(stepper_ctrl.backend.wall_time(), lon)
+        alt, az = calibration.pointing_model.to_sky(stepper_ctrl.alt_position / spd, stepper_ctrl.az_position / spd)
+        ra, dec = altaz_to_radec(alt, az, lst, lat)
+        return cls(stepper_ctrl, float(ra), float(dec), lat, lon)
+
+    def sky_steps(self, t, h=1.0):
+        """``{axis: (position, rate)}`` in fractional steps and steps/s at UTC ``t``."""
+        ts = np.array([t - h, t, t + h])
+        alt, az = radec_to_altaz(self.ra, self.dec, local_sidereal_time(ts, self.lon), self.lat)
+        alt, az = calibration.pointing_model.to_mount(alt, az)
+        az = np.degrees(np.unwrap(np.radians(az)))
+        # Azimuth on the turn nearest the current position
+        az += 360.0 * round((self.ctrl.az_position / self.steps_per_degree - az[1]) / 360.0)
+        out = {}
+        for axis, deg in (("az", az), ("alt", alt)):
+            steps = deg * self.steps_per_degree
+            out[axis] = (float(steps[1]), float(steps[2] - steps[0]) / (2.0 * h))
+        return out
+
+    async def slew(self):
+        """Coordinated slew onto the target; returns False if it is outside travel."""
+        sky = self.sky_steps(self.wall_time())
+        az, alt = round(sky["az"][0]), round(sky["alt"][0])
+        if not (0 <= az <= self.ctrl.max_steps and 0 <= alt <= self.ctrl.max_steps):
+            return False
+        await self.ctrl.goto_altaz(az, alt)
+        return True
+
+    async def run(self):
+        await self.ctrl.settle()        # sidereal steps go straight to the engine
+        for motor in (self.ctrl.az_motor, self.ctrl.alt_motor):
+            motor.enable_motor(True)
+        await asyncio.gather(self._track_axis("az"), self._track_axis("alt"))
+
+    async def _track_axis(self, axis):
+        engine = self.ctrl.engine
+        stats = self.stats[axis]
+        acc = PhaseAccumulator()
+        t_sync = t_acc = -math.inf
+
+        while True:
+            now = self.wall_time()
+            if now - t_sync >= RESYNC_S:
+                # ---- Drift correction: phase straight from the sky at the wall clock ----
+                position, acc.rate = self.sky_steps(now)[axis]
+                acc.phase = position - engine.position[axis]
+                t_sync = t_acc = now
+                stats["resyncs"] += 1
+                stats["max_error_steps"] = max(stats["max_error_steps"], abs(acc.phase))
+                if not 0 <= position <= self.ctrl.max_steps:
+                    print(f"[AutoMode] {axis.upper()} target outside travel; holding")
+                    return
+                if abs(acc.phase) > SLEW_STEPS:
+                    await self.ctrl.goto_steps(axis, round(position))
+                    t_sync = -math.inf
+                    continue
+            else:
+                acc.advance(now - t_acc)
+                t_acc = now
+
+            wait = acc.time_to_step()
+            resync_in = t_sync + RESYNC_S - now
+            if wait > resync_in:
+                await asyncio.sleep(resync_in / engine.time_scale)
+                continue
+
+            # ---- Queue the step at its exact instant; sleep until it fires ----
+            acc.advance(wait)
+            t_acc = now + wait
+            forward = acc.take_step()
+            await engine.run(axis, forward, (0.0,), start_at=engine.clock() + wait)
+            stats["steps"] += 1
+
+
+async def auto_mode_loop(target=None, name=None):
+    """Sidereal tracking of ``target`` (RA, Dec in degrees), or of the current pointing.
+
+    With a target the mount first slews to it and emits ``goto_complete``.
+    """
+    global tracker
+    import core.homing
+    stepper_ctrl = core.homing.stepper_ctrl
     print("[AutoMode] Entered auto mode loop.")
+    stepper_ctrl.set_follow_mode("external")
     try:
-        while True:
-            print("[AutoMode] Running auto mode...")
-            await asyncio.sleep(1)
+        if target is None:
+            tracker = SiderealTracker.at_current_pointing(stepper_ctrl)
+        else:
+            tracker = SiderealTracker(stepper_ctrl, *target)
+            if not await tracker.slew():
+                print(f"[AutoMode] {name or 'Target'} is outside the mount's travel")
+                return
+            event_bus.emit("goto_complete", name)
+        print(f"[AutoMode] Tracking RA {tracker.ra:.3f} Dec {tracker.dec:.3f}")
+        await tracker.run()
     except asyncio.CancelledError:
         print("[AutoMode] Auto mode cancelled.")
+    finally:
+        tracker = None
+        stepper_ctrl.set_follow_mode("position")
+
 
 def start_auto_mode(_=None):
     switch_mode(auto_mode_loop())
 
+
+def _catalog():
+    import core.homing
+    from core.catalog import get_catalog
+    return get_catalog(clock=core.homing.stepper_ctrl.backend.wall_time)
+
+
+def open_goto_list(_=None):
+    """Offer the brightest objects now above the horizon; picking one emits goto_requested."""
+    catalog = _catalog()
+    items = [{"label": label, "event": "goto_requested", "data": catalog.name(row)}
+             for row, label, _, _ in catalog.page(0, GOTO_LIST_SIZE, by="magnitude")]
+    if not items:
+        print(f"[AutoMode] Nothing above {catalog.min_alt:g} deg")
+    event_bus.emit("menu_list_opened", items)
+
+
+def start_goto(name):
+    """GOTO a catalog object by name, then track it."""
+    catalog = _catalog()
+    row = catalog.find(name)
+    if row is None:
+        print(f"[AutoMode] Unknown target {name!r}")
+        return
+    catalog.refresh()
+    if catalog.alt[row] < catalog.min_alt:
+        print(f"[AutoMode] {catalog.name(row)} is below {catalog.min_alt:g} deg")
+        return
+    switch_mode(auto_mode_loop((float(catalog.ra[row]), float(catalog.dec[row])), catalog.name(row)))
+
+
 event_bus.subscribe("auto_mode_entered", start_auto_mode)
+event_bus.subscribe("goto_list_entered", open_goto_list)
+event_bus.subscribe("goto_requested", start_goto)
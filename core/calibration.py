@@ -0,0 +1,199 @@
+from core.mode_manager import switch_mode
+from core.event_bus import event_bus
+from utils.astro import local_sidereal_time, radec_to_altaz
+import asyncio
+import numpy as np
+
+# ---- Optional config ----
+try:
+    from config.settings import ALIGNMENT_STARS
+except Exception:
+    ALIGNMENT_STARS = 3             # targets offered per calibration run
+try:
+    from config.settings import SITE_LATITUDE
+except Exception:
+    SITE_LATITUDE = 51.4769
+try:
+    from config.settings import SITE_LONGITUDE
+except Exception:
+    SITE_LONGITUDE = 0.0
+
+TERMS = ("IA", "IE", "AN", "AW", "CA", "NPAE")
+TERMS_FOR_POINTS = {1: 2, 2: 4, 3: 4}   # keep the fit overdetermined until there are enough stars
+MAX_ALT_DEG = 89.0                  # sec/tan terms blow up at the zenith
+
+
+def _basis(alt, az):
+    """Per-term partial derivatives ``(B_az, B_alt)``, each shaped (n, len(TERMS))."""
+    alt = np.radians(np.minimum(np.asarray(alt, dtype=np.float64), MAX_ALT_DEG))
+    az = np.radians(np.asarray(az, dtype=np.float64))
+    tan_alt = np.tan(alt)
+    sin_az, cos_az = np.sin(az), np.cos(az)
+    one, zero = np.ones_like(alt), np.zeros_like(alt)
+    b_az = np.stack([one, zero, sin_az * tan_alt, -cos_az * tan_alt, 1.0 / np.cos(alt), tan_alt], axis=-1)
+    b_alt = np.stack([zero, one, cos_az, sin_az, zero, zero], axis=-1)
+    return b_az, b_alt
+
+
+class PointingModel:
+    """Alt-az pointing model: sky alt/az <-> mount axis angles, in degrees.
+
+    Terms (TPOINT names): IA/IE index offsets, AN/AW azimuth-axis tilt
+    (the small rotation of the mount frame), CA collimation and NPAE
+    alt/az non-perpendicularity. The solved coefficients are the cached
+    transform: converting any number of targets is one basis evaluation
+    and two dot products, whatever terms are in use.
+    """
+
+    def __init__(self, coeffs=None):
+        self.coeffs = np.zeros(len(TERMS)) if coeffs is None else np.asarray(coeffs, dtype=np.float64)
+        self.rms_arcmin = 0.0
+        self.residuals_arcmin = np.empty(0)
+
+    @classmethod
+    def fit(cls, sky_alt, sky_az, mount_alt, mount_az):
+        """Least-squares fit to aligned pairs (degrees); returns the model."""
+        sky_alt, sky_az = np.asarray(sky_alt, dtype=np.float64), np.asarray(sky_az, dtype=np.float64)
+        n_terms = TERMS_FOR_POINTS.get(len(sky_alt), len(TERMS))
+        b_az, b_alt = _basis(sky_alt, sky_az)
+        d_az = (np.asarray(mount_az) - sky_az + 180.0) % 360.0 - 180.0
+        d_alt = np.asarray(mount_alt) - sky_alt
+        # Azimuth rows weighted by cos(alt) so both axes are fitted in sky angle
+        w = np.cos(np.radians(np.minimum(sky_alt, MAX_ALT_DEG)))[:, None]
+        a = np.vstack([b_az[:, :n_terms] * w, b_alt[:, :n_terms]])
+        b = np.concatenate([d_az * w[:, 0], d_alt])
+        solution = np.linalg.lstsq(a, b, rcond=None)[0]
+
+        model = cls(np.concatenate([solution, np.zeros(len(TERMS) - n_terms)]))
+        res = (a @ solution - b).reshape(2, -1)
+        model.residuals_arcmin = np.hypot(res[0], res[1]) * 60.0
+        model.rms_arcmin = float(np.sqrt(np.mean(model.residuals_arcmin ** 2)))
+        return model
+
+    def to_mount(self, alt, az):
+        """Sky alt/az -> mount (alt, az) axis angles; broadcasts over arrays."""
+        b_az, b_alt = _basis(alt, az)
+        return np.asarray(alt) + b_alt @ self.coeffs, np.asarray(az) + b_az @ self.coeffs
+
+    def to_sky(self, mount_alt, mount_az, iterations=3):
+        """Inverse of ``to_mount`` by fixed-point iteration (terms are small and smooth)."""
+        alt, az = np.asarray(mount_alt, dtype=np.float64), np.asarray(mount_az, dtype=np.float64)
+        for _ in range(iterations):
+            b_az, b_alt = _basis(alt, az)
+            alt, az = mount_alt - b_alt @ self.coeffs, mount_az - b_az @ self.coeffs
+        return alt, np.mod(az, 360.0)
+
+    def describe(self):
+        return {term: round(float(c) * 60.0, 2) for term, c in zip(TERMS, self.coeffs)}   # arcmin
+
+
+pointing_model = PointingModel()    # active model; identity until calibrated
+
+
+class Calibration:
+    """Aligned (catalog object, step position) pairs and the model solved from them."""
+
+    def __init__(self, steps_per_degree, lat=SITE_LATITUDE, lon=SITE_LONGITUDE):
+        self.steps_per_degree = steps_per_degree
+        self.lat = lat
+        self.lon = lon
+        self.points = []            # (ra, dec, utc, az_steps, alt_steps)
+
+    def add_point(self, ra, dec, t, az_steps, alt_steps):
+        self.points.append((ra, dec, t, az_steps, alt_steps))
+
+    def solve(self):
+        """Fit and install a model from all points so far."""
+        global pointing_model
+        ra, dec, t, az_steps, alt_steps = (np.array(col, dtype=np.float64) for col in zip(*self.points))
+        sky_alt, sky_az = radec_to_altaz(ra, dec, local_sidereal_time(t, self.lon), self.lat)
+        pointing_model = PointingModel.fit(sky_alt, sky_az,
+                                           alt_steps / self.steps_per_degree,
+                                           az_steps / self.steps_per_degree)
+        return pointing_model
+
+
+def pick_alignment_target(catalog, chosen, max_steps, steps_per_degree):
+    """Brightest visible object inside travel, as far as possible from ``chosen`` rows."""
+    rows = catalog.visible(by="magnitude")[:40]
+    best, best_sep = None, -1.0
+    for row in rows:
+        if row in chosen:
+            continue
+        alt, az = pointing_model.to_mount(catalog.alt[row], catalog.az[row])
+        if not (0 <= az * steps_per_degree <= max_steps and 0 <= alt * steps_per_degree <= max_steps):
+            continue
+        if not chosen:
+            return int(row)
+        sep = float(catalog.separation(row, chosen).min())
+        if sep > best_sep:
+            best, best_sep = int(row), sep
+    return best
+
+
+async def _stop_follow(follow):
+    # Wait for the pot follower's cancel handler, which resets the follow
+    # mode, before the axes are handed to the next slew
+    follow.cancel()
+    await asyncio.gather(follow, return_exceptions=True)
+
+
+async def calibration_mode_loop(_=None):
+    import core.homing
+    import core.manual_mode as manual
+    from core.catalog import get_catalog
+    stepper_ctrl = core.homing.stepper_ctrl
+    catalog = get_catalog(clock=stepper_ctrl.backend.wall_time)
+    calibration = Calibration(stepper_ctrl.STEPS_PER_DEGREE)
+    confirmed = asyncio.Event()
+    on_sync = lambda _=None: confirmed.set()
+    sync_token = event_bus.subscribe("sync_ok_pressed", on_sync)
+    follow = None
+    print("[Calibration] Entered calibration mode.")
+    try:
+        chosen = []
+        for _ in range(ALIGNMENT_STARS):
+            row = pick_alignment_target(catalog, chosen, stepper_ctrl.max_steps, stepper_ctrl.STEPS_PER_DEGREE)
+            if row is None:
+                print("[Calibration] No more alignment targets in reach.")
+                break
+            chosen.append(row)
+            name = catalog.name(row)
+
+            # Slew with the model so far, then hand the axes to the pots for centring
+            stepper_ctrl.set_follow_mode("external")
+            alt, az = pointing_model.to_mount(catalog.alt[row], catalog.az[row])
+            spd = stepper_ctrl.STEPS_PER_DEGREE
+            if not await stepper_ctrl.goto_altaz(round(float(az) * spd), round(float(alt) * spd)):
+                print(f"[Calibration] Slew to {name} was interrupted; stopping.")
+                break
+            manual.sync_pots(stepper_ctrl)          # before the streams capture the offsets
+            manual.open_streams(stepper_ctrl)
+            follow = asyncio.create_task(manual.manual_mode_loop())
+            event_bus.emit("calibration_target", name)
+            print(f"[Calibration] Centre {name}, then press OK")
+
+            confirmed.clear()
+            await confirmed.wait()
+            calibration.add_point(float(catalog.ra[row]), float(catalog.dec[row]), stepper_ctrl.backend.wall_time(),
+                                  stepper_ctrl.az_position, stepper_ctrl.alt_position)
+            await _stop_follow(follow)
+            follow = None
+            model = calibration.solve()
+            print(f"[Calibration] {len(calibration.points)} point(s), rms {model.rms_arcmin:.1f}'  {model.describe()}")
+            event_bus.emit("calibration_point_added", (len(calibration.points), model.rms_arcmin))
+        event_bus.emit("calibration_complete", len(calibration.points))
+    except asyncio.CancelledError:
+        print("[Calibration] Calibration cancelled.")
+    finally:
+        if follow is not None:
+            await _stop_follow(follow)
+        stepper_ctrl.set_follow_mode("position")
+        event_bus.unsubscribe(sync_token)
+
+
+def start_calibration_mode(_=None):
+    switch_mode(calibration_mode_loop())
+
+
+event_bus.subscribe("goto_calibration_entered", start_calibration_mode)
@@ -0,0 +1,242 @@
+# core/catalog.py
+"""GOTO target catalog: memory-mapped RA/Dec/magnitude plus a visibility index.
+
+The on-disk format is a NumPy structured array (``CATALOG_DTYPE``) saved as
+``.npy`` and opened with ``mmap_mode="r"``. Build one from a star list:
+
+    python -m core.catalog build --csv hygdata.csv --mag-limit 6.5
+"""
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+
+from utils.astro import altaz_to_radec, local_sidereal_time, radec_to_altaz
+
+# ---- Optional config ----
+try:
+    from config.settings import CATALOG_PATH
+except Exception:
+    CATALOG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "data", "catalog.npy")
+try:
+    from config.settings import MIN_ALTITUDE
+except Exception:
+    MIN_ALTITUDE = 10.0         # degrees; lower objects are not offered for GOTO
+try:
+    from config.settings import SITE_LATITUDE
+except Exception:
+    SITE_LATITUDE = 51.4769
+try:
+    from config.settings import SITE_LONGITUDE
+except Exception:
+    SITE_LONGITUDE = 0.0
+
+CATALOG_DTYPE = np.dtype([("ra", "<f4"), ("dec", "<f4"), ("mag", "<f4"), ("name", "S16")])
+REFRESH_DEG = 0.25              # sky rotation (1 min of time) before alt/az is recomputed
+
+_catalog = None
+
+
+def _unit_vectors(ra_deg, dec_deg):
+    ra, dec = np.radians(ra_deg), np.radians(dec_deg)
+    cos_dec = np.cos(dec)
+    return np.stack([cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+class Catalog:
+    """Batch alt/az for every object, refreshed as the sky turns.
+
+    Equatorial unit vectors never change, so they are computed once and
+    nearest-object queries are a single dot product against them. Alt/az
+    and the visible lists are recomputed only after ``REFRESH_DEG`` of sky
+    rotation; the altitude order is re-sorted from the previous one
+    (nearly sorted input, so the stable sort is close to linear) and the
+    brightness order is a filter of a fixed magnitude ranking.
+    """
+
+    def __init__(self, records, lat=SITE_LATITUDE, lon=SITE_LONGITUDE,
+                 min_alt=MIN_ALTITUDE, clock=time.time):
+        self.records = records      # structured array, usually a read-only memmap
+        self.lat = lat
+        self.lon = lon
+        self.min_alt = min_alt
+        self.clock = clock
+        self.ra = np.asarray(records["ra"], dtype=np.float64)
+        self.dec = np.asarray(records["dec"], dtype=np.float64)
+        self.mag = np.asarray(records["mag"], dtype=np.float64)
+        self._xyz = _unit_vectors(self.ra, self.dec)
+        self._mag_order = np.argsort(self.mag, kind="stable")
+        self._index = None          # lower-case name -> row, built on first lookup
+
+        self.lst = None
+        self.alt = np.empty(len(self))
+        self.az = np.empty(len(self))
+        self._by_alt = np.empty(0, dtype=np.intp)
+        self._by_mag = np.empty(0, dtype=np.intp)
+
+    @classmethod
+    def load(cls, path=CATALOG_PATH, **kw):
+        """Open ``path``, building it from the built-in seed list if missing."""
+        if not os.path.exists(path):
+            from config.stars import CATALOG_SEED
+            save_catalog(path, seed_records(CATALOG_SEED))
+        return cls(np.load(path, mmap_mode="r"), **kw)
+
+    def __len__(self):
+        return len(self.records)
+
+    # ---------------- Lookup ----------------
+    def name(self, i):
+        return self.records["name"][i].decode()
+
+    def find(self, name):
+        """Row of the object called ``name`` (case-insensitive), or None."""
+        if self._index is None:
+            names = np.char.lower(np.char.decode(np.asarray(self.records["name"])))
+            self._index = {n: i for i, n in enumerate(names.tolist())}
+        return self._index.get(name.lower())
+
+    def label(self, i):
+        return f"{self.name(i)} {self.mag[i]:.1f}"
+
+    # ---------------- Visibility index ----------------
+    def refresh(self, t=None, force=False):
+        """Recompute alt/az if the sky turned ``REFRESH_DEG`` since last time."""
+        lst = float(local_sidereal_time(self.clock() if t is None else t, self.lon))
+        if not force and self.lst is not None and abs((lst - self.lst + 180.0) % 360.0 - 180.0) < REFRESH_DEG:
+            return False
+        self.lst = lst
+        self.alt, self.az = radec_to_altaz(self.ra, self.dec, lst, self.lat)
+        up = self.alt >= self.min_alt
+
+        # Previous order first, then risers; a stable sort of nearly sorted data
+        prev = self._by_alt[up[self._by_alt]]
+        risers = np.flatnonzero(up)
+        risers = risers[~np.isin(risers, prev, assume_unique=True)]
+        candidates = np.concatenate([prev, risers])
+        self._by_alt = candidates[np.argsort(-self.alt[candidates], kind="stable")]
+        self._by_mag = self._mag_order[up[self._mag_order]]
+        return True
+
+    def visible(self, by="altitude"):
+        """Rows above ``min_alt``, highest first (``by="altitude"``) or brightest first."""
+        self.refresh()
+        if by == "altitude":
+            return self._by_alt
+        if by == "magnitude":
+            return self._by_mag
+        raise ValueError(f"Unknown sort: {by!r}")
+
+    def page(self, start, count, by="altitude"):
+        """``(row, label, alt, az)`` for one screenful of the visible list (wraps)."""
+        rows = self.visible(by)
+        if not len(rows):
+            return []
+        picks = rows[np.arange(start, start + min(count, len(rows))) % len(rows)]
+        return [(int(i), self.label(i), float(self.alt[i]), float(self.az[i])) for i in picks]
+
+    def separation(self, row, others):
+        """Angular distance in degrees from ``row`` to each of ``others``."""
+        dots = self._xyz[np.asarray(others, dtype=np.intp)] @ self._xyz[row]
+        return np.degrees(np.arccos(np.clip(dots, -1.0, 1.0)))
+
+    def nearest(self, alt, az, t=None, visible_only=True):
+        """``(row, separation_deg)`` of the object closest to a pointing, or None."""
+        self.refresh(t)
+        ra, dec = altaz_to_radec(alt, az, self.lst, self.lat)
+        dots = self._xyz @ _unit_vectors(ra, dec)
+        if visible_only:
+            dots = np.where(self.alt >= self.min_alt, dots, -2.0)
+        i = int(np.argmax(dots))
+        if dots[i] < -1.0:
+            return None
+        return i, float(np.degrees(np.arccos(min(1.0, dots[i]))))
+
+
+def get_catalog(**kw):
+    """Process-wide catalog, opened on first use."""
+    global _catalog
+    if _catalog is None:
+        _catalog = Catalog.load(**kw)
+    return _catalog
+
+
+# ---------------- Building catalog files ----------------
+def _sexagesimal(text):
+    sign = -1.0 if text.strip().startswith("-") else 1.0
+    parts = [abs(float(p)) for p in text.strip().lstrip("+-").split(":")]
+    return sign * sum(p / 60.0 ** k for k, p in enumerate(parts))
+
+
+def seed_records(seed):
+    records = np.zeros(len(seed), dtype=CATALOG_DTYPE)
+    for row, (name, ra, dec, mag) in zip(records, seed):
+        row["ra"] = _sexagesimal(ra) * 15.0
+        row["dec"] = _sexagesimal(dec)
+        row["mag"] = mag
+        row["name"] = name.encode()[:16]
+    return records
+
+
+def _solar_system(rec):
+    # HYG lists the Sun as row 0: "Sol", distance 0, magnitude -26.7
+    if (rec.get("proper") or "").strip() == "Sol":
+        return True
+    try:
+        return float(rec.get("dist") or "nan") == 0.0
+    except ValueError:
+        return False
+
+
+def csv_records(path, mag_limit=6.5, ra_hours=True):
+    """Rows from a star CSV with ra/dec/mag columns (HYG layout: ra in hours).
+
+    Solar-system rows (HYG's "Sol", distance 0) are skipped.
+    """
+    rows = []
+    with open(path, newline="") as f:
+        for rec in csv.DictReader(f):
+            try:
+                mag = float(rec["mag"])
+                ra = float(rec["ra"]) * (15.0 if ra_hours else 1.0)
+                dec = float(rec["dec"])
+            except (KeyError, ValueError):
+                continue
+            if mag > mag_limit:
+                continue
+            if _solar_system(rec):
+                continue
+            name = rec.get("proper") or rec.get("name") or rec.get("bf") or f"HIP {rec.get('hip') or len(rows)}"
+            rows.append((ra, dec, mag, name.strip().encode()[:16]))
+    return np.array(rows, dtype=CATALOG_DTYPE)
+
+
+def save_catalog(path, records):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path, np.sort(records, order="mag"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the GOTO catalog file")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    build = sub.add_parser("build", help="write a catalog .npy")
+    build.add_argument("--csv", help="star list CSV (default: built-in seed list)")
+    build.add_argument("--mag-limit", type=float, default=6.5)
+    build.add_argument("--ra-degrees", action="store_true", help="CSV ra column is in degrees")
+    build.add_argument("--out", default=CATALOG_PATH)
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        records = csv_records(args.csv, args.mag_limit, ra_hours=not args.ra_degrees)
+    else:
+        from config.stars import CATALOG_SEED
+        records = seed_records(CATALOG_SEED)
+    save_catalog(args.out, records)
+    print(f"[Catalog] wrote {len(records)} objects to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
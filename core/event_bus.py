@@ -1,30 +1,137 @@
 import asyncio
+import itertools
 import threading
+import time
+
+
+def latest(old, new):
+    return new
 
 
 class EventBus:
+    """Publish/subscribe between the input threads, the modes and the displays.
+
+    Handlers are classified (plain or coroutine) when they subscribe and
+    each event's handler tuple is rebuilt only when its subscriptions
+    change, so an emit is a walk over a tuple. Emits from other threads
+    (gpiozero callbacks, samplers) are queued and drained by a single loop
+    wakeup; events with a coalescing policy are merged while they wait, so
+    a burst costs one dispatch.
+    """
+
     def __init__(self):
-        self.subscribers = {}
         self.loop = None  # Set in main
+        self._subs = {}             # event -> {token: (callback, is_coro, once)}
+        self._dispatch = {}         # event -> ((token, callback, is_coro, once), ...), dropped on change
+        self._events = {}           # token -> event
+        self._tokens = itertools.count(1)
+        self._merge = {}            # event -> (merge(old, new), key(data)) for queued cross-thread emits
+        self._pending = []          # [event, data] waiting for the loop, in emit order
+        self._pending_at = {}       # (event, key) -> index in _pending of the emit being merged into
+        self._lock = threading.Lock()
+        self.counters = {}          # event -> [emitted, coalesced, handler calls]
+        # Synchronous handlers slower than slow_handler_s are reported to
+        # on_slow_handler(event, callback, seconds); set by core.monitor
+        self.on_slow_handler = None
+        self.slow_handler_s = 0.005
+
+    # ---------------- Subscriptions ----------------
+    def subscribe(self, event, callback, once=False):
+        """Call ``callback(data)`` on ``event``; returns a token for ``unsubscribe``.
+
+        ``once`` handlers are unsubscribed as they are dispatched.
+        """
+        token = next(self._tokens)
+        self._subs.setdefault(event, {})[token] = (callback, asyncio.iscoroutinefunction(callback), once)
+        self._events[token] = event
+        self._dispatch.pop(event, None)
+        return token
+
+    def unsubscribe(self, token):
+        """Drop a subscription; False if it was already gone."""
+        event = self._events.pop(token, None)
+        if event is None:
+            return False
+        del self._subs[event][token]
+        self._dispatch.pop(event, None)
+        return True
+
+    def coalesce(self, event, merge=latest, key=None):
+        """Merge cross-thread emits of ``event`` still waiting for the loop.
 
-    def subscribe(self, event, callback):
-        if event not in self.subscribers:
-            self.subscribers[event] = []
-        self.subscribers[event].append(callback)
+        ``merge(old, new)`` gives the data of the single dispatch (by
+        default the latest value wins); emits whose ``key(data)`` differ,
+        e.g. readings for different axes, are kept apart.
+        """
+        self._merge[event] = (merge, key)
 
+    def stats(self):
+        return {event: dict(zip(("emitted", "coalesced", "handler_calls"), counts))
+                for event, counts in self.counters.items()}
+
+    # ---------------- Dispatch ----------------
     def emit(self, event, data=None):
         # Always run handlers on the main thread's asyncio loop
         if self.loop and threading.current_thread() is not threading.main_thread():
-            self.loop.call_soon_threadsafe(self._emit_handlers, event, data)
+            self._post(event, data)
         else:
+            self._counts(event)[0] += 1
+            self._emit_handlers(event, data)
+
+    def _counts(self, event):
+        counts = self.counters.get(event)
+        if counts is None:
+            counts = self.counters[event] = [0, 0, 0]
+        return counts
+
+    def _post(self, event, data):
+        policy = self._merge.get(event)
+        if policy is not None:
+            merge, key = policy
+            slot = (event, key(data) if key else None)
+        with self._lock:
+            counts = self._counts(event)
+            counts[0] += 1
+            wake = not self._pending
+            i = self._pending_at.get(slot) if policy else None
+            if i is not None:
+                self._pending[i][1] = merge(self._pending[i][1], data)
+                counts[1] += 1
+            else:
+                if policy is not None:
+                    self._pending_at[slot] = len(self._pending)
+                self._pending.append([event, data])
+        if wake:
+            self.loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._pending_at.clear()
+        for event, data in pending:
             self._emit_handlers(event, data)
 
     def _emit_handlers(self, event, data=None):
-        for cb in self.subscribers.get(event, []):
-            if asyncio.iscoroutinefunction(cb):
+        handlers = self._dispatch.get(event)
+        if handlers is None:
+            handlers = self._dispatch[event] = tuple(
+                (token, *entry) for token, entry in self._subs.get(event, {}).items())
+        if not handlers:
+            return
+        self._counts(event)[2] += len(handlers)
+        for token, cb, is_coro, once in handlers:
+            if once and not self.unsubscribe(token):
+                continue            # already fired by a nested emit
+            if is_coro:
                 asyncio.create_task(cb(data))
+            elif self.on_slow_handler is None:
+                cb(data)
             else:
+                t0 = time.perf_counter()
                 cb(data)
+                elapsed = time.perf_counter() - t0
+                if elapsed > self.slow_handler_s:
+                    self.on_slow_handler(event, cb, elapsed)
 
 
 event_bus = EventBus()
@@ -7,11 +7,15 @@ stepper_ctrl = None  # Set by main.py
 
 
 async def home_all_axes_and_center():
-    # Parallel homing for both axes
-    await asyncio.gather(
-        stepper_ctrl.home_axis("az"),
-        stepper_ctrl.home_axis("alt")
-    )
+    # Parallel homing for both axes; the trackers keep their hands off meanwhile
+    stepper_ctrl.set_follow_mode("external")
+    try:
+        await asyncio.gather(
+            stepper_ctrl.home_axis("az"),
+            stepper_ctrl.home_axis("alt")
+        )
+    finally:
+        stepper_ctrl.set_follow_mode("position")    # trackers hold where homing left the axes
     print("[Homing] Both axes homed.")
 
 
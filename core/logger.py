@@ -0,0 +1,341 @@
+# core/logger.py
+"""Telemetry: fixed-size binary records from the hot paths, written to rotating files.
+
+Every producing thread logs into its own preallocated ring (one writer,
+no locks, no per-record objects); a background writer drains the rings
+into ``telemetry.bin`` (rotated to ``.1``, ``.2``, ...). Decode a capture:
+
+    python -m core.logger summary data/telemetry/telemetry.bin*
+    python -m core.logger dump data/telemetry/telemetry.bin --kind step --axis az
+
+A file is a sequence of frames: 4-byte tag, u32 length, payload. ``HDR ``
+holds a JSON header, ``NAME`` a JSON ``{id: name}`` table and ``RECS``
+packed ``RECORD``s.
+"""
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+
+# ---- Optional config ----
+try:
+    from config.settings import TELEMETRY_ENABLED
+except Exception:
+    TELEMETRY_ENABLED = False       # rings always record; this starts the file writer
+try:
+    from config.settings import TELEMETRY_DIR
+except Exception:
+    TELEMETRY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "data", "telemetry")
+try:
+    from config.settings import TELEMETRY_FILE_BYTES
+except Exception:
+    TELEMETRY_FILE_BYTES = 4 << 20  # rotate after this many bytes
+try:
+    from config.settings import TELEMETRY_FILES
+except Exception:
+    TELEMETRY_FILES = 5             # telemetry.bin plus this many - 1 rotated files
+
+RING_RECORDS = 1 << 14              # per thread; ~3 s of both axes stepping flat out
+FLUSH_S = 0.25                      # writer drain period
+
+# t (clock s), kind, axis, pad, a (int), b (float)
+RECORD = struct.Struct("<dBB6xqd")
+FRAME = struct.Struct("<4sI")
+VERSION = 1
+
+# ---- Record kinds: (a, b) meaning ----
+STEP = 1            # step pulse: position after it, lateness s
+MISSED = 2          # deadline slipped: steps done in the move, lateness s
+TARGET = 3          # raw target write: target, -
+FILTER = 4          # filtered tracker target: target, -
+FOLLOW = 5          # velocity follower tick: emitted position, velocity steps/s
+FOLLOW_MODE = 6     # tracker follow mode: name id, -
+MODE = 7            # mode switch: name id, -
+EDGE = 8            # endstop edge: position, 1.0 hit / 0.0 release
+ADC = 9             # pot sample: raw value, -
+DROPPED = 10        # records lost to a ring overrun: count, -
+KINDS = {"step": STEP, "missed": MISSED, "target": TARGET, "filter": FILTER, "follow": FOLLOW,
+         "follow_mode": FOLLOW_MODE, "mode": MODE, "edge": EDGE, "adc": ADC, "dropped": DROPPED}
+
+AXES = {"az": 0, "alt": 1}
+NO_AXIS = 255
+
+
+class TelemetryRing:
+    """Single-writer ring of packed records.
+
+    ``put`` only packs into the preallocated buffer and bumps ``head``; the
+    reader copies out up to ``head`` and counts anything the writer lapped
+    (including slots overwritten while it was copying) as dropped.
+    """
+
+    def __init__(self, name, capacity=RING_RECORDS):
+        assert capacity & (capacity - 1) == 0, "capacity must be a power of two"
+        self.name = name
+        self.capacity = capacity
+        self.buf = bytearray(capacity * RECORD.size)
+        self.head = 0               # records written (writer thread only)
+        self.tail = 0               # records drained (reader only)
+        self.dropped = 0
+        self._mask = capacity - 1
+        self._pack = RECORD.pack_into
+
+    def put(self, t, kind, axis, a=0, b=0.0):
+        self._pack(self.buf, (self.head & self._mask) * RECORD.size, t, kind, axis, a, b)
+        self.head += 1
+
+    def drain(self):
+        """Bytes of every record since the last drain that is still intact."""
+        head = self.head
+        start = max(self.tail, head - self.capacity)
+        lost = start - self.tail
+        size = RECORD.size
+        lo, hi = (start & self._mask) * size, (head & self._mask) * size
+        if head == start:
+            data = b""
+        elif lo < hi:
+            data = bytes(self.buf[lo:hi])
+        else:
+            data = bytes(self.buf[lo:]) + bytes(self.buf[:hi])
+        # Slots the writer reached again while we were copying may be torn
+        lapped = max(0, self.head - self.capacity - start)
+        if lapped:
+            data = data[lapped * size:]
+            lost += lapped
+        self.tail = head
+        self.dropped += lost
+        return data, lost
+
+
+class Telemetry:
+    """Per-thread rings plus the background file writer."""
+
+    def __init__(self, capacity=RING_RECORDS):
+        self.capacity = capacity
+        self.rings = []
+        self.names = {}             # name -> id, for MODE / FOLLOW_MODE records
+        self.clock = None           # the step engine's clock, set on first use
+        self.directory = None
+        self._local = threading.local()
+        self._lock = threading.Lock()       # ring and name registration only
+        self._io_lock = threading.Lock()    # draining and file writes
+        self._stop = threading.Event()
+        self._thread = None
+        self._file = None
+        self._file_bytes = 0
+        self._names_written = 0
+
+    # ---------------- Producers (any thread) ----------------
+    def ring(self):
+        """The calling thread's ring, created on first use."""
+        ring = getattr(self._local, "ring", None)
+        if ring is None:
+            ring = TelemetryRing(threading.current_thread().name, self.capacity)
+            with self._lock:
+                self.rings.append(ring)
+            self._local.ring = ring
+        return ring
+
+    def log(self, kind, axis=NO_AXIS, a=0, b=0.0, t=None):
+        ring = getattr(self._local, "ring", None) or self.ring()
+        ring.put(self.now() if t is None else t, kind, axis, a, b)
+
+    def now(self):
+        if self.clock is None:
+            from hardware.backend import get_backend
+            self.clock = get_backend().clock
+        return self.clock()
+
+    def name_id(self, name):
+        ident = self.names.get(name)
+        if ident is None:
+            with self._lock:
+                ident = self.names.setdefault(name, len(self.names))
+        return ident
+
+    # ---------------- Writer ----------------
+    @property
+    def path(self):
+        return os.path.join(self.directory, "telemetry.bin")
+
+    def start(self, directory=TELEMETRY_DIR):
+        if self._thread is not None:
+            return
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+        print(f"[Telemetry] Writing to {self.path}")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self._thread = None
+        with self._io_lock:
+            self._write(self._file, self._drain())
+            self._file.close()
+            self._file = None
+
+    def save(self, path):
+        """One-off capture of what the rings hold now; no writer thread needed."""
+        with self._io_lock, open(path, "wb") as f:
+            self._write(f, [(b"HDR ", self._header())] + self._drain(all_names=True))
+
+    def _run(self):
+        while not self._stop.wait(FLUSH_S):
+            try:
+                with self._io_lock:
+                    self._file_bytes += self._write(self._file, self._drain())
+                    if self._file_bytes >= TELEMETRY_FILE_BYTES:
+                        self._rotate()
+            except OSError as exc:
+                print(f"[Telemetry] Write failed: {exc}")
+
+    def _header(self):
+        return json.dumps({"version": VERSION, "record": RECORD.format, "kinds": KINDS, "axes": AXES,
+                           "created": time.time(), "clock_at_created": self.now()}).encode()
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        self._file_bytes = self._file.tell() + self._write(self._file, [(b"HDR ", self._header())])
+        self._names_written = 0     # every file carries the full name table
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(TELEMETRY_FILES - 1, 0, -1):
+            src = self.path if i == 1 else f"{self.path}.{i - 1}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i}")
+        self._open()
+
+    def _drain(self, all_names=False):
+        """Frames for new names and every ring's new records."""
+        frames = []
+        if all_names or len(self.names) > self._names_written:
+            table = {ident: name for name, ident in list(self.names.items())}
+            frames.append((b"NAME", json.dumps(table).encode()))
+            if not all_names:
+                self._names_written = len(table)
+        with self._lock:
+            rings = list(self.rings)
+        chunks = []
+        for ring in rings:
+            data, lost = ring.drain()
+            if lost:
+                chunks.append(RECORD.pack(self.now(), DROPPED, NO_AXIS, lost, 0.0))
+            chunks.append(data)
+        records = b"".join(chunks)
+        if records:
+            frames.append((b"RECS", records))
+        return frames
+
+    @staticmethod
+    def _write(file, frames):
+        size = 0
+        for tag, payload in frames:
+            file.write(FRAME.pack(tag, len(payload)))
+            file.write(payload)
+            size += FRAME.size + len(payload)
+        file.flush()
+        return size
+
+
+telemetry = Telemetry()
+
+
+# ---------------- Decoding ----------------
+def read_capture(paths):
+    """``(records, names)`` from capture files: a time-sorted structured array and ``{id: name}``."""
+    import numpy as np
+    dtype = np.dtype([("t", "<f8"), ("kind", "u1"), ("axis", "u1"), ("pad", "V6"), ("a", "<i8"), ("b", "<f8")])
+    assert dtype.itemsize == RECORD.size
+    parts, names = [], {}
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        pos = 0
+        while pos + FRAME.size <= len(data):
+            tag, length = FRAME.unpack_from(data, pos)
+            payload = data[pos + FRAME.size:pos + FRAME.size + length]
+            pos += FRAME.size + length
+            if len(payload) < length:
+                break               # file cut short mid-frame
+            if tag == b"NAME":
+                names.update({int(k): v for k, v in json.loads(payload).items()})
+            elif tag == b"RECS":
+                parts.append(np.frombuffer(payload[:len(payload) - len(payload) % RECORD.size], dtype))
+    records = np.concatenate(parts) if parts else np.empty(0, dtype)
+    return records[np.argsort(records["t"], kind="stable")], names
+
+
+def summarize(records, names):
+    import numpy as np
+    kind_names = {v: k for k, v in KINDS.items()}
+    axis_names = {v: k for k, v in AXES.items()}
+    out = {"records": int(len(records))}
+    if len(records):
+        out["span_s"] = float(records["t"][-1] - records["t"][0])
+    out["counts"] = {kind_names.get(int(k), str(k)): int(n)
+                     for k, n in zip(*np.unique(records["kind"], return_counts=True))}
+    out["dropped"] = int(records["a"][records["kind"] == DROPPED].sum())
+    for axis, ident in AXES.items():
+        ax = records[records["axis"] == ident]
+        steps = ax[ax["kind"] == STEP]
+        if len(steps) < 2:
+            continue
+        late_us = steps["b"] * 1e6
+        intervals = np.diff(steps["t"])
+        # Intervals inside a run only: gaps over 50 ms are pauses between moves
+        intervals = intervals[intervals < 0.05] * 1e6
+        out[axis] = {
+            "steps": int(len(steps)),
+            "missed": int((ax["kind"] == MISSED).sum()),
+            "late_us": {p: float(np.percentile(late_us, q)) for p, q in (("p50", 50), ("p99", 99), ("max", 100))},
+            "interval_us": ({p: float(np.percentile(intervals, q)) for p, q in (("p50", 50), ("p99", 99))}
+                            if len(intervals) else {}),
+            "targets": int((ax["kind"] == TARGET).sum()),
+            "edges": int((ax["kind"] == EDGE).sum()),
+        }
+    modes = records[np.isin(records["kind"], (MODE, FOLLOW_MODE))]
+    out["modes"] = [(round(float(r["t"]), 3), kind_names[int(r["kind"])], axis_names.get(int(r["axis"]), "-"),
+                     names.get(int(r["a"]), str(int(r["a"])))) for r in modes]
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decode telemetry captures")
+    parser.add_argument("cmd", choices=("summary", "dump"))
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--kind", choices=sorted(KINDS), help="dump only this record kind")
+    parser.add_argument("--axis", choices=sorted(AXES), help="dump only this axis")
+    parser.add_argument("--limit", type=int, default=0, help="dump at most this many records")
+    args = parser.parse_args(argv)
+
+    records, names = read_capture(args.files)
+    if args.cmd == "summary":
+        print(json.dumps(summarize(records, names), indent=2))
+        return
+    if args.kind:
+        records = records[records["kind"] == KINDS[args.kind]]
+    if args.axis:
+        records = records[records["axis"] == AXES[args.axis]]
+    if args.limit:
+        records = records[:args.limit]
+    kind_names = {v: k for k, v in KINDS.items()}
+    axis_names = {v: k for k, v in AXES.items()}
+    for r in records:
+        kind = int(r["kind"])
+        a = names.get(int(r["a"]), int(r["a"])) if kind in (MODE, FOLLOW_MODE) else int(r["a"])
+        print(f"{r['t']:14.6f} {kind_names.get(kind, kind):11s} {axis_names.get(int(r['axis']), '-'):3s} "
+              f"{a!s:>10} {r['b']:.6g}")
+
+
+if __name__ == "__main__":
+    main()
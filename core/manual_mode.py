@@ -1,70 +1,107 @@
 from core.mode_manager import switch_mode
 from core.event_bus import event_bus
-from hardware.ads1115 import read_azimuth, read_altitude
+from hardware.ads1115 import read_azimuth, read_altitude, sampler
 import asyncio
 
-pot_sub = None  # We'll keep track so we can unsubscribe
-
-# Store the last pot value for each axis (for deadband logic)
-last_pot_az = None
-last_pot_alt = None
 POT_DEADBAND = 20  # Change this as needed for your pots
+POLL_HZ = 100      # fallback rate when the background sampler is not running
+FOLLOW_MODE = "velocity"  # "position" restores the filtered step-chasing tracker
+
+streams = {}  # axis -> PotStream while manual mode is active
+
+
+class PotStream:
+    """Binds one pot straight to a controller target.
+
+    Scale, offset and clamp are captured once at mode entry, so each
+    sample is a deadband check, one multiply and the target write.
+    """
+
+    def __init__(self, stepper_ctrl, axis, deadband=POT_DEADBAND):
+        self.axis = axis
+        self.deadband = deadband
+        self.max_steps = stepper_ctrl.max_steps
+        self.offset = getattr(stepper_ctrl, f"{axis}_manual_offset", 0)
+        self._write = lambda target, ctrl=stepper_ctrl, attr=f"{axis}_target": setattr(ctrl, attr, target)
+        self.last = None
+
+    def feed(self, value):
+        # Only update if user really turned the pot (deadband)
+        if self.last is not None and abs(value - self.last) <= self.deadband:
+            return
+        self.last = value
+        target = int(value * self.max_steps / 65535) + self.offset
+        self._write(max(0, min(target, self.max_steps)))
+
+
+async def _follow_sampler(stream):
+    async for _, value in sampler.samples(stream.axis):
+        stream.feed(value)
+
+
+async def _poll_pots():
+    while True:
+        streams["az"].feed(read_azimuth())
+        streams["alt"].feed(read_altitude())
+        await asyncio.sleep(1 / POLL_HZ)
 
 
 async def manual_mode_loop(_=None):
+    import core.homing
+    stepper_ctrl = core.homing.stepper_ctrl
     print("[ManualMode] Entered manual mode loop.")
+    # Set here rather than in start_manual_mode: a previous loop's cancel
+    # handler runs first and would otherwise undo it
+    stepper_ctrl.set_follow_mode(FOLLOW_MODE)
+    own = list(streams.values())
     try:
-        while True:
-            az = read_azimuth()
-            alt = read_altitude()
-            event_bus.emit("pot_changed", ("az", az))
-            event_bus.emit("pot_changed", ("alt", alt))
-            await asyncio.sleep(0.1)
+        if sampler.running:
+            # Every decimated ADC sample goes straight to the target (~100+ Hz)
+            await asyncio.gather(*(_follow_sampler(s) for s in streams.values()))
+        else:
+            await _poll_pots()
     except asyncio.CancelledError:
+        stepper_ctrl.set_follow_mode("position")
+        # pot_changed stays subscribed: drop the streams so it stops writing
+        # targets, unless a newer manual mode has already opened its own
+        if list(streams.values()) == own:
+            stop_manual_mode()
         print("[ManualMode] Manual mode cancelled.")
 
 
 def on_pot_changed(data):
-    global last_pot_az, last_pot_alt
+    # Bus path kept for other pot sources; manual mode itself bypasses the bus
     axis, value = data
-    import core.homing
-    stepper_ctrl = core.homing.stepper_ctrl
+    stream = streams.get(axis)
+    if stream is not None:
+        stream.feed(value)
+
+
+def open_streams(stepper_ctrl):
+    # Fresh streams also reset deadband memory when entering manual mode
+    streams.clear()
+    for axis in ("az", "alt"):
+        streams[axis] = PotStream(stepper_ctrl, axis)
 
-    # Map pot value to step range
-    pot_steps = int(value * stepper_ctrl.max_steps / 65535)
-    if axis == "az":
-        # Only update if user really turned the pot (deadband)
-        if last_pot_az is None or abs(value - last_pot_az) > POT_DEADBAND:
-            target = pot_steps + getattr(stepper_ctrl, 'az_manual_offset', 0)
-            target = max(0, min(target, stepper_ctrl.max_steps))
-            stepper_ctrl.az_target = target
-            last_pot_az = value
-    elif axis == "alt":
-        if last_pot_alt is None or abs(value - last_pot_alt) > POT_DEADBAND:
-            target = pot_steps + getattr(stepper_ctrl, 'alt_manual_offset', 0)
-            target = max(0, min(target, stepper_ctrl.max_steps))
-            stepper_ctrl.alt_target = target
-            last_pot_alt = value
+
+def sync_pots(stepper_ctrl):
+    """Re-zero the pot offsets so the pots' current readings map to the current position."""
+    for axis, read in (("az", read_azimuth), ("alt", read_altitude)):
+        position = getattr(stepper_ctrl, f"{axis}_position")
+        setattr(stepper_ctrl, f"{axis}_manual_offset", position - int(read() * stepper_ctrl.max_steps / 65535))
+        setattr(stepper_ctrl, f"{axis}_target", position)
 
 
 def start_manual_mode(_=None):
-    global pot_sub, last_pot_az, last_pot_alt
-    # Reset deadband memory when entering manual mode
-    last_pot_az = None
-    last_pot_alt = None
-    pot_sub = on_pot_changed
-    event_bus.subscribe("pot_changed", pot_sub)
+    import core.homing
+    open_streams(core.homing.stepper_ctrl)
     switch_mode(manual_mode_loop())
 
 
 def stop_manual_mode(_=None):
-    global pot_sub
-    if pot_sub:
-        # Best hygiene: remove listener to avoid conflict in other modes
-        if "pot_changed" in event_bus.subscribers and pot_sub in event_bus.subscribers["pot_changed"]:
-            event_bus.subscribers["pot_changed"].remove(pot_sub)
-        pot_sub = None
+    streams.clear()
 
 
 event_bus.subscribe("manual_mode_entered", start_manual_mode)
-# Optionally: event_bus.subscribe("manual_mode_exited", stop_manual_mode)
+event_bus.subscribe("pot_changed", on_pot_changed)
+event_bus.coalesce("pot_changed", key=lambda data: data[0])     # newest reading per axis
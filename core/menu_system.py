@@ -1,10 +1,68 @@
 # core/menu_system.py
 from config.menu import MENU_ITEMS
 from config.fonts import load_fonts
+from functools import lru_cache
+from PIL import Image, ImageDraw
 from textwrap import wrap
 import time
 
-font_normal, font_bold = load_fonts()
+SPINNER_FRAMES = ["-", "\\", "|", "/"]
+BACK_ITEM = {"label": "< Back"}
+
+
+@lru_cache(maxsize=1)
+def _fonts():
+    # Loaded on the first draw, not at import
+    return load_fonts()
+
+
+# ---- Render cache: bitmaps keyed by everything that affects them, so a change
+# of MENU_ITEMS labels or fonts simply misses and rebuilds ----
+@lru_cache(maxsize=16)
+def _menu_bitmap(labels, selected_index, size, fonts):
+    normal, bold = fonts
+    image = Image.new("1", size)
+    draw = ImageDraw.Draw(image)
+    item_height = 22
+    x, y_start = 10, 10
+    # Scroll so the selection stays on screen once the list outgrows it
+    rows = max(1, (size[1] - y_start) // item_height)
+    first = max(0, selected_index - rows + 1)
+    for i, label in enumerate(labels[first:first + rows], start=first):
+        y = y_start + (i - first) * item_height
+        if i == selected_index:
+            bar_height = item_height - 2
+            draw.rectangle((x - 5, y - 2, x + 110, y + bar_height), outline=255, fill=255)
+            draw.text((x, y), label, font=bold, fill=0)
+        else:
+            draw.text((x, y), label, font=normal, fill=255)
+    return image
+
+
+@lru_cache(maxsize=32)
+def _status_bitmap(msg, icon, size, fonts):
+    normal, bold = fonts
+    image = Image.new("1", size)
+    draw = ImageDraw.Draw(image)
+    # Word-wrap for 18 chars per line, up to 5 lines; explicit newlines are kept
+    lines = [line for part in msg.split("\n") for line in (wrap(part, width=18) or [""])]
+    y = 10
+    for line in lines[:5]:
+        draw.text((10, y), line, font=normal, fill=255)
+        y += 12
+    if icon:
+        draw.text((110, 5), icon, font=bold, fill=255)
+    return image
+
+
+@lru_cache(maxsize=16)
+def _glyph_bitmap(text, font):
+    # Sized to the glyph's extent from the text origin, so pasting at (x, y)
+    # matches draw.text((x, y), ...)
+    _, _, right, bottom = font.getbbox(text)
+    image = Image.new("1", (max(1, right), max(1, bottom)))
+    ImageDraw.Draw(image).text((0, 0), text, font=font, fill=255)
+    return image
 
 
 class MenuSystem:
@@ -15,39 +73,49 @@ class MenuSystem:
         self.selected_index = 0
         self.menu_items = MENU_ITEMS
         self.num_items = len(self.menu_items)
+        self._menu_index = 0            # main menu selection while a list is open
+        self.last_status = None         # (msg, icon) of the last status drawn, to restore it
 
         event_bus.subscribe("input.menu.rotary_changed", self.on_rotary)
         event_bus.subscribe("menu_ok_pressed", self.on_ok_pressed)
+        event_bus.subscribe("menu_list_opened", self.open_list)
+
+    def open_list(self, items):
+        """Show ``items`` (menu entries, optionally with ``data`` for their event) below a Back entry.
+
+        Picking an entry, or Back, returns to the main menu.
+        """
+        if self.menu_items is MENU_ITEMS:
+            self._menu_index = self.selected_index
+        self._set_items([BACK_ITEM] + list(items))
 
-    def on_rotary(self, direction):
-        if direction == "right":
-            self.selected_index = (self.selected_index + 1) % self.num_items
-        elif direction == "left":
-            self.selected_index = (self.selected_index - 1) % self.num_items
+    def _set_items(self, items, selected_index=0):
+        self.menu_items = items
+        self.num_items = len(items)
+        self.selected_index = selected_index
+        self.draw_menu()
+
+    def on_rotary(self, detents):
+        """Move the selection by ``detents`` (positive is right; bursts arrive summed)."""
+        self.selected_index = (self.selected_index + detents) % self.num_items
         self.draw_menu()
 
     def on_ok_pressed(self, _=None):
         entry = self.menu_items[self.selected_index]
+        if self.menu_items is not MENU_ITEMS:
+            self._set_items(MENU_ITEMS, self._menu_index)
+            if entry is BACK_ITEM:
+                return
         self.draw_status(f"Selected: {entry['label']}")
         if "event" in entry:
-            self.event_bus.emit(entry["event"])
+            self.event_bus.emit(entry["event"], entry.get("data"))
         else:
             print(f"[Menu] '{entry['label']}' selected (no event attached)")
 
     def draw_menu(self):
-        def draw(draw):
-            item_height = 22
-            x, y_start = 10, 10
-            for i, entry in enumerate(self.menu_items):
-                y = y_start + i * item_height
-                if i == self.selected_index:
-                    bar_height = item_height - 2
-                    draw.rectangle((x - 5, y - 2, x + 110, y + bar_height), outline=255, fill=255)
-                    draw.text((x, y), entry['label'], font=font_bold, fill=0)
-                else:
-                    draw.text((x, y), entry['label'], font=font_normal, fill=255)
-
-        self.menu_oled.draw(draw)
+        labels = tuple(entry['label'] for entry in self.menu_items)
+        bitmap = _menu_bitmap(labels, self.selected_index, self.menu_oled.device.size, _fonts())
+        self.menu_oled.draw(lambda draw: draw.bitmap((0, 0), bitmap, fill=255))
 
     def draw_status(self, msg, icon=None, animate=False, frame=None):
         """
@@ -57,23 +125,19 @@ class MenuSystem:
         :param animate: bool - if True, shows a spinner in the corner
         :param frame: int - required for animate, cycles spinner
         """
-        spinner_frames = ["-", "\\", "|", "/"]
         if animate and frame is None:
             # Use time-based frame if not supplied
             frame = int(time.time() * 4) % 4
+        self.last_status = (msg, icon)
+
+        bitmap = _status_bitmap(msg, icon, self.status_oled.device.size, _fonts())
+        spinner = None
+        if animate:
+            spinner = _glyph_bitmap(SPINNER_FRAMES[frame % len(SPINNER_FRAMES)], _fonts()[1])
 
         def draw(draw):
-            draw.rectangle((0, 0, 128, 128), outline=0, fill=0)
-            # Word-wrap for 18 chars per line, up to 5 lines
-            lines = wrap(msg, width=18)
-            y = 10
-            for line in lines[:5]:
-                draw.text((10, y), line, font=font_normal, fill=255)
-                y += 12
-            if icon:
-                draw.text((110, 5), icon, font=font_bold, fill=255)
-            if animate:
-                spinner = spinner_frames[frame % len(spinner_frames)]
-                draw.text((110, 110), spinner, font=font_bold, fill=255)
+            draw.bitmap((0, 0), bitmap, fill=255)
+            if spinner is not None:
+                draw.bitmap((110, 110), spinner, fill=255)
 
         self.status_oled.draw(draw)
@@ -1,11 +1,15 @@
 # core/mode_manager.py
 import asyncio
+from core.logger import MODE, telemetry
 
 current_mode_task = None
 
 
 def switch_mode(new_mode_coro):
     global current_mode_task
+    # A GOTO cancelled with the old mode brakes in its motion queue rather
+    # than stopping dead, so the new mode's first GOTO takes over at speed
     if current_mode_task is not None:
         current_mode_task.cancel()
     current_mode_task = asyncio.create_task(new_mode_coro)
+    telemetry.log(MODE, a=telemetry.name_id(getattr(new_mode_coro, "__qualname__", "?")))
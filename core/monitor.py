@@ -0,0 +1,180 @@
+# core/monitor.py
+from collections import deque
+from core.event_bus import event_bus
+import asyncio
+import time
+
+# ---- Optional config ----
+try:
+    from config.settings import MONITOR_WINDOW_S
+except Exception:
+    MONITOR_WINDOW_S = 30.0         # rolling window for every statistic
+try:
+    from config.settings import SLOW_HANDLER_S
+except Exception:
+    SLOW_HANDLER_S = 0.005          # event handlers slower than this are reported by name
+
+LAG_INTERVAL_S = 0.05               # loop-lag probe period
+STATS_INTERVAL_S = 0.5              # step engine sampling period
+DISPLAY_INTERVAL_S = 1.0            # diagnostics screen refresh
+
+status_display = None               # MenuSystem, set by main.py
+
+
+class RollingStats:
+    """Timestamped samples over the last ``window_s``, with percentiles on demand."""
+
+    def __init__(self, window_s=MONITOR_WINDOW_S):
+        self.window_s = window_s
+        self.samples = deque()      # (t, value)
+
+    def add(self, t, value):
+        self.samples.append((t, value))
+        while self.samples and t - self.samples[0][0] > self.window_s:
+            self.samples.popleft()
+
+    def values(self):
+        return [v for _, v in self.samples]
+
+    def summary(self):
+        values = sorted(self.values())
+        if not values:
+            return {"n": 0}
+        pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+        return {"n": len(values), "last": self.samples[-1][1], "p50": pick(0.5), "p99": pick(0.99),
+                "max": values[-1]}
+
+
+class LoopMonitor:
+    """Event-loop lag, step engine health and slow event handlers.
+
+    A probe task sleeps ``LAG_INTERVAL_S`` at a time and records how late
+    it wakes; the step engine's counters are sampled for achieved step
+    rate and missed deadlines; the event bus reports any synchronous
+    handler slower than ``SLOW_HANDLER_S``. Everything rolls over
+    ``MONITOR_WINDOW_S``.
+    """
+
+    def __init__(self, window_s=MONITOR_WINDOW_S):
+        self.window_s = window_s
+        self.lag_ms = RollingStats(window_s)
+        self.step_rate = {"az": RollingStats(window_s), "alt": RollingStats(window_s)}
+        self.missed = {"az": RollingStats(window_s), "alt": RollingStats(window_s)}
+        self.slow = deque()         # (t, "event:handler", ms)
+        self.engine = None
+        self._task = None
+        self._last_stats = None
+
+    def start(self, engine=None):
+        if self._task is None:
+            self.engine = engine
+            event_bus.on_slow_handler = self.slow_handler
+            event_bus.slow_handler_s = SLOW_HANDLER_S
+            self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if event_bus.on_slow_handler == self.slow_handler:
+            event_bus.on_slow_handler = None
+
+    async def run(self):
+        next_stats = time.monotonic()
+        while True:
+            expected = time.monotonic() + LAG_INTERVAL_S
+            await asyncio.sleep(LAG_INTERVAL_S)
+            now = time.monotonic()
+            self.lag_ms.add(now, max(0.0, now - expected) * 1000.0)
+            if self.engine is not None and now >= next_stats:
+                self._sample_engine(now)
+                next_stats = now + STATS_INTERVAL_S
+
+    def _sample_engine(self, now):
+        clock = self.engine.clock()
+        stats = self.engine.stats()
+        if self._last_stats is not None:
+            last_clock, last = self._last_stats
+            dt = clock - last_clock
+            for axis in self.step_rate:
+                if dt > 0:
+                    self.step_rate[axis].add(now, (stats[axis]["steps"] - last[axis]["steps"]) / dt)
+                self.missed[axis].add(now, stats[axis]["missed"] - last[axis]["missed"])
+        self._last_stats = (clock, stats)
+
+    def slow_handler(self, event, handler, seconds):
+        name = getattr(handler, "__qualname__", None) or getattr(getattr(handler, "func", None),
+                                                                 "__qualname__", repr(handler))
+        now = time.monotonic()
+        self.slow.append((now, f"{event}:{name}", seconds * 1000.0))
+        while self.slow and now - self.slow[0][0] > self.window_s:
+            self.slow.popleft()
+
+    # ---------------- Reading ----------------
+    def snapshot(self):
+        """Rolling figures as a dict (milliseconds, steps/s, counts)."""
+        slowest = {}
+        for _, name, ms in self.slow:
+            count, worst = slowest.get(name, (0, 0.0))
+            slowest[name] = (count + 1, max(worst, ms))
+        return {
+            "window_s": self.window_s,
+            "loop_lag_ms": self.lag_ms.summary(),
+            "step_rate": {axis: stats.summary() for axis, stats in self.step_rate.items()},
+            "missed_deadlines": {axis: int(sum(stats.values())) for axis, stats in self.missed.items()},
+            "slow_handlers": {name: {"count": c, "max_ms": round(worst, 2)}
+                              for name, (c, worst) in sorted(slowest.items(), key=lambda kv: -kv[1][1])},
+        }
+
+    def status_text(self):
+        """Five short lines for the status OLED."""
+        snap = self.snapshot()
+        lag = snap["loop_lag_ms"]
+        ms = lambda v: f"{v:.1f}" if v < 10 else f"{v:.0f}"
+        lines = [f"Lag p50 {ms(lag['p50'])}ms" if lag["n"] else "Lag --",
+                 f"p99 {ms(lag['p99'])} max {ms(lag['max'])}" if lag["n"] else ""]
+        for axis in ("az", "alt"):
+            rate = snap["step_rate"][axis]
+            lines.append(f"{axis.upper()} {rate.get('last', 0):.0f}/s miss {snap['missed_deadlines'][axis]}")
+        if snap["slow_handlers"]:
+            name, info = next(iter(snap["slow_handlers"].items()))
+            lines.append(f"{name.split(':')[-1].split('.')[-1][:11]} {info['max_ms']:.0f}ms")
+        else:
+            lines.append("No slow handlers")
+        return "\n".join(lines)
+
+
+monitor = LoopMonitor()
+
+
+async def diagnostics_overlay_loop():
+    print("[Monitor] Diagnostics overlay on.")
+    # Put back what the overlay covered, or its last frame stays up when it goes off
+    previous = status_display.last_status if status_display is not None else None
+    try:
+        while True:
+            if status_display is not None:
+                status_display.draw_status(monitor.status_text())
+            await asyncio.sleep(DISPLAY_INTERVAL_S)
+    except asyncio.CancelledError:
+        if status_display is not None:
+            if previous is not None:
+                status_display.draw_status(*previous)
+            status_display.draw_menu()
+        print("[Monitor] Diagnostics overlay off.")
+
+
+_diagnostics_task = None
+
+
+def toggle_diagnostics(_=None):
+    """Show or hide the diagnostics screen; the active mode keeps running."""
+    global _diagnostics_task
+    if _diagnostics_task is not None and not _diagnostics_task.done():
+        _diagnostics_task.cancel()
+        _diagnostics_task = None
+    else:
+        _diagnostics_task = asyncio.create_task(diagnostics_overlay_loop())
+
+
+event_bus.subscribe("diagnostics_entered", toggle_diagnostics)
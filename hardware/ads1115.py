@@ -1,19 +1,156 @@
-import board
-import busio
-import adafruit_ads1x15.ads1115 as ADS
-from adafruit_ads1x15.analog_in import AnalogIn
+import asyncio
+import threading
+from collections import deque
+from core.logger import ADC, AXES, NO_AXIS, telemetry
+from hardware.backend import get_backend
 
-i2c = busio.I2C(board.SCL, board.SDA)
-ads = ADS.ADS1115(i2c, address=0x48)
+# ---- Optional config (falls back to the ADS1115's fastest rate) ----
+try:
+    from config.settings import ADC_DATA_RATE
+except Exception:
+    ADC_DATA_RATE = 860     # conversions/s, shared by all channels
+try:
+    from config.settings import ADC_OVERSAMPLE
+except Exception:
+    ADC_OVERSAMPLE = 4      # conversions averaged per published sample
 
-# Persistent channel objects
-chan_az = AnalogIn(ads, ADS.P2)
-chan_alt = AnalogIn(ads, ADS.P3)
+AZ_CHANNEL, ALT_CHANNEL = 2, 3
+
+# Channel objects (ADS1115 at 0x48 on the real backend), opened on first use
+# so importing this module never touches the I2C bus
+_channels = {}
+
+
+def adc_channel(number):
+    if number not in _channels:
+        _channels[number] = get_backend().adc_channel(number)
+    return _channels[number]
+
+
+class AdcSampler:
+    """Background sampler: continuous conversion, oversampled and decimated.
+
+    A worker thread cycles through the channels, takes ``oversample``
+    back-to-back conversions of each (one mux switch per published sample)
+    and appends the average with its timestamp to a per-channel ring
+    buffer. Readers never touch the I2C bus.
+    """
+
+    def __init__(self, channels, data_rate=ADC_DATA_RATE, oversample=ADC_OVERSAMPLE,
+                 history=256, backend=None):
+        self.backend = backend                        # resolved by start()
+        self.channels = channels                      # name -> ADC input number
+        self._inputs = {}                             # name -> AnalogIn, opened by start()
+        self.data_rate = data_rate
+        self.oversample = oversample
+        self.buffers = {name: deque(maxlen=history) for name in channels}
+        self.sequence = {name: 0 for name in channels}
+        self.running = False
+        self._waiters = {name: set() for name in channels}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def sample_rate(self):
+        """Published samples per second, per channel."""
+        return self.data_rate / (self.oversample * len(self.channels))
+
+    def start(self):
+        if self.running:
+            return
+        self.backend = self.backend or get_backend()
+        self._inputs = {name: adc_channel(number) for name, number in self.channels.items()}
+        self.backend.adc_set_continuous(self.data_rate)
+        self.running = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="adc-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    # ---------------- Readers (any thread) ----------------
+    def latest(self, name):
+        """Most recent filtered value, or None before the first sample."""
+        sample = self.latest_sample(name)
+        return None if sample is None else sample[1]
+
+    def latest_sample(self, name):
+        buf = self.buffers[name]
+        return buf[-1] if buf else None
+
+    async def samples(self, name):
+        """Async iterator of ``(timestamp, value)`` as they are published."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = (loop, event)
+        with self._lock:
+            self._waiters[name].add(waiter)
+            seen = self.sequence[name]
+        try:
+            while True:
+                await event.wait()
+                event.clear()
+                with self._lock:
+                    new = min(self.sequence[name] - seen, len(self.buffers[name]))
+                    seen = self.sequence[name]
+                    batch = list(self.buffers[name])[-new:] if new else []
+                for sample in batch:
+                    yield sample
+        finally:
+            with self._lock:
+                self._waiters[name].discard(waiter)
+
+    # ---------------- Worker thread ----------------
+    def _run(self):
+        clock = self.backend.clock
+        scale = self.backend.time_scale
+        period = 1.0 / self.data_rate
+        next_t = clock()
+        while not self._stop.is_set():
+            for name, chan in self._inputs.items():
+                total = count = 0
+                for _ in range(self.oversample):
+                    next_t += period
+                    wait_s = (next_t - clock()) / scale
+                    if wait_s > 0:
+                        if self._stop.wait(wait_s):
+                            return
+                    elif wait_s < -10 * period / scale:
+                        next_t = clock()   # fell behind (bus stall): don't burst
+                    try:
+                        total += chan.value
+                        count += 1
+                    except OSError as exc:
+                        print(f"[ADS1115] Read failed on {name}: {exc}")
+                if count:
+                    self._publish(name, clock(), total // count)
+
+    def _publish(self, name, t, value):
+        telemetry.log(ADC, AXES.get(name, NO_AXIS), value, t=t)
+        with self._lock:
+            self.buffers[name].append((t, value))
+            self.sequence[name] += 1
+            waiters = list(self._waiters[name])
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+
+sampler = AdcSampler({"az": AZ_CHANNEL, "alt": ALT_CHANNEL})
 
 
 def read_azimuth():
-    return chan_az.value
+    if sampler.running and sampler.buffers["az"]:
+        return sampler.latest("az")
+    return adc_channel(AZ_CHANNEL).value
 
 
 def read_altitude():
-    return chan_alt.value
+    if sampler.running and sampler.buffers["alt"]:
+        return sampler.latest("alt")
+    return adc_channel(ALT_CHANNEL).value
@@ -0,0 +1,89 @@
+# hardware/backend.py
+import os
+import time
+
+# ---- Optional config (falls back to real hardware) ----
+try:
+    from config.settings import BACKEND
+except Exception:
+    BACKEND = "gpio"
+
+_backend = None
+
+
+class GpioBackend:
+    """Real Raspberry Pi hardware: gpiozero pins, ADS1115 over I2C, luma OLEDs.
+
+    Libraries are imported when a device is first requested, so selecting
+    another backend never touches them.
+    """
+
+    name = "gpio"
+    time_scale = 1.0
+    clock = staticmethod(time.perf_counter)
+    wall_time = staticmethod(time.time)     # UTC seconds, NTP-disciplined
+
+    def __init__(self):
+        self._ads = None
+
+    def output_device(self, pin):
+        from gpiozero import OutputDevice
+        return OutputDevice(pin)
+
+    def digital_output(self, pin):
+        from gpiozero import DigitalOutputDevice
+        return DigitalOutputDevice(pin)
+
+    def digital_input(self, pin, pull_up=True):
+        from gpiozero import DigitalInputDevice
+        return DigitalInputDevice(pin, pull_up=pull_up)
+
+    def button(self, pin, pull_up=True):
+        from gpiozero import Button
+        return Button(pin, pull_up=pull_up)
+
+    def adc_device(self, address=0x48):
+        if self._ads is None:
+            import board
+            import busio
+            import adafruit_ads1x15.ads1115 as ADS
+            i2c = busio.I2C(board.SCL, board.SDA)
+            self._ads = ADS.ADS1115(i2c, address=address)
+        return self._ads
+
+    def adc_set_continuous(self, data_rate, address=0x48):
+        from adafruit_ads1x15.ads1x15 import Mode
+        ads = self.adc_device(address)
+        ads.data_rate = data_rate
+        ads.mode = Mode.CONTINUOUS
+
+    def adc_channel(self, channel, address=0x48):
+        import adafruit_ads1x15.ads1115 as ADS
+        from adafruit_ads1x15.analog_in import AnalogIn
+        return AnalogIn(self.adc_device(address), getattr(ADS, f"P{channel}"))
+
+    def oled_device(self, i2c_addr, width=128, height=128):
+        from luma.core.interface.serial import i2c
+        from luma.oled.device import sh1107
+        return sh1107(i2c(port=1, address=i2c_addr), width=width, height=height)
+
+
+def get_backend():
+    """Process-wide backend; ``OPTISCOPE_BACKEND=sim`` selects the simulator."""
+    global _backend
+    if _backend is None:
+        name = os.environ.get("OPTISCOPE_BACKEND", BACKEND)
+        if name == "sim":
+            from hardware.sim import SimBackend
+            _backend = SimBackend(time_scale=float(os.environ.get("OPTISCOPE_SIM_SPEED", 1.0)))
+        elif name == "gpio":
+            _backend = GpioBackend()
+        else:
+            raise ValueError(f"Unknown hardware backend: {name!r}")
+    return _backend
+
+
+def set_backend(backend):
+    """Install a backend (e.g. a configured SimBackend) before devices are built."""
+    global _backend
+    _backend = backend
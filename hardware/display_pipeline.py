@@ -0,0 +1,78 @@
+# hardware/display_pipeline.py
+import threading
+import time
+
+
+class DisplayPipeline:
+    """Worker thread that owns the OLEDs and renders off the event loop.
+
+    ``OLEDDisplay.draw`` becomes a non-blocking request: only the latest
+    request per display is kept, each display gets at most ``max_fps``
+    frames per second, and frames identical to the last one are not sent.
+    """
+
+    def __init__(self, displays, max_fps=15):
+        self.displays = list(displays)
+        self.min_interval = 1.0 / max_fps
+        self._pending = {}              # display -> latest draw_fn
+        self._last_sent = {d: 0.0 for d in self.displays}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self.stats = {"requests": 0, "coalesced": 0, "rendered": 0, "sent": 0, "unchanged": 0}
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        for display in self.displays:
+            display.pipeline = self
+        self._thread = threading.Thread(target=self._run, name="display-pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        for display in self.displays:
+            display.pipeline = None
+
+    def request(self, display, draw_fn):
+        with self._lock:
+            self.stats["requests"] += 1
+            if display in self._pending:
+                self.stats["coalesced"] += 1
+            self._pending[display] = draw_fn
+        self._wake.set()
+
+    def _run(self):
+        while self._running:
+            self._wake.clear()
+            now = time.monotonic()
+            job, next_due = None, None
+            with self._lock:
+                for display in self._pending:
+                    ready_at = self._last_sent[display] + self.min_interval
+                    if ready_at <= now:
+                        job = (display, self._pending.pop(display))
+                        break
+                    next_due = ready_at if next_due is None else min(next_due, ready_at)
+            if job is None:
+                self._wake.wait(None if next_due is None else next_due - now)
+                continue
+
+            display, draw_fn = job
+            try:
+                sent = display.render(draw_fn)
+            except Exception as exc:
+                print(f"[Display] Render failed: {exc}")
+                continue
+            self.stats["rendered"] += 1
+            if sent:
+                self.stats["sent"] += 1
+                self._last_sent[display] = time.monotonic()
+            else:
+                self.stats["unchanged"] += 1
@@ -1,27 +1,117 @@
-from gpiozero import Button
 import asyncio
+import operator
+import threading
+from collections import deque
+from hardware.backend import get_backend
+
+# ---- Optional config ----
+try:
+    from config.settings import ROTARY_ACCEL_START
+except Exception:
+    ROTARY_ACCEL_START = 15.0       # detents/s before a detent counts as more than one item
+try:
+    from config.settings import ROTARY_ACCEL_STEP
+except Exception:
+    ROTARY_ACCEL_STEP = 15.0        # each further this-many detents/s adds one item per detent
+try:
+    from config.settings import ROTARY_ACCEL_MAX
+except Exception:
+    ROTARY_ACCEL_MAX = 4
 
 CLK = 13  # BCM numbering
 DT = 15
 SW = 14
 SYNC_OK_PIN = 7  # SPI_CE1
 
+TRANSITIONS_PER_DETENT = 2          # the encoder rests at CLK == DT
+RATE_RESET_S = 0.3                  # a pause longer than this restarts acceleration
+SKIPPED = 2                         # both pins changed: an edge was missed
+
+
+def _transition_table():
+    """Quadrature step for each (previous << 2 | current) CLK/DT state."""
+    sequence = (0b00, 0b10, 0b11, 0b01)     # turning right: CLK leads DT
+    table = [0] * 16
+    for i, state in enumerate(sequence):
+        table[state << 2 | sequence[(i + 1) % 4]] = 1
+        table[state << 2 | sequence[(i - 1) % 4]] = -1
+        table[state << 2 | sequence[(i + 2) % 4]] = SKIPPED
+    return tuple(table)
+
+
+TRANSITIONS = _transition_table()
+
+
+class QuadratureDecoder:
+    """Table-driven decoder fed with CLK/DT states from edges on either pin.
+
+    Contact bounce walks back and forth through the table and cancels out;
+    a state two steps away (an edge lost in a fast spin) is counted as two
+    steps in the current direction. Each detent is timestamped and the
+    detent rate scales it into items for acceleration.
+    """
+
+    def __init__(self, clock, state=0):
+        self.clock = clock
+        self.state = state
+        self.position = 0           # detents, unaccelerated
+        self.edges = deque(maxlen=64)   # (t, state) of recent edges
+        self.missed_edges = 0
+        self.rate = 0.0             # smoothed detents/s
+        self._quarters = 0
+        self._direction = 1
+        self._last_detent = None
+
+    def edge(self, state):
+        """Feed the new pin state; returns the accelerated detents it completes."""
+        t = self.clock()
+        self.edges.append((t, state))
+        step = TRANSITIONS[self.state << 2 | state]
+        self.state = state
+        if step == SKIPPED:
+            self.missed_edges += 1
+            step = 2 * self._direction
+        elif step:
+            self._direction = step
+        self._quarters += step
+        items = 0
+        while abs(self._quarters) >= TRANSITIONS_PER_DETENT:
+            direction = 1 if self._quarters > 0 else -1
+            self._quarters -= direction * TRANSITIONS_PER_DETENT
+            self.position += direction
+            items += direction * self._accelerate(t, direction)
+        return items
+
+    def _accelerate(self, t, direction):
+        last, self._last_detent = self._last_detent, (t, direction)
+        if last is None or last[1] != direction or t - last[0] > RATE_RESET_S:
+            self.rate = 0.0
+        elif t > last[0]:
+            rate = 1.0 / (t - last[0])
+            self.rate = min(rate, 0.5 * self.rate + 0.5 * rate)     # speed up smoothly, slow down at once
+        extra = int(max(0.0, self.rate - ROTARY_ACCEL_START) / ROTARY_ACCEL_STEP)
+        return min(ROTARY_ACCEL_MAX, 1 + extra)
 
 
 class InputManager:
-    def __init__(self, event_bus):
+    def __init__(self, event_bus, backend=None):
         self.event_bus = event_bus
-        self.position = 0
+        # Detents that arrive before the loop next runs are dispatched as
+        # one event carrying their sum, so a fast spin costs one redraw
+        event_bus.coalesce("input.menu.rotary_changed", operator.add)
+        backend = backend or get_backend()
 
-        self.clk = Button(CLK, pull_up=True)
-        self.dt = Button(DT, pull_up=True)
-        self.sw = Button(SW, pull_up=True)
-        self.sync_ok_button = Button(SYNC_OK_PIN, pull_up=True)
+        self.clk = backend.button(CLK, pull_up=True)
+        self.dt = backend.button(DT, pull_up=True)
+        self.sw = backend.button(SW, pull_up=True)
+        self.sync_ok_button = backend.button(SYNC_OK_PIN, pull_up=True)
 
-        self.last_clk = self.clk.value
+        self.decoder = QuadratureDecoder(backend.clock, self._rotary_state())
+        self._rotary_lock = threading.Lock()    # CLK and DT callbacks may run on different threads
 
-        self.clk.when_pressed = self.rotary_changed
-        self.clk.when_released = self.rotary_changed
+        for pin in (self.clk, self.dt):
+            pin.when_pressed = self.rotary_changed
+            pin.when_released = self.rotary_changed
 
         self.sync_ok_button.when_pressed = self.sync_ok_pressed
 
@@ -33,21 +123,18 @@ class InputManager:
     def sync_ok_pressed(self):
         self.event_bus.emit("sync_ok_pressed")
 
-    def rotary_changed(self):
-        clk_state = self.clk.value
-        dt_state = self.dt.value
-        if clk_state != self.last_clk:
-            if dt_state != clk_state:
-                direction = "right"
-                self.position += 1
-            else:
-                direction = "left"
-                self.position -= 1
-            self.event_bus.emit("input.menu.rotary_changed", direction)
-            self.last_clk = clk_state
+    @property
+    def position(self):
+        return self.decoder.position
 
-    def ok_pressed(self):
-        self.event_bus.emit("menu_ok_pressed")
+    def _rotary_state(self):
+        return int(self.clk.value) << 1 | int(self.dt.value)
+
+    def rotary_changed(self):
+        with self._rotary_lock:
+            items = self.decoder.edge(self._rotary_state())
+        if items:
+            self.event_bus.emit("input.menu.rotary_changed", items)    # positive is right
 
     async def poll_inputs(self):
         # No need for fast polling; events are interrupt-driven
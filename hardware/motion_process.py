@@ -0,0 +1,692 @@
+# hardware/motion_process.py
+"""Step engine in its own process (``MOTION_PROCESS = True``).
+
+The engine process owns the step, direction, enable, microstep and
+endstop pins and
+runs an ordinary StepEngine, so PIL rendering, I2C transfers and event
+handlers in the main process never hold the GIL it steps under. Both
+sides map one fixed-layout ``multiprocessing.shared_memory`` block:
+
+* axis state: positions and driver phases (written by the engine on
+  every step), targets,
+  offsets, follow mode and homed flags (published by the controller),
+  engine status flags, statistics and the homing edge latch;
+* a single-producer, single-consumer command ring and a float64 ring for
+  step times, each advanced by head/tail counters with no lock shared
+  between the processes. The doorbell event rung after each push is the
+  memory barrier that makes a published head safe to follow.
+
+Any other process (UI, sensors) can ``SharedMotionState.attach(name)``
+and read positions without a round-trip. Move completions and endstop
+edges come back over a pipe, read by a thread that resolves the futures.
+
+Moves cross as data, so schedules are arrays, ConstantSchedule or
+SeekSchedule, and ``until`` is a step engine condition name. Under the
+simulator the engine process builds its own SimBackend on the same clock;
+the simulated axes it drives are not the main process's. Telemetry
+records from the engine process are not captured.
+"""
+import asyncio
+import itertools
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import get_context, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from hardware.backend import get_backend
+from hardware.step_engine import ARRIVED, CONTINUE, ENDSTOP, RELEASE, TRIGGER
+from utils.motion_planner import ConstantSchedule, MotionProfile, SeekSchedule
+
+# ---- Optional config ----
+try:
+    from config.settings import MOTION_PRIORITY
+except Exception:
+    MOTION_PRIORITY = 50            # SCHED_FIFO priority for the engine process (needs CAP_SYS_NICE)
+try:
+    from config.settings import MOTION_CPU
+except Exception:
+    MOTION_CPU = None               # pin the engine process to this CPU, e.g. an isolcpus core
+
+AXES = ("az", "alt")
+INDEX = {axis: i for i, axis in enumerate(AXES)}
+MODES = ("position", "velocity", "external")
+CONDITIONS = (None, ENDSTOP, TRIGGER, RELEASE, ARRIVED)
+
+MAGIC = 0x504D534F                  # "OSMP"
+VERSION = 2
+SLOTS = 256                         # command ring entries
+DATA_LEN = 1 << 16                  # step time ring entries (a full-travel slew fits)
+HOUSEKEEPING_S = 0.05               # engine process stats/heartbeat period
+START_TIMEOUT_S = 20.0              # spawning re-imports numpy and the engine
+
+# ---- Shared block layout ----
+HEADER = np.dtype([
+    ("magic", "u4"), ("version", "u2"), ("n_axes", "u2"), ("pid", "i4"), ("ready", "u4"),
+    ("cmd_head", "u8"), ("data_head", "u8"),                        # written by the controller
+    ("cmd_tail", "u8"), ("data_tail", "u8"), ("applied", "u8"),     # written by the engine
+    ("heartbeat", "f8"),
+], align=True)
+AXIS = np.dtype([
+    ("position", "i8"), ("phase", "i8"),                            # engine, every step
+    ("target", "i8"), ("offset", "i8"), ("mode", "u4"), ("flags", "u4"),   # controller
+    ("status", "u4"), ("trigger", "i8"), ("release", "i8"),         # engine
+    ("steps", "u8"), ("missed", "u8"), ("moves", "u8"),
+    ("max_late_s", "f8"), ("commanded_rate", "f8"), ("achieved_rate", "f8"),
+], align=True)
+COMMAND = np.dtype([
+    ("op", "u1"), ("axis", "u1"), ("forward", "u1"), ("until", "u1"), ("kind", "u1"), ("stop", "u1"),
+    ("units", "u1"), ("group", "u2"), ("n", "u4"), ("ident", "u8"), ("value", "i8"), ("data", "u8"),
+    ("start_at", "f8"), ("params", "f8", (4,)),
+], align=True)
+
+# Controller flags
+HOMED = 1
+# Engine status
+ENABLED, BUSY, ENDSTOP_HIT, HAS_ENDSTOP, ARMED, TRIGGER_LATCHED, RELEASE_LATCHED = (1 << i for i in range(7))
+# Commands and schedule kinds
+OP_MOVE, OP_CANCEL, OP_CANCEL_AXIS, OP_ENABLE, OP_SET_POSITION, OP_ARM, OP_DISARM, OP_STOP = range(1, 9)
+ARRAY, CONSTANT, SEEK = range(3)
+
+
+def _offsets():
+    out, off = [], 0
+    for dtype, count in ((HEADER, 1), (AXIS, len(AXES)), (COMMAND, SLOTS), (np.dtype(np.float64), DATA_LEN)):
+        off = -(-off // 64) * 64            # each region on its own cache line
+        out.append(off)
+        off += dtype.itemsize * count
+    return out, off
+
+
+OFFSETS, SIZE = _offsets()
+_BLANK = np.zeros((), COMMAND)
+
+
+class SharedMotionState:
+    """Views onto the shared block; ``attach`` it from any process to read positions."""
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        buf = shm.buf
+        self.header = np.ndarray((), HEADER, buf, OFFSETS[0])
+        self.axes = np.ndarray((len(AXES),), AXIS, buf, OFFSETS[1])
+        self.commands = np.ndarray((SLOTS,), COMMAND, buf, OFFSETS[2])
+        self.data = np.ndarray((DATA_LEN,), np.float64, buf, OFFSETS[3])
+
+    @classmethod
+    def create(cls):
+        state = cls(SharedMemory(create=True, size=SIZE), owner=True)
+        state.shm.buf[:SIZE] = bytes(SIZE)
+        state.header["magic"], state.header["version"], state.header["n_axes"] = MAGIC, VERSION, len(AXES)
+        return state
+
+    @classmethod
+    def attach(cls, name, track=False):
+        shm = SharedMemory(name=name)
+        if not track:
+            # Readers must not have the block unlinked when they exit (Python < 3.13)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        state = cls(shm)
+        if state.header["magic"] != MAGIC or state.header["version"] != VERSION:
+            state.close()
+            raise ValueError(f"{name} is not a motion state block")
+        return state
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        # Views hold exported buffers, so they go before the mapping does;
+        # late readers see the final header and axis state from a copy
+        self.header, self.axes = self.header.copy(), self.axes.copy()
+        self.commands = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    # ---------------- Reading (any process) ----------------
+    def position(self, axis):
+        return int(self.axes["position"][INDEX[axis]])
+
+    def snapshot(self):
+        out = {}
+        for axis, i in INDEX.items():
+            row = self.axes[i]
+            status = int(row["status"])
+            out[axis] = {
+                "position": int(row["position"]), "target": int(row["target"]), "offset": int(row["offset"]),
+                "mode": MODES[int(row["mode"])], "homed": bool(row["flags"] & HOMED),
+                "enabled": bool(status & ENABLED), "busy": bool(status & BUSY),
+                "endstop": bool(status & ENDSTOP_HIT),
+            }
+        return out
+
+    # ---------------- Controller side ----------------
+    def publish(self, axis, target, offset, mode, homed):
+        row = self.axes[INDEX[axis]]
+        row["target"], row["offset"], row["mode"] = target, offset, MODES.index(mode)
+        row["flags"] = HOMED if homed else 0
+
+
+class CommandRing:
+    """Lock-free single-producer, single-consumer ring in the shared block.
+
+    The producer writes slots (and step times) and then advances the head;
+    the consumer copies them out and then advances the tail. Each counter
+    has exactly one writer.
+    """
+
+    def __init__(self, state):
+        self.state = state
+
+    def push(self, commands, alive=lambda: True):
+        """Publish ``(fields, times)`` commands together; returns the sequence of the last."""
+        header, slots, data = self.state.header, self.state.commands, self.state.data
+        head, data_head = int(header["cmd_head"]), int(header["data_head"])
+        while head + len(commands) - int(header["cmd_tail"]) > SLOTS:
+            self._wait_for_room(alive)
+        for fields, times in commands:
+            slots[head % SLOTS] = _BLANK
+            slot = slots[head % SLOTS]
+            for name, value in fields.items():
+                slot[name] = value
+            if times is not None and len(times):
+                n = len(times)
+                if n > DATA_LEN:
+                    raise ValueError(f"move of {n} steps exceeds the step time ring")
+                start = data_head
+                if start % DATA_LEN + n > DATA_LEN:
+                    start += DATA_LEN - start % DATA_LEN    # keep each move contiguous
+                while start + n - int(header["data_tail"]) > DATA_LEN:
+                    self._wait_for_room(alive)
+                data[start % DATA_LEN:start % DATA_LEN + n] = times
+                slot["n"], slot["data"] = n, start
+                data_head = start + n
+            head += 1
+        header["data_head"] = data_head
+        header["cmd_head"] = head
+        return head
+
+    @staticmethod
+    def _wait_for_room(alive):
+        if not alive():
+            raise RuntimeError("motion process is not running")
+        time.sleep(0.0005)
+
+    def drain(self):
+        """Yield ``(sequence, slot, times)`` for every published command (consumer)."""
+        header, slots, data = self.state.header, self.state.commands, self.state.data
+        tail, head = int(header["cmd_tail"]), int(header["cmd_head"])
+        while tail < head:
+            slot = slots[tail % SLOTS].copy()
+            times = None
+            if slot["n"]:
+                start = int(slot["data"]) % DATA_LEN
+                times = data[start:start + int(slot["n"])].copy()
+                header["data_tail"] = int(slot["data"]) + int(slot["n"])
+            tail += 1
+            header["cmd_tail"] = tail
+            yield tail, slot, times
+
+
+class _Positions:
+    """``StepEngine.position`` (or ``phase``) backed by the shared block."""
+
+    def __init__(self, state, setter=None, field="position"):
+        self.state = state
+        self.setter = setter
+        self.field = field
+
+    def __getitem__(self, axis):
+        return int(self.state.axes[self.field][INDEX[axis]])
+
+    def __setitem__(self, axis, value):
+        if self.setter is None:
+            self.state.axes[self.field][INDEX[axis]] = value
+        else:
+            self.setter(axis, int(value))
+
+
+class _Latch:
+    """Read-only ``{hit: position}`` view of the engine process's edge latch."""
+
+    def __init__(self, state, axis):
+        self.state = state
+        self.index = INDEX[axis]
+
+    def __getitem__(self, hit):
+        flag, field = (TRIGGER_LATCHED, "trigger") if hit else (RELEASE_LATCHED, "release")
+        row = self.state.axes[self.index]
+        return int(row[field]) if row["status"] & flag else None
+
+
+class RemoteMove:
+    __slots__ = ("ident", "axis", "future", "cancelled")
+
+    def __init__(self, ident, axis):
+        self.ident = ident
+        self.axis = axis
+        self.future = Future()
+        self.cancelled = False
+
+
+class RemoteMotor:
+    """Enable control for a motor whose pins belong to the engine process."""
+
+    def __init__(self, engine, axis):
+        self.engine = engine
+        self.axis = axis
+        self._enabled = False
+
+    def enable_motor(self, enable=True):
+        if self.engine.running:             # a stopped engine process has released its coils
+            self.engine._command(OP_ENABLE, self.axis, forward=bool(enable))
+        self._enabled = enable
+
+
+class ProcessStepEngine:
+    """StepEngine stand-in whose engine runs in a child process.
+
+    Same surface as StepEngine (positions, moves, cancellation, endstops,
+    edge latch, stats), so StepperController drives either one.
+    """
+
+    def __init__(self, motor_pins, endstop_pins, backend=None):
+        self.backend = backend = backend or get_backend()
+        self.clock = backend.clock
+        self.time_scale = backend.time_scale
+        self.state = SharedMotionState.create()
+        self.ring = CommandRing(self.state)
+        self.motors = {axis: RemoteMotor(self, axis) for axis in AXES}
+        self.position = _Positions(self.state, self._set_position)
+        self.phase = _Positions(self.state, field="phase")
+        self.on_edge = None                     # on_edge(axis, hit, position), reply thread
+
+        self._motor_pins = motor_pins           # axis -> (step, dir, enable, invert_dir, ms_pins, ms_mode)
+        self._endstop_pins = endstop_pins       # axis -> pin or None
+        self._ids = itertools.count(1)
+        self._moves = {}                        # ident -> RemoteMove, until its reply
+        self._busy = {axis: 0 for axis in AXES}
+        self._lock = threading.Lock()           # one producer thread at a time
+        self._process = None
+        self._reader = None
+        self._ready = threading.Event()
+
+    # ---------------- Lifecycle ----------------
+    def start(self):
+        if self._process is not None:
+            return
+        ctx = get_context("spawn")              # no inherited GPIO or thread state
+        self._doorbell = ctx.Event()
+        replies, child_end = ctx.Pipe(duplex=False)
+        sim = self.backend.name == "sim"
+        self._process = ctx.Process(
+            target=_engine_main, name="motion", daemon=True,
+            args=(self.state.name, self.backend.name, self.time_scale,
+                  self.backend.clock_origin if sim else None, self._motor_pins, self._endstop_pins,
+                  self._doorbell, child_end, os.getpid()))
+        self._process.start()
+        child_end.close()
+        self._reader = threading.Thread(target=self._read_replies, args=(replies,), name="motion-replies",
+                                        daemon=True)
+        self._reader.start()
+        # Endstop state and positions must be live before anyone homes
+        deadline = time.monotonic() + START_TIMEOUT_S
+        while not self._ready.wait(0.1):
+            if not self._process.is_alive() or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError("motion process did not start")
+        print(f"[Motion] Engine process {self._process.pid} running")
+
+    def stop(self):
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            self._command(OP_STOP)
+            self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=1.0)
+        self._reader.join(timeout=1.0)
+        self._process = None
+        self._fail_outstanding()
+        self.state.close()
+
+    @property
+    def running(self):
+        return self._process is not None
+
+    def _alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    # ---------------- Commands ----------------
+    def _push(self, commands):
+        with self._lock:
+            seq = self.ring.push(commands, self._alive)
+        self._doorbell.set()
+        return seq
+
+    def _command(self, op, axis=None, **fields):
+        fields["op"] = op
+        if axis is not None:
+            fields["axis"] = INDEX[axis]
+        return self._push([(fields, None)])
+
+    def _wait_applied(self, seq, timeout=START_TIMEOUT_S):
+        deadline = time.monotonic() + timeout
+        while int(self.state.header["applied"]) < seq:
+            if time.monotonic() > deadline or not self._alive():
+                raise RuntimeError("motion process is not responding")
+            time.sleep(0.0002)
+
+    def _set_position(self, axis, value):
+        # Applied in command order, after any move already queued on the axis has been handed over
+        self._wait_applied(self._command(OP_SET_POSITION, axis, value=value))
+
+    def _move(self, axis, forward, schedule, until=None, start_at=None, units=1, group=0):
+        if until is not None and not isinstance(until, str):
+            raise TypeError("moves in the motion process stop on a condition name, not a callable")
+        fields = {"op": OP_MOVE, "axis": INDEX[axis], "forward": bool(forward), "units": units, "group": group,
+                  "until": CONDITIONS.index(until), "start_at": _encode_start(start_at)}
+        times = None
+        if isinstance(schedule, ConstantSchedule):
+            fields["kind"], fields["params"] = CONSTANT, (schedule.delay, 0.0, 0.0, 0.0)
+        elif isinstance(schedule, SeekSchedule):
+            if not isinstance(schedule.stop, str):
+                raise TypeError("SeekSchedule.stop must be a condition name in the motion process")
+            p = schedule.profile
+            fields["kind"], fields["stop"], fields["value"] = SEEK, CONDITIONS.index(schedule.stop), schedule.max_steps
+            fields["params"] = (p.v_max, p.accel, math.nan if p.jerk is None else p.jerk, p.v_start)
+        elif isinstance(schedule, (list, tuple, np.ndarray)):
+            fields["kind"], times = ARRAY, np.asarray(schedule, dtype=np.float64)
+        else:
+            raise TypeError("lazy schedules cannot cross to the motion process; pass an array, "
+                            "ConstantSchedule or SeekSchedule")
+        move = RemoteMove(next(self._ids), axis)
+        fields["ident"] = move.ident
+        with self._lock:
+            self._moves[move.ident] = move
+            self._busy[axis] += 1
+        return move, (fields, times)
+
+    def submit(self, axis, forward, schedule, until=None, start_at=None, units=1):
+        move, command = self._move(axis, forward, schedule, until, start_at, units)
+        self._push([command])
+        return move
+
+    async def run(self, axis, forward, schedule, until=None, start_at=None, units=1):
+        """Queue a move and wait for it; cancelling the caller stops the move."""
+        move = self.submit(axis, forward, schedule, until, start_at, units)
+        try:
+            return await asyncio.wrap_future(move.future)
+        except asyncio.CancelledError:
+            self.cancel([move])
+            raise
+
+    def submit_group(self, specs, units=None, until=None, start_at=None):
+        units, until = units or {}, until or {}
+        built = [self._move(axis, forward, schedule, until.get(axis), start_at, units.get(axis, 1), len(specs))
+                 for axis, forward, schedule in specs]
+        self._push([command for _, command in built])
+        return [move for move, _ in built]
+
+    async def run_group(self, specs, units=None, until=None, start_at=None):
+        moves = self.submit_group(specs, units, until, start_at)
+        try:
+            return await asyncio.gather(*(asyncio.wrap_future(m.future) for m in moves))
+        except asyncio.CancelledError:
+            self.cancel(moves)
+            raise
+
+    def cancel(self, moves):
+        live = [m for m in moves if not m.cancelled and not m.future.done()]
+        for move in live:
+            move.cancelled = True
+        if live:
+            self._push([({"op": OP_CANCEL, "ident": m.ident}, None) for m in live])
+
+    def cancel_axis(self, axis):
+        self._command(OP_CANCEL_AXIS, axis)
+
+    def busy(self, axis):
+        return self._busy[axis] > 0
+
+    def stats(self):
+        axes = self.state.axes
+        return {axis: {"steps": int(axes["steps"][i]), "missed": int(axes["missed"][i]),
+                       "max_late_s": float(axes["max_late_s"][i]), "moves": int(axes["moves"][i]),
+                       "commanded_rate": float(axes["commanded_rate"][i]),
+                       "achieved_rate": float(axes["achieved_rate"][i])}
+                for axis, i in INDEX.items()}
+
+    # ---------------- Endstops ----------------
+    def endstop_hit(self, axis):
+        return bool(self.state.axes["status"][INDEX[axis]] & ENDSTOP_HIT)
+
+    def arm_latch(self, axis):
+        self._wait_applied(self._command(OP_ARM, axis))
+        return _Latch(self.state, axis)
+
+    def disarm_latch(self, axis):
+        self._command(OP_DISARM, axis)
+
+    # ---------------- Replies ----------------
+    def _read_replies(self, conn):
+        try:
+            while True:
+                msg = conn.recv()
+                if msg[0] == "done":
+                    self._finished(*msg[1:])
+                elif msg[0] == "edge" and self.on_edge is not None:
+                    self.on_edge(*msg[1:])
+                elif msg[0] == "ready":
+                    self._ready.set()
+        except (EOFError, OSError):
+            pass                                # engine process exited
+        finally:
+            conn.close()
+            self._fail_outstanding()
+
+    def _finished(self, ident, steps, error):
+        with self._lock:
+            move = self._moves.pop(ident, None)
+            if move is not None:
+                self._busy[move.axis] -= 1
+        if move is None or move.future.done():
+            return
+        if error is None:
+            move.future.set_result(steps)
+        else:
+            move.future.set_exception(RuntimeError(f"motion process: {error}"))
+
+    def _fail_outstanding(self):
+        with self._lock:
+            moves, self._moves = list(self._moves.values()), {}
+            self._busy = {axis: 0 for axis in AXES}
+        for move in moves:
+            if not move.future.done():
+                move.future.set_exception(RuntimeError("motion process stopped"))
+
+
+# ---------------- Engine process ----------------
+def _raise_priority():
+    if MOTION_CPU is not None:
+        try:
+            os.sched_setaffinity(0, {MOTION_CPU})
+        except (AttributeError, OSError) as exc:
+            print(f"[Motion] CPU pinning unavailable: {exc}")
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(MOTION_PRIORITY))
+    except (AttributeError, OSError):
+        try:
+            os.nice(-10)
+        except OSError:
+            pass
+
+
+def _encode_start(start_at):
+    # start_at travels as a float: NaN = on activation, +inf = CONTINUE
+    if start_at is None:
+        return math.nan
+    return math.inf if start_at == CONTINUE else start_at
+
+
+def _decode_start(value):
+    if math.isnan(value):
+        return None
+    return CONTINUE if math.isinf(value) else value
+
+
+def _schedule(slot, times):
+    kind = int(slot["kind"])
+    if kind == CONSTANT:
+        return ConstantSchedule(float(slot["params"][0]))
+    if kind == SEEK:
+        v_max, accel, jerk, v_start = (float(p) for p in slot["params"])
+        profile = MotionProfile(v_max, accel, None if math.isnan(jerk) else jerk, v_start)
+        return SeekSchedule(profile, CONDITIONS[int(slot["stop"])], int(slot["value"]))
+    return times if times is not None else ()
+
+
+def _engine_main(name, backend_name, time_scale, clock_origin, motor_pins, endstop_pins, doorbell, conn,
+                 parent_pid):
+    from hardware.backend import GpioBackend, set_backend
+    from hardware.step_engine import StepEngine
+    from hardware.stepper_controller import StepperMotor
+
+    _raise_priority()
+    if backend_name == "sim":
+        from hardware.sim import SimBackend
+        backend = SimBackend(time_scale=time_scale, clock_origin=clock_origin)
+    else:
+        backend = GpioBackend()
+    set_backend(backend)
+
+    state = SharedMotionState.attach(name, track=True)
+    motors = {axis: StepperMotor(step, dir_, enable, invert_dir=invert, ms_pins=ms_pins, ms_mode=ms_mode,
+                                 backend=backend)
+              for axis, (step, dir_, enable, invert, ms_pins, ms_mode) in motor_pins.items()}
+    endstops = {axis: backend.digital_input(pin, pull_up=True) if pin else None
+                for axis, pin in endstop_pins.items()}
+    engine = StepEngine(motors, clock=backend.clock, time_scale=backend.time_scale, endstops=endstops)
+    engine.position = _Positions(state)
+    engine.phase = _Positions(state, field="phase")
+    status_lock = threading.Lock()              # status is updated from edge callbacks and this loop
+    send_lock = threading.Lock()
+    moves = {}                                  # ident -> StepMove
+    latches = {axis: None for axis in AXES}
+    group = []
+
+    def reply(*msg):
+        with send_lock:
+            try:
+                conn.send(msg)
+            except (OSError, ValueError):
+                pass                            # controller gone; the loop below exits
+
+    def set_status(axis, flag, on):
+        with status_lock:
+            i = INDEX[axis]
+            status = int(state.axes["status"][i])
+            state.axes["status"][i] = (status | flag) if on else (status & ~flag)
+
+    def on_edge(axis, hit, position):
+        latch = latches[axis]                   # already updated by the engine
+        if latch is not None and latch[hit] is not None:
+            state.axes[INDEX[axis]]["trigger" if hit else "release"] = latch[hit]
+            set_status(axis, TRIGGER_LATCHED if hit else RELEASE_LATCHED, True)
+        set_status(axis, ENDSTOP_HIT, hit)
+        reply("edge", axis, hit, position)
+
+    def track(ident, move):
+        moves[ident] = move
+
+        def finished(future):
+            moves.pop(ident, None)
+            exc = future.exception()
+            reply("done", ident, move.steps_done, None if exc is None else repr(exc))
+        move.future.add_done_callback(finished)
+
+    def apply(slot, times):
+        op, axis = int(slot["op"]), AXES[int(slot["axis"])]
+        if op == OP_MOVE:
+            schedule, units = _schedule(slot, times), int(slot["units"]) or 1
+            if slot["group"]:
+                group.append((int(slot["ident"]), axis, bool(slot["forward"]), schedule, units,
+                              CONDITIONS[int(slot["until"])]))
+                if len(group) == int(slot["group"]):
+                    submitted = engine.submit_group([spec[1:4] for spec in group],
+                                                    {spec[1]: spec[4] for spec in group},
+                                                    {spec[1]: spec[5] for spec in group},
+                                                    _decode_start(float(slot["start_at"])))
+                    for (ident, *_), move in zip(group, submitted):
+                        track(ident, move)
+                    group.clear()
+                return
+            track(int(slot["ident"]), engine.submit(axis, bool(slot["forward"]), schedule,
+                                                    until=CONDITIONS[int(slot["until"])],
+                                                    start_at=_decode_start(float(slot["start_at"])),
+                                                    units=units))
+        elif op == OP_CANCEL:
+            move = moves.get(int(slot["ident"]))
+            if move is not None:
+                engine.cancel([move])
+        elif op == OP_CANCEL_AXIS:
+            engine.cancel_axis(axis)
+        elif op == OP_ENABLE:
+            motors[axis].enable_motor(bool(slot["forward"]))
+            set_status(axis, ENABLED, bool(slot["forward"]))
+        elif op == OP_SET_POSITION:
+            engine.position[axis] = int(slot["value"])
+        elif op == OP_ARM:
+            set_status(axis, ARMED | TRIGGER_LATCHED | RELEASE_LATCHED, False)
+            latches[axis] = engine.arm_latch(axis)
+            set_status(axis, ARMED, True)
+        elif op == OP_DISARM:
+            engine.disarm_latch(axis)
+            latches[axis] = None
+            set_status(axis, ARMED, False)
+
+    def housekeeping():
+        for axis, st in engine.stats().items():
+            row = state.axes[INDEX[axis]]
+            for field, value in st.items():
+                row[field] = value
+            set_status(axis, BUSY, engine.busy(axis))
+        state.header["heartbeat"] = backend.clock()
+
+    engine.on_edge = on_edge
+    for axis in AXES:
+        set_status(axis, HAS_ENDSTOP, endstops.get(axis) is not None)
+        set_status(axis, ENDSTOP_HIT, engine.endstop_hit(axis))
+    engine.start()
+    state.header["pid"] = os.getpid()
+    state.header["ready"] = 1
+    reply("ready")
+
+    ring = CommandRing(state)
+    try:
+        running = True
+        while running and os.getppid() == parent_pid:
+            if doorbell.wait(HOUSEKEEPING_S):
+                doorbell.clear()
+                for seq, slot, times in ring.drain():
+                    if int(slot["op"]) == OP_STOP:
+                        running = False
+                    else:
+                        apply(slot, times)
+                    state.header["applied"] = seq
+            housekeeping()
+    finally:
+        engine.stop()                           # resolves every move, so the replies go out
+        for motor in motors.values():
+            motor.enable_motor(False)
+        housekeeping()
+        conn.close()
+        state.close()
@@ -0,0 +1,362 @@
+# hardware/motion_queue.py
+import asyncio
+from collections import deque
+
+from hardware.step_engine import CONTINUE, ENDSTOP
+from utils.segment_planner import Segment, SegmentPlanner
+
+# ---- Optional config ----
+try:
+    from config.settings import MOTION_HORIZON_S
+except Exception:
+    MOTION_HORIZON_S = 0.05         # s of planned steps queued on the engine (bounds preemption latency)
+
+CHUNK_S = 0.01                      # planning granularity
+DRAIN_POLL_S = 0.01                 # while another source's moves finish on the axis
+
+
+class MotionQueue:
+    """Motion commands for one axis, streamed to the step engine.
+
+    Targets are planned a chunk at a time by a SegmentPlanner and handed
+    over about MOTION_HORIZON_S ahead of the pulses, each chunk continuing
+    from the deadline of the one before. A new target therefore replaces
+    the current one from wherever the plan has got to and at its velocity,
+    and an appended one is joined without stopping if it keeps direction.
+    Sources that step the axis themselves (homing, the velocity follower,
+    sidereal tracking) call ``settle`` first, and the stream only starts
+    from rest once their moves have finished. ``move_linked`` steps a
+    second queue's axis along with this one's plan.
+    """
+
+    def __init__(self, engine, axis, motor, coarse_units=1, fine_approach=32, coarse_min=1000, on_idle=None):
+        self.engine = engine
+        self.axis = axis
+        self.motor = motor
+        self.planner = SegmentPlanner(coarse_units, fine_approach, coarse_min)
+        self.on_idle = on_idle          # on_idle(axis) when the stream comes to rest
+        self._pending = deque()         # [move, duration, steps, reached] on the engine, oldest first
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = None
+        self._link = None               # _Link while this axis is part of a linked slew
+
+    @property
+    def idle(self):
+        return self.planner.idle and not self._pending
+
+    @property
+    def goal(self):
+        """Target of the last queued command, or None."""
+        segments = self.planner.segments
+        return segments[-1].target if segments else None
+
+    @property
+    def position(self):
+        """Where the steps handed to the engine so far end."""
+        return self.engine.position[self.axis] if self.idle else self.planner.position
+
+    # ---------------- Commands ----------------
+    def move_to(self, target, fine, coarse=None, append=False):
+        """Head for ``target``; returns its Segment.
+
+        The segment's ``token`` future resolves True once the target is
+        reached and False if the command is dropped (replaced, stopped or
+        cut short by the endstop). ``append`` queues it behind the current
+        commands instead of replacing them.
+        """
+        segment = Segment(target, fine, coarse, self._token())
+        if not append:
+            self._resolve(self.planner.stop(), False)
+        self._unlink(drop=not append)
+        self.planner.append(segment)
+        self._kick()
+        return segment
+
+    def move_linked(self, target, minor, minor_target, profiles, minor_profiles):
+        """Head for ``target`` with ``minor``'s axis stepped along; returns both Segments.
+
+        From rest only this axis is planned: the minor axis's pulses are
+        derived from each chunk's pulse times where the straight line
+        between the two moves crosses them, and every pair of chunks is
+        queued as one engine group on this axis's timeline, so both start
+        and arrive together. ``profiles`` and ``minor_profiles`` are
+        ``(fine, coarse)``; the minor's only serve once the link is broken.
+        Any other command to either queue breaks it, and each axis then
+        carries on by itself from its velocity, as both do if either is
+        still moving when this is called.
+        """
+        if not (self.idle and minor.idle):
+            return self.move_to(target, *profiles), minor.move_to(minor_target, *minor_profiles)
+        segment = self.move_to(target, *profiles)
+        minor_segment = minor.move_to(minor_target, *minor_profiles)
+        self._link = minor._link = _Link(self, minor, segment, minor_segment)
+        return segment, minor_segment
+
+    async def goto(self, target, fine, coarse=None, append=False):
+        """``move_to`` and wait for the result.
+
+        Cancelling the caller brakes the axis to rest instead of cutting
+        the pulse train, unless a newer command has already taken over; a
+        command issued right after (the next mode's GOTO) blends in.
+        """
+        segment = self.move_to(target, fine, coarse, append)
+        try:
+            return await asyncio.shield(segment.token)
+        except asyncio.CancelledError:
+            if segment in self.planner.segments:
+                self.stop()
+            raise
+
+    async def goto_linked(self, target, minor, minor_target, profiles, minor_profiles):
+        """``move_linked`` and wait for both axes, as ``goto`` does."""
+        segments = self.move_linked(target, minor, minor_target, profiles, minor_profiles)
+        try:
+            return all(await asyncio.shield(asyncio.gather(*(segment.token for segment in segments))))
+        except asyncio.CancelledError:
+            for queue, segment in zip((self, minor), segments):
+                if segment in queue.planner.segments:
+                    queue.stop()
+            raise
+
+    def stop(self):
+        """Drop every queued command and brake to rest."""
+        self._resolve(self.planner.stop(), False)
+        self._unlink(drop=True)
+        self._kick()
+
+    async def settle(self):
+        """Brake to rest and wait, before another source steps the axis."""
+        self.stop()
+        await self._idle.wait()
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._fail()
+
+    # ---------------- Streaming ----------------
+    @staticmethod
+    def _token():
+        token = asyncio.get_running_loop().create_future()
+        token.add_done_callback(lambda f: f.cancelled() or f.exception())   # failures are for goto() to raise
+        return token
+
+    def _unlink(self, drop):
+        if self._link is not None:
+            self._link.release(drop)
+
+    def _kick(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        if not self.idle:
+            self._idle.clear()
+        self._wake.set()
+
+    async def _run(self):
+        try:
+            await self._stream()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Void the stream and let the next command start a fresh task
+            self._task = None
+            self._fail(exc)
+            self._idle.set()
+
+    async def _stream(self):
+        while True:
+            self._collect()
+            if self.idle:
+                if not self._idle.is_set():
+                    self._idle.set()
+                    if self.on_idle is not None:
+                        self.on_idle(self.axis)
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            link = self._link
+            if link is not None and link.minor is self:
+                # Stepped by the major axis's stream: only collect
+                if self._pending:
+                    await asyncio.wait([asyncio.wrap_future(self._pending[0][0].future)])
+                else:
+                    self._wake.clear()
+                    await self._wake.wait()
+                continue
+
+            # ---- Leaving rest: after any other source's moves, from where they left the axis ----
+            if not self._pending and not self.planner.speed:
+                if self.engine.busy(self.axis) or (link is not None and self.engine.busy(link.minor.axis)):
+                    await asyncio.sleep(DRAIN_POLL_S)
+                    continue
+                self.planner.reset(self.engine.position[self.axis], self.engine.phase[self.axis])
+                if not self.motor._enabled:
+                    self.motor.enable_motor(True)
+                if link is not None and not link.started:
+                    link.start()
+
+            if not self.planner.idle and sum(entry[1] for entry in self._pending) < MOTION_HORIZON_S:
+                self._hand_over(*self.planner.plan(CHUNK_S))
+            else:
+                await asyncio.wait([asyncio.wrap_future(self._pending[0][0].future)])
+
+    def _hand_over(self, chunks, reached):
+        link = self._link
+        if reached:
+            if self._pending:
+                self._pending[-1][3].extend(reached)
+            else:
+                self._resolve(reached, True)
+        for forward, units, times, done in chunks:
+            # Toward the switch the endstop ends the stream, as it blocks the tracker
+            until, start_at = None if forward else ENDSTOP, CONTINUE if self._pending else None
+            if link is None:
+                move = self.engine.submit(self.axis, forward, times, until=until, start_at=start_at, units=units)
+            else:
+                move = link.submit(forward, units, times, until, start_at)
+            self._pending.append([move, times[-1], len(times), done])
+        if link is not None and any(link.segment in done for done in [reached] + [chunk[3] for chunk in chunks]):
+            link.finish()
+
+    def _collect(self):
+        while self._pending and self._pending[0][0].future.done():
+            move, _, steps, reached = self._pending.popleft()
+            exc = move.future.exception()
+            if exc is None and move.future.result() == steps:
+                self._resolve(reached, True)
+            else:
+                self._fail(exc, reached)
+
+    def _fail(self, exc=None, reached=()):
+        # A chunk was cut short: everything planned after it is void
+        self.engine.cancel([entry[0] for entry in self._pending])
+        dropped = list(reached)
+        for entry in self._pending:
+            dropped += entry[3]
+        self._pending.clear()
+        dropped += self.planner.stop()
+        self.planner.reset(self.planner.position, self.planner.phase)
+        self._unlink(drop=True)
+        if exc is not None:
+            print(f"[Motion] {self.axis} stream stopped: {exc!r}")
+        self._resolve(dropped, False if exc is None else exc)
+
+    @staticmethod
+    def _resolve(segments, result):
+        for segment in segments:
+            if not segment.token.done():
+                if isinstance(result, BaseException):
+                    segment.token.set_exception(result)
+                else:
+                    segment.token.set_result(result)
+
+
+class _Link:
+    """A minor axis stepped in proportion to a major axis's plan (``move_linked``)."""
+
+    def __init__(self, major, minor, segment, minor_segment):
+        self.major, self.minor = major, minor
+        self.segment, self.minor_segment = segment, minor_segment
+        self.started = False
+
+    def start(self):
+        # Leaving rest: both axes are measured from where the engine left them
+        major, minor = self.major, self.minor
+        minor.planner.reset(minor.engine.position[minor.axis], minor.engine.phase[minor.axis])
+        self.span = abs(self.segment.target - major.planner.position)
+        self.minor_span = abs(self.minor_segment.target - minor.planner.position)
+        if not self.span or not self.minor_span:
+            self.release(drop=False)
+            return
+        if not minor.motor._enabled:
+            minor.motor.enable_motor(True)
+        self.origin, self.phase, self.units = minor.planner.position, minor.planner.phase, 1
+        self.direction = 1 if self.minor_segment.target > self.origin else -1
+        self.advance = self.minor_advance = 0
+        self.started = True
+
+    def submit(self, forward, units, times, until, start_at):
+        """Queue a major chunk with the minor pulses it carries; returns the major's move."""
+        major, minor, engine = self.major, self.minor, self.major.engine
+        parts = self._derive(units, times)
+        minor_forward = self.direction > 0
+        minor_until = None if minor_forward else ENDSTOP
+        first_units, first = parts.pop(0) if parts else (self.units, [])
+        move, minor_move = engine.submit_group(
+            [(major.axis, forward, times), (minor.axis, minor_forward, first)],
+            {major.axis: units, minor.axis: first_units}, {major.axis: until, minor.axis: minor_until}, start_at)
+        last = first[-1] if first else 0.0
+        minor._pending.append([minor_move, last, len(first), []])
+        for part_units, part in parts:
+            # A change of microstep mode mid-chunk runs on from the minor's own last pulse
+            relative = [t - last for t in part]
+            last = part[-1]
+            minor._pending.append([engine.submit(minor.axis, minor_forward, relative, until=minor_until,
+                                                 start_at=CONTINUE, units=part_units),
+                                   relative[-1], len(relative), []])
+        # Left where it could brake or carry on by itself from
+        minor.planner.follow(self.origin + self.direction * self.minor_advance, self.phase, self.direction,
+                             major.planner.speed * self.minor_span / self.span, self.units,
+                             (self.minor_segment.coarse if self.units > 1 else None) or self.minor_segment.fine)
+        minor._kick()
+        return move
+
+    def _derive(self, units, times):
+        # Each minor pulse goes where the major passes its midpoint on the
+        # straight line, interpolated between the major's pulses
+        parts, advance, t_prev = [], self.advance, 0.0
+        scale = self.span / self.minor_span
+        for t in times:
+            reach = advance + units
+            while self.minor_advance < self.minor_span:
+                step = self._units_next(units)
+                cross = (self.minor_advance + step / 2.0) * scale
+                if cross > reach:
+                    break
+                if not parts or parts[-1][0] != step:
+                    parts.append((step, []))
+                parts[-1][1].append(t_prev + (t - t_prev) * max(0.0, cross - advance) / units)
+                self.minor_advance += step
+                self.phase += self.direction * step
+                self.units = step
+            advance, t_prev = reach, t
+        self.advance = advance
+        return parts
+
+    def _units_next(self, major_units):
+        # Coarse alongside the major's coarse pulses, once the driver phase allows
+        u = self.minor.planner.coarse_units
+        if major_units > 1 and self.minor_segment.coarse is not None \
+                and self.minor_span - self.minor_advance >= u and self.phase % u == 0:
+            return u
+        return 1
+
+    def finish(self):
+        """The major reached its target: so has the minor, with the last of its pulses."""
+        minor = self.minor
+        if self.minor_advance < self.minor_span:
+            self.release(drop=False)
+            return
+        minor.planner.segments.remove(self.minor_segment)
+        minor.planner.follow(self.minor_segment.target, self.phase, self.direction, 0.0, self.units,
+                             self.minor_segment.fine)
+        if minor._pending:
+            minor._pending[-1][3].append(self.minor_segment)
+        else:
+            minor._resolve([self.minor_segment], True)
+        self.release(drop=False)
+
+    def release(self, drop):
+        """Let the minor axis go its own way; ``drop`` its target too."""
+        major, minor = self.major, self.minor
+        if minor._link is not self:
+            return
+        major._link = minor._link = None
+        if drop and self.minor_segment in minor.planner.segments:
+            minor.planner.segments.remove(self.minor_segment)
+            minor._resolve([self.minor_segment], False)
+        minor._kick()
@@ -1,13 +1,30 @@
 # hardware/oled_display.py
-from luma.core.interface.serial import i2c
-from luma.oled.device import sh1107
+from PIL import Image, ImageDraw
+from hardware.backend import get_backend
 
 
 class OLEDDisplay:
-    def __init__(self, i2c_addr, width=128, height=128):
-        self.device = sh1107(i2c(port=1, address=i2c_addr), width=width, height=height)
+    def __init__(self, i2c_addr, width=128, height=128, backend=None):
+        backend = backend or get_backend()
+        self.device = backend.oled_device(i2c_addr, width=width, height=height)
+        self.pipeline = None        # set by DisplayPipeline.start()
+        self._last_frame = None
 
     def draw(self, draw_fn):
-        from luma.core.render import canvas
-        with canvas(self.device) as draw:
-            draw_fn(draw)
+        # Hand off to the display worker when one owns us; otherwise draw inline
+        if self.pipeline is not None:
+            self.pipeline.request(self, draw_fn)
+        else:
+            self.render(draw_fn)
+
+    def render(self, draw_fn):
+        """Render and push a frame now; returns False if it matched the last one sent."""
+        # Same as luma's canvas(): render into a fresh image, then push it
+        image = Image.new(self.device.mode, self.device.size)
+        draw_fn(ImageDraw.Draw(image))
+        frame = image.tobytes()
+        if frame == self._last_frame:
+            return False
+        self.device.display(image)
+        self._last_frame = frame
+        return True
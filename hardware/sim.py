@@ -0,0 +1,295 @@
+# hardware/sim.py
+"""Simulated mount for running off the Pi (``OPTISCOPE_BACKEND=sim``).
+
+Virtual step/dir pins integrate axis position, endstops trip at
+configurable positions, potentiometers and the encoder are scripted and
+both OLEDs render into in-memory framebuffers. Time is virtual:
+``time_scale`` > 1 runs the step engine and scripts faster than real time.
+"""
+import threading
+import time
+from collections import deque
+
+# Mirrors StepperController defaults and the inversion and ms_mode=(1, 1) used by main.py
+DEFAULT_AXES = {
+    "az": dict(step_pin=25, dir_pin=4, enable_pin=24, endstop_pin=17, ms_pins=(16, 26), microsteps=8,
+               invert_dir=True, start=12000),
+    "alt": dict(step_pin=6, dir_pin=12, enable_pin=5, endstop_pin=18, ms_pins=(20, 21), microsteps=8,
+                invert_dir=False, start=5000),
+}
+DEFAULT_ADC = {2: 32768, 3: 32768}     # az / alt pots at mid travel
+ENCODER_PINS = (13, 15)                 # CLK, DT as in hardware/input_manager.py
+
+
+class SimPin:
+    def __init__(self, number, value=False):
+        self.number = number
+        self.value = value
+        self.listeners = []
+
+    def set(self, value):
+        value = bool(value)
+        if value == self.value:
+            return
+        self.value = value
+        for cb in list(self.listeners):
+            cb(value)
+
+
+class SimOutputDevice:
+    """Stands in for gpiozero OutputDevice / DigitalOutputDevice."""
+
+    def __init__(self, pin):
+        self.pin = pin
+
+    @property
+    def value(self):
+        return self.pin.value
+
+    @value.setter
+    def value(self, value):
+        self.pin.set(value)
+
+    def on(self):
+        self.pin.set(True)
+
+    def off(self):
+        self.pin.set(False)
+
+    def close(self):
+        pass
+
+
+class SimInputDevice:
+    """Stands in for gpiozero DigitalInputDevice / Button, including edge callbacks."""
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.when_activated = None
+        self.when_deactivated = None
+        pin.listeners.append(self._edge)
+
+    @property
+    def value(self):
+        return self.pin.value
+
+    is_active = value
+
+    def _edge(self, value):
+        cb = self.when_activated if value else self.when_deactivated
+        if cb is not None:
+            cb()
+
+    def close(self):
+        if self._edge in self.pin.listeners:
+            self.pin.listeners.remove(self._edge)
+
+
+class SimButton(SimInputDevice):
+    # gpiozero names the same callbacks when_pressed / when_released
+    when_pressed = property(lambda self: self.when_activated,
+                            lambda self, cb: setattr(self, "when_activated", cb))
+    when_released = property(lambda self: self.when_deactivated,
+                             lambda self, cb: setattr(self, "when_deactivated", cb))
+    is_pressed = SimInputDevice.value
+
+
+class SimAxis:
+    """One mechanical axis driven by virtual step/dir/enable pins.
+
+    Steps while the driver is disabled, or faster than ``max_step_rate``,
+    are counted as lost instead of moving the axis. Position is in
+    1/``microsteps`` steps; with ``ms_pins`` each pulse moves as far as
+    the microstep mode they select, and coarse pulses taken off a whole
+    step of their mode are counted as misaligned.
+    """
+
+    def __init__(self, backend, name, step_pin, dir_pin, enable_pin, endstop_pin=None, ms_pins=None,
+                 microsteps=1, invert_dir=False, start=0, endstop_at=0, max_step_rate=None, history=100000):
+        self.backend = backend
+        self.name = name
+        self.invert_dir = invert_dir
+        self.position = start
+        self.endstop_at = endstop_at
+        self.max_step_rate = max_step_rate
+        self.steps = 0
+        self.lost_steps = 0
+        self.microsteps = microsteps
+        self.phase = 0                  # driver microstep index since power-up, in 1/microsteps steps
+        self.misaligned_steps = 0
+        self.step_times = deque(maxlen=history)   # virtual timestamps of accepted steps
+
+        self._dir = backend.pin(dir_pin)
+        self._enable = backend.pin(enable_pin)
+        self._endstop = backend.pin(endstop_pin) if endstop_pin is not None else None
+        self._ms = [backend.pin(pin) for pin in ms_pins or ()]
+        self._step_units = 1            # 1/microsteps steps per pulse in the selected mode
+        for pin in self._ms:
+            pin.listeners.append(self._on_ms_change)
+        self._on_ms_change()
+        backend.pin(step_pin).listeners.append(self._on_step_edge)
+        self._update_endstop()
+
+    @property
+    def enabled(self):
+        return not self._enable.value   # driver enable is active-low
+
+    @property
+    def endstop_triggered(self):
+        return self.position <= self.endstop_at
+
+    def _on_step_edge(self, level):
+        if not level:
+            return
+        now = self.backend.clock()
+        if not self.enabled or (
+            self.max_step_rate and self.step_times
+            and now - self.step_times[-1] < 1.0 / self.max_step_rate
+        ):
+            self.lost_steps += 1
+            return
+        units = self._step_units
+        if self.phase % units:
+            self.misaligned_steps += 1
+        step = units if (self._dir.value ^ self.invert_dir) else -units
+        self.position += step
+        self.phase += step
+        self.steps += 1
+        self.step_times.append(now)
+        self._update_endstop()
+
+    def _on_ms_change(self, _=None):
+        if not self._ms:
+            return
+        from hardware.stepper_controller import MICROSTEP_PINS
+        levels = tuple(pin.value for pin in self._ms)
+        mode = next(m for m, pins in MICROSTEP_PINS.items() if tuple(map(bool, pins)) == levels)
+        self._step_units = max(1, self.microsteps // mode)
+
+    def _update_endstop(self):
+        if self._endstop is not None:
+            # Controller reads endstops active-low: value False == triggered
+            self._endstop.set(not self.endstop_triggered)
+
+
+class SimAnalogIn:
+    """Scripted ADC channel: a constant, or ``script(t) -> raw`` in virtual seconds."""
+
+    def __init__(self, backend, value=0):
+        self.backend = backend
+        self.script = None
+        self._value = value
+
+    def set(self, value):
+        self.script = None
+        self._value = value
+
+    @property
+    def value(self):
+        if self.script is not None:
+            self._value = int(self.script(self.backend.clock()))
+        return max(0, min(65535, int(self._value)))
+
+
+class SimEncoder:
+    """Drives the menu encoder's CLK/DT pins through quadrature transitions."""
+
+    def __init__(self, backend, clk_pin=ENCODER_PINS[0], dt_pin=ENCODER_PINS[1]):
+        self.clk = backend.pin(clk_pin)
+        self.dt = backend.pin(dt_pin)
+
+    def turn(self, detents, edge_interval=0.0):
+        # Right: CLK leads DT; left: DT leads CLK
+        first, second = (self.clk, self.dt) if detents > 0 else (self.dt, self.clk)
+        for _ in range(abs(detents)):
+            for pin in (first, second):
+                pin.set(not pin.value)
+                if edge_interval:
+                    time.sleep(edge_interval)
+
+
+class SimOLEDDevice:
+    """In-memory replacement for the luma sh1107 device."""
+
+    def __init__(self, i2c_addr, width=128, height=128):
+        self.i2c_addr = i2c_addr
+        self.mode = "1"
+        self.width = width
+        self.height = height
+        self.size = (width, height)
+        self.image = None
+        self.framebuffer = b""
+        self.frames = 0
+
+    def display(self, image):
+        self.image = image
+        self.framebuffer = image.tobytes()
+        self.frames += 1
+
+    def cleanup(self):
+        pass
+
+
+class SimBackend:
+    name = "sim"
+
+    def __init__(self, time_scale=1.0, axes=None, adc=None, clock_origin=None):
+        self.time_scale = float(time_scale)
+        # perf_counter() at virtual time 0; pass another backend's to share its clock
+        self._t_start = time.perf_counter() if clock_origin is None else clock_origin
+        self._epoch = time.time()
+        self._lock = threading.Lock()
+        self.pins = {}
+        self.displays = {}
+        self.adc_data_rate = None      # set when the sampler switches to continuous mode
+        self.adc = {ch: SimAnalogIn(self, v) for ch, v in (adc or DEFAULT_ADC).items()}
+        self.axes = {name: SimAxis(self, name, **cfg) for name, cfg in (axes or DEFAULT_AXES).items()}
+        self.encoder = SimEncoder(self)
+
+    def clock(self):
+        """Virtual seconds since the backend was created."""
+        return (time.perf_counter() - self._t_start) * self.time_scale
+
+    @property
+    def clock_origin(self):
+        return self._t_start
+
+    def wall_time(self):
+        """UTC seconds that advance with the virtual clock."""
+        return self._epoch + self.clock()
+
+    def pin(self, number):
+        with self._lock:
+            if number not in self.pins:
+                self.pins[number] = SimPin(number)
+            return self.pins[number]
+
+    def press(self, pin):
+        """Momentary press of a push button (e.g. the encoder switch or sync OK)."""
+        self.pin(pin).set(True)
+        self.pin(pin).set(False)
+
+    # ---- Device factories (same surface as GpioBackend) ----
+    def output_device(self, pin):
+        return SimOutputDevice(self.pin(pin))
+
+    digital_output = output_device
+
+    def digital_input(self, pin, pull_up=True):
+        return SimInputDevice(self.pin(pin))
+
+    def button(self, pin, pull_up=True):
+        return SimButton(self.pin(pin))
+
+    def adc_set_continuous(self, data_rate, address=0x48):
+        self.adc_data_rate = data_rate
+
+    def adc_channel(self, channel, address=0x48):
+        if channel not in self.adc:
+            self.adc[channel] = SimAnalogIn(self)
+        return self.adc[channel]
+
+    def oled_device(self, i2c_addr, width=128, height=128):
+        device = SimOLEDDevice(i2c_addr, width, height)
+        self.displays[i2c_addr] = device
+        return device
@@ -0,0 +1,418 @@
+# hardware/step_engine.py
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+
+from core.logger import AXES, MISSED, NO_AXIS, STEP, telemetry
+from utils.motion_planner import SeekSchedule
+
+# Stop conditions the engine evaluates itself, so they also work when the
+# engine runs in another process (hardware/motion_process.py)
+ENDSTOP = "endstop"     # switch closed right now
+TRIGGER = "trigger"     # trigger edge latched since arm_latch()
+RELEASE = "release"     # release edge latched since arm_latch()
+ARRIVED = "arrived"     # TRIGGER, or ENDSTOP should the edge have been missed
+
+# start_at value: time the move from the deadline of the axis's previous
+# step, so a stream of moves runs on without a gap (or a burst after a slip)
+CONTINUE = "continue"
+
+
+class StepMove:
+    """A run of steps on one axis in a single direction.
+
+    ``schedule`` is an iterable of step times in seconds, relative to the
+    moment the move becomes active (first step at t > 0), to ``start_at``
+    on the engine clock when given, or to the axis's last step deadline
+    when ``start_at`` is CONTINUE. It may be a list, an array or an
+    endless generator; ``until`` is checked right before every pulse and
+    ends the move early when it returns True. Each pulse moves ``units``
+    fine steps: the motor's microstep mode is switched to match as the
+    move starts.
+    """
+
+    def __init__(self, axis, forward, schedule, until=None, start_at=None, units=1):
+        self.axis = axis
+        self.forward = forward
+        self.until = until
+        self.start_at = start_at
+        self.units = units
+        self.future = Future()
+        self.steps_done = 0
+        self.cancelled = False
+        self.error = None        # raised to the caller when the move could not start
+        self.group = None        # moves that must start on the same tick
+
+        self._it = iter(schedule)
+        self._t0 = None          # absolute start (engine clock)
+        self._next_rel = None    # next step time, relative to _t0
+        self._first_rel = None
+        self._first_fire = None
+        self._last_rel = None
+        self._last_fire = None
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class AxisStats:
+    __slots__ = ("steps", "missed", "max_late_s", "moves",
+                 "commanded_rate", "achieved_rate")
+
+    def __init__(self):
+        self.steps = 0
+        self.missed = 0
+        self.max_late_s = 0.0
+        self.moves = 0
+        self.commanded_rate = 0.0   # steps/s asked for by the last move
+        self.achieved_rate = 0.0    # steps/s actually delivered by the last move
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class StepEngine:
+    """Deadline-scheduled step generator running in its own thread.
+
+    Motion commands are queued per axis from the asyncio side; the engine
+    thread fires each pulse at its absolute deadline, so event-loop stalls
+    (OLED redraws, I2C reads, handlers) no longer stretch step timing.
+    """
+
+    LATE_TOLERANCE_S = 0.0002   # later than this counts as a missed deadline
+    SWITCH_INTERVAL_S = 0.0005  # GIL hand-off interval while the engine runs
+
+    def __init__(self, motors, clock=time.perf_counter, time_scale=1.0, endstops=None):
+        self.motors = motors                    # {"az": StepperMotor, ...}
+        self.clock = clock                      # seconds; may be virtual
+        self.time_scale = time_scale            # clock seconds per real second
+        self.position = {axis: 0 for axis in motors}
+        # Fine steps each driver has been stepped since start, i.e. its
+        # microstep phase; unlike position it is never reassigned
+        self.phase = {axis: 0 for axis in motors}
+        self._units = {axis: 1 for axis in motors}
+        self._last_deadline = {axis: None for axis in motors}  # of the latest pulse, after any slip
+
+        # Endstops are GPIO interrupts (value False == triggered, so
+        # "deactivated" is the hit); each edge can latch the step count
+        self.endstops = {axis: dev for axis, dev in (endstops or {}).items() if dev is not None}
+        self.on_edge = None                     # on_edge(axis, hit, position), any thread
+        self._latch = {axis: None for axis in motors}
+        for axis, endstop in self.endstops.items():
+            endstop.when_activated = partial(self._on_endstop_edge, axis, False)
+            endstop.when_deactivated = partial(self._on_endstop_edge, axis, True)
+
+        self._queues = {axis: deque() for axis in motors}
+        self._active = {axis: None for axis in motors}
+        self._stats = {axis: AxisStats() for axis in motors}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._axis_id = {axis: AXES.get(axis, NO_AXIS) for axis in motors}
+        self._telemetry = None                  # engine thread's ring, set by _run
+
+    # ---------------- Lifecycle ----------------
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        # Default 5 ms switch interval would let a busy event loop hold the
+        # GIL well past our step deadlines.
+        if sys.getswitchinterval() > self.SWITCH_INTERVAL_S:
+            sys.setswitchinterval(self.SWITCH_INTERVAL_S)
+        self._thread = threading.Thread(target=self._run, name="step-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        with self._lock:
+            for axis in self.motors:
+                self._abort_axis(axis)
+
+    # ---------------- Endstops ----------------
+    def endstop_hit(self, axis):
+        endstop = self.endstops.get(axis)
+        return endstop is not None and not endstop.value
+
+    def arm_latch(self, axis):
+        """Start latching ``axis`` endstop edges; returns the ``{hit: position}`` latch."""
+        self._latch[axis] = latch = {True: None, False: None}
+        return latch
+
+    def disarm_latch(self, axis):
+        self._latch[axis] = None
+
+    def _on_endstop_edge(self, axis, hit):
+        # Interrupt context (gpiozero thread, or this engine's own thread in the
+        # simulator): only the first edge of each kind counts, which also
+        # debounces the switch
+        latch = self._latch[axis]
+        position = self.position[axis]
+        if latch is not None and latch[hit] is None:
+            latch[hit] = position
+        if self.on_edge is not None:
+            self.on_edge(axis, hit, position)
+
+    def condition(self, axis, name):
+        """Callable for a named stop condition (ENDSTOP, TRIGGER, RELEASE or ARRIVED)."""
+        if name == ENDSTOP:
+            return partial(self.endstop_hit, axis)
+        if name == ARRIVED:
+            latched = self.condition(axis, TRIGGER)
+            return lambda: latched() or self.endstop_hit(axis)
+        if name in (TRIGGER, RELEASE):
+            hit = name == TRIGGER
+            return lambda: self._latch[axis] is not None and self._latch[axis][hit] is not None
+        raise ValueError(f"Unknown stop condition: {name!r}")
+
+    def _resolve(self, axis, schedule, until):
+        if isinstance(until, str):
+            until = self.condition(axis, until)
+        if isinstance(schedule, SeekSchedule) and isinstance(schedule.stop, str):
+            schedule = SeekSchedule(schedule.profile, self.condition(axis, schedule.stop), schedule.max_steps)
+        return schedule, until
+
+    # ---------------- Commands (any thread) ----------------
+    def submit(self, axis, forward, schedule, until=None, start_at=None, units=1):
+        """Queue a move; ``until`` may be a callable or a stop condition name."""
+        schedule, until = self._resolve(axis, schedule, until)
+        move = StepMove(axis, forward, schedule, until, start_at, units)
+        with self._lock:
+            self._queues[axis].append(move)
+        self._wake.set()
+        return move
+
+    async def run(self, axis, forward, schedule, until=None, start_at=None, units=1):
+        """Queue a move and wait for it; cancelling the caller stops the move."""
+        move = self.submit(axis, forward, schedule, until, start_at, units)
+        try:
+            return await asyncio.wrap_future(move.future)
+        except asyncio.CancelledError:
+            move.cancel()
+            self._wake.set()
+            raise
+
+    def submit_group(self, specs, units=None, until=None, start_at=None):
+        """Queue ``(axis, forward, schedule)`` moves that share one start time.
+
+        The group only starts once every member is at the head of its axis
+        queue, so all schedules are measured from the same instant; with
+        ``start_at`` CONTINUE that is the last step deadline of the first
+        member's axis. ``units`` and ``until`` optionally map axis -> fine
+        steps per pulse and stop condition.
+        """
+        units, until = units or {}, until or {}
+        moves = [StepMove(axis, forward, *self._resolve(axis, schedule, until.get(axis)), start_at=start_at,
+                          units=units.get(axis, 1)) for axis, forward, schedule in specs]
+        for move in moves:
+            move.group = moves
+        with self._lock:
+            for move in moves:
+                self._queues[move.axis].append(move)
+        self._wake.set()
+        return moves
+
+    async def run_group(self, specs, units=None, until=None, start_at=None):
+        moves = self.submit_group(specs, units, until, start_at)
+        try:
+            return await asyncio.gather(*(asyncio.wrap_future(m.future) for m in moves))
+        except asyncio.CancelledError:
+            for move in moves:
+                move.cancel()
+            self._wake.set()
+            raise
+
+    def cancel(self, moves):
+        """Cancel specific moves, leaving anything else on their axes alone."""
+        for move in moves:
+            move.cancel()
+        self._wake.set()
+
+    def cancel_axis(self, axis):
+        with self._lock:
+            for move in self._queues[axis]:
+                move.cancel()
+            if self._active[axis] is not None:
+                self._active[axis].cancel()
+        self._wake.set()
+
+    def busy(self, axis):
+        return self._active[axis] is not None or bool(self._queues[axis])
+
+    def stats(self):
+        return {axis: st.as_dict() for axis, st in self._stats.items()}
+
+    # ---------------- Engine thread ----------------
+    def _run(self):
+        self._telemetry = telemetry.ring()
+        while self._running:
+            self._wake.clear()
+            move, deadline = self._next_due()
+            if move is None:
+                self._wake.wait()
+                continue
+            wait_s = (deadline - self.clock()) / self.time_scale
+            if wait_s > 0 and self._wake.wait(wait_s):
+                continue  # new command arrived; re-plan
+            self._fire(move, deadline)
+
+    def _next_due(self):
+        best, best_deadline = None, None
+        with self._lock:
+            axes = list(self.motors)
+            for axis in axes:           # grows while scanning: see below
+                move = self._active[axis]
+                while True:
+                    if move is None:
+                        move = self._activate(axis)
+                        if move is None:
+                            break
+                        # A group started from here may have started on an axis already scanned
+                        axes.extend(m.axis for m in move.group or () if m is not move)
+                    if move.cancelled:
+                        self._finish(move, move.error)
+                        move = None
+                        continue
+                    if move._next_rel is None:
+                        try:
+                            move._next_rel = float(next(move._it))
+                        except StopIteration:
+                            self._finish(move)
+                            move = None
+                            continue
+                        except Exception as exc:
+                            self._finish(move, exc)
+                            move = None
+                            continue
+                    deadline = move._t0 + move._next_rel
+                    if best is None or deadline < best_deadline:
+                        best, best_deadline = move, deadline
+                    break
+        return best, best_deadline
+
+    def _activate(self, axis):
+        queue = self._queues[axis]
+        if not queue:
+            return None
+        head = queue[0]
+        members = head.group or (head,)
+        if any(self._active[m.axis] is not None
+               or not self._queues[m.axis] or self._queues[m.axis][0] is not m
+               for m in members if m is not head):
+            return None  # wait for the other axes to reach this group
+        t0 = self.clock()
+        for move in members:
+            self._queues[move.axis].popleft()
+            self._active[move.axis] = move
+            if move.start_at is None:
+                move._t0 = t0
+            elif move.start_at == CONTINUE:
+                last = self._last_deadline[members[0].axis]
+                move._t0 = t0 if last is None else last
+            else:
+                move._t0 = move.start_at
+            if not move.cancelled:
+                self.motors[move.axis].set_direction(move.forward)
+                self._set_units(move)
+        return head
+
+    def _set_units(self, move):
+        # The driver only takes a new microstep mode where its phase is a
+        # whole step of that mode; anywhere else the move fails to start
+        axis, units = move.axis, move.units
+        if units == self._units[axis]:
+            return
+        try:
+            if self.phase[axis] % units:
+                raise ValueError(f"{axis} driver phase {self.phase[axis]} is not on a whole "
+                                 f"{units}-step boundary")
+            self.motors[axis].set_units(units)
+        except Exception as exc:
+            move.error = exc
+            move.cancel()
+            return
+        self._units[axis] = units
+
+    def _fire(self, move, deadline):
+        axis = move.axis
+        st = self._stats[axis]
+        now = self.clock()
+        late = now - deadline
+        if late > self.LATE_TOLERANCE_S * self.time_scale:
+            st.missed += 1
+            # Slip the rest of the schedule instead of bursting to catch up,
+            # so the motor never sees intervals shorter than commanded
+            # (a coordinated group slips together to stay in lockstep).
+            for member in move.group or (move,):
+                member._t0 += late
+            self._telemetry.put(now, MISSED, self._axis_id[axis], move.steps_done, late)
+        if late > st.max_late_s:
+            st.max_late_s = late
+
+        step = move.units if move.forward else -move.units
+        try:
+            if move.cancelled or (move.until is not None and move.until()):
+                with self._lock:
+                    self._finish(move)
+                return
+            # Counted before the pulse, so an endstop interrupt raised by
+            # this very step already sees it
+            self.position[axis] += step
+            self.phase[axis] += step
+            try:
+                self.motors[axis].pulse()
+            except Exception:
+                self.position[axis] -= step
+                self.phase[axis] -= step
+                raise
+        except Exception as exc:
+            with self._lock:
+                self._finish(move, exc)
+            return
+
+        move.steps_done += 1
+        st.steps += 1
+        self._telemetry.put(now, STEP, self._axis_id[axis], self.position[axis], late)
+        if move._first_fire is None:
+            move._first_rel = move._next_rel
+            move._first_fire = now
+        move._last_rel = move._next_rel
+        move._last_fire = now
+        self._last_deadline[axis] = move._t0 + move._next_rel
+        move._next_rel = None
+
+    def _finish(self, move, exc=None):
+        axis = move.axis
+        if self._active[axis] is move:
+            self._active[axis] = None
+        st = self._stats[axis]
+        st.moves += 1
+        if move.steps_done > 1:
+            span_cmd = move._last_rel - move._first_rel
+            span_act = move._last_fire - move._first_fire
+            intervals = move.steps_done - 1
+            st.commanded_rate = intervals / span_cmd if span_cmd > 0 else 0.0
+            st.achieved_rate = intervals / span_act if span_act > 0 else 0.0
+        if not move.future.done():
+            if exc is not None:
+                move.future.set_exception(exc)
+            else:
+                move.future.set_result(move.steps_done)
+
+    def _abort_axis(self, axis):
+        while self._queues[axis]:
+            move = self._queues[axis].popleft()
+            move.cancel()
+            self._finish(move)
+        if self._active[axis] is not None:
+            self._active[axis].cancel()
+            self._finish(self._active[axis])
@@ -1,17 +1,95 @@
 import asyncio
 import time
 from collections import deque
-from gpiozero import OutputDevice, DigitalInputDevice, DigitalOutputDevice
+from core.logger import AXES, EDGE, FILTER, FOLLOW, FOLLOW_MODE, TARGET, telemetry
+from hardware.backend import get_backend
+from hardware.motion_queue import MotionQueue
+from hardware.step_engine import ARRIVED, ENDSTOP, RELEASE, StepEngine
+from utils.motion_planner import ConstantSchedule, MotionProfile, SeekSchedule, plan_move, scale_profile
+from utils.target_filter import TargetFilter
+from utils.velocity_follower import VelocityFollower
+
+# ---- Optional config (homing seek; the switch must tolerate the over-travel) ----
+try:
+    from config.settings import HOMING_SPEED
+except Exception:
+    HOMING_SPEED = 2500.0           # steps/s, seek cruise speed
+try:
+    from config.settings import HOMING_ACCEL
+except Exception:
+    HOMING_ACCEL = 8000.0           # steps/s^2, seek ramp and braking
+try:
+    from config.settings import HOMING_OVERTRAVEL_STEPS
+except Exception:
+    HOMING_OVERTRAVEL_STEPS = 40    # switch over-travel: braking distance allowed past the trigger point
+try:
+    from config.settings import HOMING_APPROACH_STEPS
+except Exception:
+    HOMING_APPROACH_STEPS = 400     # with home known, HOMING_SPEED right up to this far from it
+try:
+    from config.settings import HOMING_LATCH_SPEED
+except Exception:
+    HOMING_LATCH_SPEED = 200.0      # steps/s when backing off the switch
+try:
+    from config.settings import JOURNAL_INTERVAL_S
+except Exception:
+    JOURNAL_INTERVAL_S = 0.5        # at most one position journal write this often
+try:
+    from config.settings import MOTION_PROCESS
+except Exception:
+    MOTION_PROCESS = False          # run the step engine in its own process (hardware/motion_process.py)
+
+# ---- Optional config (microstepping) ----
+try:
+    from config.settings import MICROSTEP_PINS
+except Exception:
+    MICROSTEP_PINS = {1: (0, 0), 2: (1, 0), 4: (0, 1), 8: (1, 1)}   # microsteps -> MS1/MS2 (A4988/DRV8825, MS3 low)
+try:
+    from config.settings import SLEW_MICROSTEPS
+except Exception:
+    SLEW_MICROSTEPS = 1             # microstep mode for long slews (1 = full steps)
+try:
+    from config.settings import SLEW_SPEED
+except Exception:
+    SLEW_SPEED = 5000.0             # steps/s (ms_mode units) cruising in the SLEW_MICROSTEPS mode
+
+SHARED_STATE_INTERVAL_S = 0.05      # motion process: targets/offsets/modes published this often
+
+
+def microsteps_for(ms_mode):
+    """Microsteps per full step selected by the MS1/MS2 levels ``ms_mode``."""
+    for microsteps, levels in MICROSTEP_PINS.items():
+        if tuple(map(bool, levels)) == tuple(map(bool, ms_mode)):
+            return microsteps
+    raise ValueError(f"ms_mode {ms_mode!r} is not in MICROSTEP_PINS")
 
 
 class StepperMotor:
-    def __init__(self, step_pin, dir_pin, enable_pin, invert_dir=False):
-        self.step = OutputDevice(step_pin)
-        self.dir = OutputDevice(dir_pin)
-        self.enable = OutputDevice(enable_pin)
+    def __init__(self, step_pin, dir_pin, enable_pin, invert_dir=False, ms_pins=None, ms_mode=None,
+                 backend=None):
+        backend = backend or get_backend()
+        self.step = backend.output_device(step_pin)
+        self.dir = backend.output_device(dir_pin)
+        self.enable = backend.output_device(enable_pin)
         self.invert_dir = invert_dir
         self._enabled = False
 
+        # Microstep mode pins: ms_mode is the finest mode and the unit
+        # positions count in; set_units() coarsens it per move
+        self.ms = [backend.digital_output(pin) for pin in ms_pins or ()]
+        self.microsteps = microsteps_for(ms_mode) if self.ms else 1
+        self.units = 1
+        self.set_units(1)
+
+    def set_units(self, units):
+        """Select the microstep mode in which one pulse moves ``units`` fine steps."""
+        levels = MICROSTEP_PINS.get(self.microsteps // units) if self.microsteps % units == 0 else None
+        if levels is None:
+            raise ValueError(f"no microstep mode moves {units} of 1/{self.microsteps} steps per pulse")
+        for pin, level in zip(self.ms, levels):
+            pin.value = bool(level)
+        self.units = units
+
     def enable_motor(self, enable=True):
         self.enable.value = not enable
         self._enabled = enable
@@ -27,6 +105,12 @@ class StepperMotor:
 class StepperController:
     STEPS_PER_DEGREE = 106.4
     MAX_STEPS = 20000
+    FILTER_TICK_S = 0.01    # EMA pass rate while the target filter is still converging
+    FOLLOW_TICK_S = 0.02    # velocity follower control period (planned one tick ahead)
+    HOME_LATCH_MARGIN = 8   # steps short of the trigger point where the slow latch starts
+    COARSE_MIN_STEPS = 1000     # shorter slews stay in the fine microstep mode
+    FINE_APPROACH_STEPS = 32    # at least this much of a coarse slew's end is stepped fine
+    MIN_SLEW_SHARE = 0.05       # floor on the shorter axis's share of a slew's speed when it runs by itself
 
     def __init__(
         self,
@@ -42,33 +126,50 @@ class StepperController:
         az_endstop_pin=17,
         alt_endstop_pin=18,
         deadband=200,
+        backend=None,
+        motion_process=MOTION_PROCESS,
     ):
         self.event_bus = event_bus
-
-        # Motors
-        self.az_motor = StepperMotor(*azimuth_pins, invert_dir=azimuth_invert)
-        self.alt_motor = StepperMotor(*altitude_pins, invert_dir=altitude_invert)
-
-        # Positions
-        self.az_position = 0
-        self.alt_position = 0
-
-        # Parallel safety: per-axis locks
-        self._axis_lock = {"az": asyncio.Lock(), "alt": asyncio.Lock()}
-
-        # Microstepping pins
-        self.az_ms1 = DigitalOutputDevice(az_ms_pins[0])
-        self.az_ms2 = DigitalOutputDevice(az_ms_pins[1])
-        self.alt_ms1 = DigitalOutputDevice(alt_ms_pins[0])
-        self.alt_ms2 = DigitalOutputDevice(alt_ms_pins[1])
-        self.az_ms1.value = bool(ms_mode[0])
-        self.az_ms2.value = bool(ms_mode[1])
-        self.alt_ms1.value = bool(ms_mode[0])
-        self.alt_ms2.value = bool(ms_mode[1])
-
-        # Endstop inputs (active-low)
-        self.az_endstop = DigitalInputDevice(az_endstop_pin, pull_up=True) if az_endstop_pin else None
-        self.alt_endstop = DigitalInputDevice(alt_endstop_pin, pull_up=True) if alt_endstop_pin else None
+        self.backend = backend = backend or get_backend()
+
+        # Positions count in the ms_mode microstep; long slews switch the
+        # drivers to SLEW_MICROSTEPS, moving slew_units of those per pulse
+        self.microsteps = microsteps_for(ms_mode)
+        self.slew_units = self.microsteps // SLEW_MICROSTEPS if self.microsteps % SLEW_MICROSTEPS == 0 else 1
+
+        # Step generation runs off the event loop and owns the positions and
+        # the endstops (active-low GPIO interrupts). In its own process it
+        # also owns the step/dir/enable/microstep pins; the motors here are proxies.
+        if motion_process:
+            from hardware.motion_process import ProcessStepEngine
+            self.engine = ProcessStepEngine(
+                {"az": (*azimuth_pins, azimuth_invert, az_ms_pins, ms_mode),
+                 "alt": (*altitude_pins, altitude_invert, alt_ms_pins, ms_mode)},
+                {"az": az_endstop_pin, "alt": alt_endstop_pin}, backend=backend)
+            self.az_motor, self.alt_motor = self.engine.motors["az"], self.engine.motors["alt"]
+        else:
+            self.az_motor = StepperMotor(*azimuth_pins, invert_dir=azimuth_invert, ms_pins=az_ms_pins,
+                                         ms_mode=ms_mode, backend=backend)
+            self.alt_motor = StepperMotor(*altitude_pins, invert_dir=altitude_invert, ms_pins=alt_ms_pins,
+                                          ms_mode=ms_mode, backend=backend)
+            endstops = {axis: backend.digital_input(pin, pull_up=True) if pin else None
+                        for axis, pin in (("az", az_endstop_pin), ("alt", alt_endstop_pin))}
+            self.engine = StepEngine({"az": self.az_motor, "alt": self.alt_motor},
+                                     clock=backend.clock, time_scale=backend.time_scale, endstops=endstops)
+        self.engine.on_edge = self._on_endstop_edge
+        self.engine.start()
+
+        # Every GOTO, tracker target and hand-over to another source goes
+        # through the axis's motion queue (hardware/motion_queue.py)
+        self.queues = {
+            axis: MotionQueue(self.engine, axis, motor, self.slew_units, self.FINE_APPROACH_STEPS,
+                              self.COARSE_MIN_STEPS, on_idle=self._wake_axis)
+            for axis, motor in (("az", self.az_motor), ("alt", self.alt_motor))
+        }
+
+        # Tracker wakeups: new targets and endstop edges instead of idle polling
+        self._loop = None
+        self._wakeup = {"az": asyncio.Event(), "alt": asyncio.Event()}
 
         # Limits / state
         self.max_steps = self.MAX_STEPS
@@ -77,36 +178,114 @@ class StepperController:
         self.tasks_started = False
 
         # --- Global target input filter (applies to ALL modes) ---
-        # Buffers for median-of-5 on raw target writes
-        self._input_buf = {"az": deque(maxlen=5), "alt": deque(maxlen=5)}
-        self._input_alpha = 0.18        # EMA on input (0..1). Lower = smoother
-        self._input_hyst_steps = 8      # ignore input changes smaller than this (steps)
-        self._input_filtered = {"az": 0.0, "alt": 0.0}  # EMA input state
+        # Median-of-5 + hysteresis + input EMA + controller EMA, updated per write
+        self._target_filter = {"az": TargetFilter(), "alt": TargetFilter()}
         self._raw_target = {"az": 0, "alt": 0}          # latest raw written targets
 
-        # Controller-side smoothing (after input filter)
-        self._filtered_target = {"az": 0, "alt": 0}
-        self._target_alpha = 0.15       # 0.0 to bypass controller EMA (input filter still active)
-
         # Motion / anti-jitter
         self.always_enable = True       # keep coils energized (best for telescopes)
         self.min_move_steps = 4         # dead zone around target (steps)
         self.idle_disable_timeout_s = 2.0
+
+        # Motion profiles (steps/s, steps/s^2); v_start is the old 0.0015 s slow delay
+        self.slew_profile = MotionProfile(v_max=1250.0, accel=2800.0, v_start=667.0)
+        self.coarse_slew_profile = MotionProfile(v_max=SLEW_SPEED, accel=2800.0, v_start=667.0)
+        self.track_profile = MotionProfile(v_max=1250.0, accel=2800.0, v_start=667.0)
+        self.follow_profile = MotionProfile(v_max=1250.0, accel=2800.0, jerk=30000.0, v_start=200.0)
+        # Seek speed is capped so braking from it fits inside the switch over-travel;
+        # with home already known the way there runs at HOMING_SPEED
+        v_start = 667.0
+        self.home_fast_profile = MotionProfile(v_max=HOMING_SPEED, accel=HOMING_ACCEL, v_start=v_start)
+        self.home_profile = MotionProfile(
+            v_max=min(HOMING_SPEED, (v_start ** 2 + 2 * HOMING_ACCEL * HOMING_OVERTRAVEL_STEPS) ** 0.5),
+            accel=HOMING_ACCEL, v_start=v_start)
+        if self.home_profile.v_max < HOMING_SPEED:
+            print(f"[Homing] Switch seek capped at {self.home_profile.v_max:.0f} steps/s (HOMING_SPEED "
+                  f"{HOMING_SPEED:.0f}) to brake within HOMING_OVERTRAVEL_STEPS={HOMING_OVERTRAVEL_STEPS}; "
+                  f"full speed only up to {HOMING_APPROACH_STEPS} steps from a known home")
+        self.homing_stats = {"az": {}, "alt": {}}
+        self._homing_errors = {"az": deque(maxlen=20), "alt": deque(maxlen=20)}
+        self._homed = {"az": False, "alt": False}
         self._last_move_time = {"az": 0.0, "alt": 0.0}
 
+        # Tracker mode per axis: "position" (filtered target), "velocity" (follower)
+        # or "external" (another task, e.g. sidereal tracking, drives the axis)
+        self.follow_mode = {"az": "position", "alt": "position"}
+
         # Manual offsets
         self.az_manual_offset = 0
         self.alt_manual_offset = 0
 
+        # Position journal (see attach_journal); None = positions are not persisted
+        self.journal = None
+        self._journaled = None
+        self._phase_lost = set()        # axes whose driver phase is unknown (slews stay fine)
+        self._home_phase = {}           # axis -> driver phase at home, to re-derive it from
+
         # Initialize public targets via property setters (so filter sees them)
         self.az_target = 0
         self.alt_target = 0
 
+    # -------- Positions live in the step engine --------
+    @property
+    def az_position(self) -> int:
+        return self.engine.position["az"]
+
+    @az_position.setter
+    def az_position(self, value: int):
+        self.engine.position["az"] = int(value)
+
+    @property
+    def alt_position(self) -> int:
+        return self.engine.position["alt"]
+
+    @alt_position.setter
+    def alt_position(self, value: int):
+        self.engine.position["alt"] = int(value)
+
     # -------- Target properties: intercept ALL writes from any mode --------
     def _set_target_internal(self, axis: str, value: int):
         v = max(0, min(int(value), self.max_steps))
         self._raw_target[axis] = v
-        self._input_buf[axis].append(v)
+        telemetry.log(TARGET, AXES[axis], v)
+        self._target_filter[axis].push(v)
+        self._wake_axis(axis)
+
+    def _on_endstop_edge(self, axis: str, hit: bool, position: int):
+        # Interrupt context: gpiozero thread, the step engine, or the motion
+        # process's reply thread; the engine has already latched the edge
+        telemetry.log(EDGE, AXES[axis], position, 1.0 if hit else 0.0)
+        self._wake_axis(axis)
+
+    def _wake_axis(self, axis: str):
+        # Callable from any thread (gpiozero callbacks, the step engine)
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            same_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            self._wakeup[axis].set()
+        else:
+            loop.call_soon_threadsafe(self._wakeup[axis].set)
+
+    async def _wait_wakeup(self, axis: str, timeout=None):
+        try:
+            await asyncio.wait_for(self._wakeup[axis].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup[axis].clear()
+
+    def set_follow_mode(self, mode: str, axes=("az", "alt")):
+        """Switch the trackers between position chasing, velocity following and hands-off."""
+        if mode not in ("position", "velocity", "external"):
+            raise ValueError(f"Unknown follow mode: {mode!r}")
+        for axis in axes:
+            self.follow_mode[axis] = mode
+            telemetry.log(FOLLOW_MODE, AXES[axis], telemetry.name_id(mode))
+            self._wake_axis(axis)
 
     @property
     def az_target(self) -> int:
@@ -125,173 +304,397 @@ class StepperController:
         self._set_target_internal("alt", value)
 
     # ---------------- Parallel-safe wrappers ----------------
+    # The motion queues serialize every source now; kept for callers
     async def phome_axis(self, axis: str):
-        async with self._axis_lock[axis]:
-            await self.home_axis(axis)
+        await self.home_axis(axis)
 
     async def pgoto_steps(self, axis: str, steps: int):
-        async with self._axis_lock[axis]:
-            await self.goto_steps(axis, steps)
+        await self.goto_steps(axis, steps)
+
+    async def pgoto_altaz(self, az_steps: int, alt_steps: int):
+        await self.goto_altaz(az_steps, alt_steps)
+
+    async def settle(self, axes=("az", "alt")):
+        """Brake queued motion to rest before stepping ``axes`` directly."""
+        await asyncio.gather(*(self.queues[axis].settle() for axis in axes))
 
     # ---------------- Background tracker ----------------
     def start_tasks(self):
         if not self.tasks_started:
+            self._loop = asyncio.get_running_loop()
             asyncio.create_task(self.track_axis_loop("az"))
             asyncio.create_task(self.track_axis_loop("alt"))
+            if self.journal is not None:
+                asyncio.create_task(self.journal_loop())
+            if getattr(self.engine, "state", None) is not None:
+                asyncio.create_task(self.shared_state_loop())
             self.tasks_started = True
 
     async def track_axis_loop(self, axis: str):
         motor = self.az_motor if axis == "az" else self.alt_motor
         get_pos = (lambda: self.az_position) if axis == "az" else (lambda: self.alt_position)
-        set_pos = (lambda x: setattr(self, f"{axis}_position", x))
-        endstop = self.az_endstop if axis == "az" else self.alt_endstop
-
-        MIN_DELAY = 0.0015  # slow
-        MAX_DELAY = 0.0008  # fast
-        RAMP_STEPS = 200
+        queue = self.queues[axis]
 
         HOLD_BAND = self.min_move_steps        # do not move inside this
         SNAP_BAND = max(1, HOLD_BAND // 2)     # pin filter even tighter
 
-        # Initialize controller filtered target
-        self._filtered_target[axis] = int(self._raw_target[axis])
+        # Start the filter at the current target so it does not drag the axis
+        flt = self._target_filter[axis]
+        flt.reset(self._raw_target[axis])
+        next_tick = 0.0
 
         while self.running:
-            # ---- Global input filter (median + hysteresis + EMA) ----
-            raw_target = self._raw_target[axis]
-
-            buf = self._input_buf[axis]
-            med = raw_target if not buf else sorted(buf)[len(buf)//2]
-
-            f_in = self._input_filtered[axis]
-            if abs(med - f_in) >= self._input_hyst_steps:
-                f_in = f_in + self._input_alpha * (med - f_in)
-            f_in = float(int(round(f_in)))  # quantize to whole steps
-            self._input_filtered[axis] = f_in
-
-            # Optional controller EMA after input filter
-            if self._target_alpha <= 0.0:
-                target = int(f_in)
-            else:
-                ft = self._filtered_target[axis]
-                ft = int(round(ft + self._target_alpha * (f_in - ft)))
-                self._filtered_target[axis] = ft
-                target = ft
+            if self.follow_mode[axis] == "velocity":
+                await self.follow_axis_velocity(axis)
+                flt.reset(self._raw_target[axis])
+                continue
+            if self.follow_mode[axis] == "external":
+                while self.running and self.follow_mode[axis] == "external":
+                    await self._wait_wakeup(axis)
+                # Hold where the other driver's motion is headed; a GOTO the
+                # next mode already queued keeps running. With nothing queued
+                # there is nothing to cancel, so just wait out any braking.
+                goal = queue.goal
+                if goal is None:
+                    await queue.settle()
+                    goal = queue.goal
+                self._raw_target[axis] = get_pos() if goal is None else goal
+                flt.reset(self._raw_target[axis])
+                continue
+
+            # ---- Filter output is cached; only tick it while it is converging ----
+            now = time.monotonic()
+            if not flt.settled and now >= next_tick:
+                flt.advance()
+                telemetry.log(FILTER, AXES[axis], int(flt.value))
+                next_tick = now + self.FILTER_TICK_S
+            target = flt.value
 
             current = get_pos()
-            delta = target - current
-            adelta = abs(delta)
+            adelta = abs(target - current)
 
-            # ---- Endstop hard block (active-low) ----
-            if endstop and not endstop.value:
+            # ---- Endstop hard block ----
+            if self.engine.endstop_hit(axis):
                 if not motor._enabled:
                     motor.enable_motor(True)
-                await asyncio.sleep(0.05)
+                queue.stop()
+                await self._wait_wakeup(axis)   # endstop release or new target
                 continue
 
-            now = time.monotonic()
-
             # ---- SNAP near target: kill creeping drift ----
-            if adelta <= SNAP_BAND:
-                if self._filtered_target[axis] != current:
-                    self._filtered_target[axis] = current
-                delta = 0
+            if queue.idle and adelta <= SNAP_BAND:
+                flt.snap(current)
                 adelta = 0
 
             # ---- HOLD band: don't move; hold torque (or timed disable) ----
-            if adelta < HOLD_BAND:
+            if queue.idle and adelta < HOLD_BAND:
+                timeout = None
                 if self.always_enable:
                     if not motor._enabled:
                         motor.enable_motor(True)
                 else:
-                    if (now - self._last_move_time[axis]) > self.idle_disable_timeout_s:
+                    idle_s = now - self._last_move_time[axis]
+                    if idle_s > self.idle_disable_timeout_s:
                         if motor._enabled:
                             motor.enable_motor(False)
                     else:
                         if not motor._enabled:
                             motor.enable_motor(True)
-                await asyncio.sleep(0.05)
+                        timeout = self.idle_disable_timeout_s - idle_s
+                if not flt.settled:
+                    timeout = min(timeout or self.FILTER_TICK_S, self.FILTER_TICK_S)
+                # Sleep until a new target (or endstop edge); wake early only
+                # for the idle-disable deadline or a filter still settling
+                await self._wait_wakeup(axis, timeout)
                 continue
 
-            # ---- Move one step with simple accel profile ----
-            if not motor._enabled:
-                motor.enable_motor(True)
-            motor.set_direction(delta > 0)
-
-            steps_remaining = adelta
-            ramp_factor = min(1.0, steps_remaining / RAMP_STEPS)
-            delay = MIN_DELAY - (MIN_DELAY - MAX_DELAY) * ramp_factor
-            delay = max(MAX_DELAY, min(MIN_DELAY, delay))
-
-            motor.pulse()
-            set_pos(current + (1 if delta > 0 else -1))
-            self._last_move_time[axis] = now
+            # ---- Hand the target to the motion queue: a moving target is
+            # replanned from the current velocity, never restarted from rest ----
+            if queue.goal != target:
+                queue.move_to(target, self.track_profile)
+            self._last_move_time[axis] = time.monotonic()
+            # Woken by a new target, an endstop edge or the queue coming to rest
+            await self._wait_wakeup(axis, None if flt.settled else self.FILTER_TICK_S)
+
+    async def follow_axis_velocity(self, axis: str):
+        """Velocity-mode tracking: runs until the axis leaves "velocity" mode.
+
+        Each tick the follower's steps for the *next* tick are queued on the
+        engine at an absolute start time, so one tick of look-ahead absorbs
+        event-loop jitter and the pulse train runs on without gaps.
+        """
+        motor = self.az_motor if axis == "az" else self.alt_motor
+        clock, scale = self.engine.clock, self.engine.time_scale
+        tick = self.FOLLOW_TICK_S
+        p = self.follow_profile
+        follower = VelocityFollower(p.v_max, p.accel, p.jerk or 30000.0, p.v_start,
+                                    limits=(0, self.max_steps))
+        # Only this loop's own chunks are ever cancelled: a mode switch may
+        # already have queued the next owner's moves on the axis
+        queued = deque(maxlen=8)
+        await self.queues[axis].settle()
+        follower.reset(self.engine.position[axis], self._raw_target[axis])
+        print(f"[{axis.upper()}] Velocity follower on")
+
+        try:
+            tick_start = None
+            while self.running and self.follow_mode[axis] == "velocity":
+                if not motor._enabled:
+                    motor.enable_motor(True)
 
-            await asyncio.sleep(delay)
+                # ---- Endstop: drop the plan and wait for release / new target ----
+                if self.engine.endstop_hit(axis):
+                    self.engine.cancel(queued)
+                    await self._wait_wakeup(axis)
+                    follower.reset(self.engine.position[axis], self._raw_target[axis])
+                    tick_start = None
+                    continue
+
+                # ---- At rest on target: sleep until something changes ----
+                if follower.at_rest(self._raw_target[axis]) and not self.engine.busy(axis):
+                    await self._wait_wakeup(axis)
+                    tick_start = None
+                    continue
+
+                # ---- Engine fell behind (slipped deadlines): drop the backlog ----
+                now = clock()
+                actual = self.engine.position[axis]
+                if abs(follower.emitted - actual) > abs(follower.velocity) * 3 * tick + follower.hold_steps:
+                    self.engine.cancel(queued)
+                    follower.resync(actual)
+                    tick_start = now
+                if tick_start is None:
+                    tick_start = now           # leaving rest: nothing queued, start at once
+                elif tick_start < now:
+                    tick_start = now + tick    # loop ran late: re-anchor one tick ahead
+                forward, times = follower.update(self._raw_target[axis], tick)
+                telemetry.log(FOLLOW, AXES[axis], int(follower.emitted), follower.velocity)
+                if len(times):
+                    queued.append(self.engine.submit(axis, forward, times, until=ENDSTOP,
+                                                     start_at=tick_start))
+                    self._last_move_time[axis] = time.monotonic()
+                tick_start += tick
+                # Wake when the tick just planned begins, then plan the one after it
+                await asyncio.sleep(max(0.0, (tick_start - tick - clock()) / scale))
+        finally:
+            self.engine.cancel(queued)
+            print(f"[{axis.upper()}] Velocity follower off")
 
     # ---------------- Direct moves ----------------
     def degrees_to_steps(self, axis, deg):
         return int(deg * self.STEPS_PER_DEGREE)
 
-    async def goto_degree_offset(self, axis, target_deg, min_delay=0.0015, max_delay=0.0008, ramp_steps=200):
+    async def goto_degree_offset(self, axis, target_deg, profile=None):
         target_steps = self.degrees_to_steps(axis, target_deg)
-        await self.goto_steps(axis, target_steps, min_delay, max_delay, ramp_steps)
-
-    async def goto_steps(self, axis, target, min_delay=0.0015, max_delay=0.0008, ramp_steps=200):
-        motor = self.az_motor if axis == "az" else self.alt_motor
-        pos_attr = f"{axis}_position"
-        cur = getattr(self, pos_attr)
-        motor.enable_motor(True)
-        while cur != target:
-            steps_remaining = abs(target - cur)
-            ramp_factor = min(1.0, steps_remaining / ramp_steps)
-            delay = min_delay - (min_delay - max_delay) * ramp_factor
-            delay = max(max_delay, min(min_delay, delay))
-            direction = cur < target
-            motor.set_direction(direction)
-            cur += 1 if direction else -1
-            motor.pulse()
-            setattr(self, pos_attr, cur)
-            await asyncio.sleep(delay)
-        motor.enable_motor(False)
+        await self.goto_steps(axis, target_steps, profile)
+
+    async def goto_steps(self, axis, target, profile=None, append=False):
+        """Slew ``axis`` to ``target`` through its motion queue.
+
+        Replaces whatever the queue was doing without stopping first
+        (``append`` runs it after that instead). The motor keeps its
+        holding torque at the end. Returns False if a newer command took
+        over before the target was reached.
+        """
+        return await self.queues[axis].goto(target, *self._slew_profiles(profile), append=append)
+
+    async def goto_altaz(self, az_steps, alt_steps, profile=None, append=False):
+        """Coordinated slew: the longer axis is planned and the shorter one
+        stepped along with it, so both start and arrive together on a
+        straight line (MotionQueue.move_linked).
+
+        Appended slews, and the shorter axis once the link is broken, run
+        with profiles scaled by each axis's share of the move. A slew
+        issued while an axis is still moving blends in per axis at the
+        full profile, which can brake whatever speed the axis is at.
+        """
+        targets = {"az": az_steps, "alt": alt_steps}
+        deltas = {axis: abs(target - self.queues[axis].position) for axis, target in targets.items()}
+        major = max(deltas, key=deltas.get)
+        span = deltas[major] or 1
+        coarse = span >= self.COARSE_MIN_STEPS
+        profiles = {axis: self._slew_profiles(profile, max(self.MIN_SLEW_SHARE, delta / span), coarse)
+                    for axis, delta in deltas.items()}
+        if append or not all(queue.idle for queue in self.queues.values()):
+            results = await asyncio.gather(*(
+                self.queues[axis].goto(target, *(profiles[axis] if append else self._slew_profiles(profile)),
+                                       append=append)
+                for axis, target in targets.items()))
+            return all(results)
+        minor = "alt" if major == "az" else "az"
+        return await self.queues[major].goto_linked(targets[major], self.queues[minor], targets[minor],
+                                                    profiles[major], profiles[minor])
+
+    def _slew_profiles(self, profile=None, share=1.0, coarse=True):
+        # (fine, coarse) for a queue command; an explicit profile is stepped
+        # fine throughout. A small share of a coarse slew may not even need
+        # the fine mode's full speed.
+        if profile is not None or self.slew_units == 1 or not coarse:
+            return scale_profile(profile or self.slew_profile, share), None
+        fast = scale_profile(self.coarse_slew_profile, share)
+        return (self.slew_profile if self.slew_profile.v_max <= fast.v_max else fast), fast
 
     # ---------------- Homing ----------------
-    async def home_axis(self, axis: str,
-                        fast_delay=0.0008,
-                        slow_delay=0.0015,
-                        backoff_steps=100):
+    async def home_axis(self, axis: str, profile=None, latch_speed=HOMING_LATCH_SPEED):
+        """Seek the endstop and make its release point step 0.
+
+        The seek ramps up to ``home_profile.v_max``, which brakes within the
+        switch over-travel; when home is already known the axis first runs
+        at ``home_fast_profile`` to HOMING_APPROACH_STEPS from it. The
+        trigger edge is a GPIO interrupt that latches the step count, and
+        the seek schedule (consumed step by step in the engine) brakes from
+        that step on, or from the first step the switch reads closed should
+        the edge be lost. The braking overshoot is undone at slew speed up
+        to the latched trigger step, then the axis creeps out of the switch
+        and the release edge latches home, so no second approach is needed.
+        Returns the run's stats.
+        """
         motor = self.az_motor if axis == "az" else self.alt_motor
-        endstop = self.az_endstop if axis == "az" else self.alt_endstop
-        set_pos = lambda x: setattr(self, f"{axis}_position", x)
+        profile = profile or self.home_profile
+        clock = self.engine.clock
 
+        await self.queues[axis].settle()
         print(f"[{axis.upper()}] Homing start")
+        t0 = clock()
+        start = self.engine.position[axis]
         motor.enable_motor(True)
-        motor.set_direction(False)  # Move toward endstop
-
-        # Approach endstop
-        while endstop.value:
-            motor.pulse()
-            await asyncio.sleep(fast_delay)
-        print(f"[{axis.upper()}] Endstop contacted (fast)")
-
-        # Back off
-        motor.set_direction(True)
-        for _ in range(backoff_steps):
-            motor.pulse()
-            await asyncio.sleep(slow_delay)
-
-        # Slow approach
-        motor.set_direction(False)
-        while endstop.value:
-            motor.pulse()
-            await asyncio.sleep(slow_delay)
-
-        # Final slow touch
-        motor.set_direction(True)
-        while not endstop.value:
-            motor.pulse()
-            await asyncio.sleep(slow_delay)
-
-        print(f"[{axis.upper()}] Homing complete (slow approach)")
-        set_pos(0)
-        motor.enable_motor(False)
+        latch = self.engine.arm_latch(axis)         # hit -> step count at that edge
+        hit = lambda: latch[True] is not None
+        released = lambda: latch[False] is not None
+        try:
+            # ---- Seek: accelerate toward the switch (backward), brake on the edge ----
+            seek_steps, peak = 0, profile.v_max
+            if self._homed[axis] and not self.engine.endstop_hit(axis) and start > HOMING_APPROACH_STEPS:
+                # Home is known: fast to just short of it (an early switch still ends the run)
+                _, times = plan_move(start, HOMING_APPROACH_STEPS, self.home_fast_profile)
+                seek_steps = await self.engine.run(axis, False, times, until=ARRIVED)
+                peak = max(peak, self.home_fast_profile.v_max)
+            if not hit() and not self.engine.endstop_hit(axis):
+                limit = self.max_steps + self.max_steps // 10 + HOMING_OVERTRAVEL_STEPS
+                seek_steps += await self.engine.run(axis, False, SeekSchedule(profile, ARRIVED, limit))
+                if not hit() and not self.engine.endstop_hit(axis):
+                    raise RuntimeError(f"{axis} endstop not found within {limit} steps")
+            t_seek = clock()
+
+            # ---- Latch: return briskly to just short of the trigger step, then
+            # creep out; the release edge (never before the trigger) is home ----
+            if hit():
+                forward, times = plan_move(self.engine.position[axis], latch[True] - self.HOME_LATCH_MARGIN,
+                                           self.slew_profile)
+                if forward and len(times):
+                    await self.engine.run(axis, True, times, until=RELEASE)
+            await self.engine.run(axis, True, ConstantSchedule(1.0 / latch_speed), until=RELEASE)
+            if not released():
+                raise RuntimeError(f"{axis} endstop did not release")
+        finally:
+            self.engine.disarm_latch(axis)
+            motor.enable_motor(False)
+
+        home = latch[False]
+        self.engine.position[axis] -= home          # release point becomes 0
+        if axis in self._phase_lost and axis in self._home_phase:
+            self.engine.phase[axis] = self._home_phase[axis] + self.engine.position[axis]
+            self._phase_lost.discard(axis)
+            if not self._phase_lost:
+                self.slew_units = self._slew_units
+                print("[Journal] Driver phases re-derived at home; coarse slews back on")
+        stats = {
+            "duration_s": clock() - t0,
+            "seek_s": t_seek - t0,
+            "seek_steps": seek_steps,
+            "peak_speed": peak,
+            "overshoot_steps": None if latch[True] is None else latch[True] - (start - seek_steps),
+            "hysteresis_steps": None if latch[True] is None else home - latch[True],
+            "home_error_steps": home if self._homed[axis] else None,
+        }
+        # Repeatability: where home fell in the previous run's coordinates
+        errors = self._homing_errors[axis]
+        if self._homed[axis]:
+            errors.append(home)
+            stats["repeatability_steps"] = max(errors) - min(errors)
+        self._homed[axis] = True
+        self.homing_stats[axis] = stats
+        print(f"[{axis.upper()}] Homed in {stats['duration_s']:.2f}s "
+              f"(seek {seek_steps} steps @ {peak:.0f}/s, overshoot {stats['overshoot_steps']}, "
+              f"hysteresis {stats['hysteresis_steps']}, home error {stats['home_error_steps']})")
+        return stats
+
+    # ---------------- Position journal ----------------
+    def attach_journal(self, journal):
+        """Persist positions to ``journal``; returns True on a warm start.
+
+        A warm start (last run homed and shut down cleanly) restores
+        positions and pot offsets from the journal. Either way the journal
+        is then marked unclean, so a crash from here on forces homing.
+        The drivers' microstep phases matter because the coarse microstep
+        mode is only entered on a whole coarse step; they come back from a
+        clean record only (a driver power cycle, which resets them, is not
+        visible here). After a crash the record may predate the last steps,
+        so slews stay in the fine mode until homing re-derives each phase
+        from where it stood at home in that record.
+        """
+        record = journal.read()
+        clean = record is not None and record["clean"]
+        warm = clean and record["homed"]
+        if clean:
+            for axis in ("az", "alt"):
+                self.engine.phase[axis] = record["phases"][axis]
+        elif record is not None:
+            self._phase_lost = {"az", "alt"}
+            self._slew_units, self.slew_units = self.slew_units, 1
+            if record["homed"]:
+                # Phase and position move together, so their difference is the phase at home
+                self._home_phase = {axis: record["phases"][axis] - record["positions"][axis]
+                                    for axis in ("az", "alt")}
+            print("[Journal] Unclean exit: driver phases unknown, slewing fine until homed")
+        if warm:
+            for axis in ("az", "alt"):
+                self.engine.position[axis] = record["positions"][axis]
+                setattr(self, f"{axis}_manual_offset", record["offsets"][axis])
+                setattr(self, f"{axis}_target", record["positions"][axis])
+                self._homed[axis] = True
+            print(f"[Journal] Warm start at az {self.az_position}, alt {self.alt_position}")
+        self.journal = journal
+        self._write_journal(clean=False)
+        return warm
+
+    def _journal_state(self):
+        return (self.az_position, self.alt_position, self.az_manual_offset, self.alt_manual_offset,
+                self.engine.phase["az"], self.engine.phase["alt"], all(self._homed.values()))
+
+    def _write_journal(self, clean):
+        # Unknown phases must not pass for known ones at the next start
+        state = self._journal_state()
+        self.journal.write({"az": state[0], "alt": state[1]}, {"az": state[2], "alt": state[3]},
+                           {"az": state[4], "alt": state[5]}, clean=clean and not self._phase_lost,
+                           homed=state[6])
+        self._journaled = state
+
+    async def journal_loop(self):
+        # Bounded rate: one write per interval at most, and only after a change
+        while self.running:
+            await asyncio.sleep(JOURNAL_INTERVAL_S)
+            if self.running and self._journal_state() != self._journaled:
+                self._write_journal(clean=False)
+
+    async def shared_state_loop(self):
+        # Motion process only: targets, offsets and modes for other processes
+        # (positions are written by the engine itself)
+        while self.running:
+            for axis in ("az", "alt"):
+                self.engine.state.publish(axis, self._raw_target[axis], getattr(self, f"{axis}_manual_offset"),
+                                          self.follow_mode[axis], self._homed[axis])
+            await asyncio.sleep(SHARED_STATE_INTERVAL_S)
+
+    # ---------------- Shutdown ----------------
+    def disable_all(self):
+        self.running = False
+        self.engine.stop()
+        for queue in self.queues.values():
+            queue.close()
+        for motor in (self.az_motor, self.alt_motor):
+            motor.enable_motor(False)
+        if self.journal is not None:
+            self._write_journal(clean=True)     # positions are final: next start may skip homing
+            self.journal.close()
+            self.journal = None
@@ -1,13 +1,13 @@
 import asyncio
+import signal
+from utils.boot_timer import boot
 from core.event_bus import event_bus
+from core.logger import TELEMETRY_ENABLED, telemetry
 from hardware.oled_display import OLEDDisplay
-from hardware.input_manager import InputManager
+from hardware.display_pipeline import DisplayPipeline
 from core.menu_system import MenuSystem
-from hardware.stepper_controller import StepperController
-import core.manual_mode
-import core.auto_mode
-import core.homing
-import core.stop_mode
+# Everything else (numpy, gpiozero, the ADS1115, the modes) is imported in
+# main() once "Starting up..." is on screen
 
 # ---- Optional config for idle positions (falls back to your current numbers) ----
 try:
@@ -20,27 +20,16 @@ def pot_to_steps(pot_value: int, max_steps: int) -> int:
     return int(pot_value * max_steps / 65535)
 
 
-async def main():
-    menu_oled = OLEDDisplay(i2c_addr=0x3C)
-    status_oled = OLEDDisplay(i2c_addr=0x3D)
-    menu_system = MenuSystem(menu_oled, status_oled, event_bus)
-    input_manager = InputManager(event_bus)
-    stepper_ctrl = StepperController(event_bus, azimuth_invert=True, altitude_invert=False, ms_mode=(1, 1))
-    core.homing.stepper_ctrl = stepper_ctrl
-
-    menu_system.draw_status("Starting up...")
-
+async def cold_start(stepper_ctrl, menu_system):
+    """Home, park at IDLE_POS and ask for the pots to be synced."""
     # 1) Home axes IN PARALLEL (note: phome_axis)
     await asyncio.gather(
         stepper_ctrl.phome_axis("az"),
         stepper_ctrl.phome_axis("alt"),
     )
 
-    # 2) Move to idle IN PARALLEL (note: pgoto_steps)
-    await asyncio.gather(
-        stepper_ctrl.pgoto_steps("az", IDLE_POS["az"]),
-        stepper_ctrl.pgoto_steps("alt", IDLE_POS["alt"]),
-    )
+    # 2) Move to idle as one coordinated slew (note: pgoto_altaz)
+    await stepper_ctrl.pgoto_altaz(IDLE_POS["az"], IDLE_POS["alt"])
 
     # Sync internal positions/targets
     stepper_ctrl.az_position = IDLE_POS["az"]
@@ -61,30 +50,78 @@ async def main():
 
         stepper_ctrl.az_manual_offset = stepper_ctrl.az_position - pot_steps_az
         stepper_ctrl.alt_manual_offset = stepper_ctrl.alt_position - pot_steps_alt
+        menu_system.draw_menu()
 
-        # Unsubscribe (your original approach)
-        try:
-            event_bus.subscribers["sync_ok_pressed"].remove(on_sync_ok)
-        except Exception:
-            pass
+    event_bus.subscribe("sync_ok_pressed", on_sync_ok, once=True)
 
-        menu_system.draw_menu()
 
-    event_bus.subscribe("sync_ok_pressed", on_sync_ok)
+async def main():
+    # ---- First frame: only the displays and the menu renderer ----
+    with boot.phase("displays"):
+        menu_oled = OLEDDisplay(i2c_addr=0x3C)
+        status_oled = OLEDDisplay(i2c_addr=0x3D)
+        menu_system = MenuSystem(menu_oled, status_oled, event_bus)
+        menu_system.draw_status("Starting up...")    # rendered inline: no pipeline yet
+    boot.mark("first frame")
+    display_pipeline = DisplayPipeline([menu_oled, status_oled])
+    display_pipeline.start()
+    if TELEMETRY_ENABLED:
+        telemetry.start()
+
+    # ---- The rest loads behind the splash screen ----
+    with boot.phase("imports"):
+        import core.auto_mode       # noqa: F401  (modes subscribe to the bus on import)
+        import core.calibration     # noqa: F401
+        import core.homing
+        import core.manual_mode     # noqa: F401
+        import core.monitor
+        import core.stop_mode       # noqa: F401
+        from hardware.ads1115 import sampler as adc_sampler
+        from hardware.input_manager import InputManager
+        from hardware.stepper_controller import StepperController
+        from utils.position_journal import PositionJournal
+    with boot.phase("adc"):
+        adc_sampler.start()
+    with boot.phase("input"):
+        input_manager = InputManager(event_bus)
+    with boot.phase("steppers"):
+        stepper_ctrl = StepperController(event_bus, azimuth_invert=True, altitude_invert=False, ms_mode=(1, 1))
+        core.homing.stepper_ctrl = stepper_ctrl
+        core.monitor.status_display = menu_system
+
+    # Warm start: the last run shut down cleanly, so positions and pot
+    # offsets from the journal are trusted and homing is skipped
+    with boot.phase("journal"):
+        warm = stepper_ctrl.attach_journal(PositionJournal())
+    if warm:
+        menu_system.draw_menu()
+    else:
+        with boot.phase("homing"):
+            await cold_start(stepper_ctrl, menu_system)
+    boot.mark("ready")
+    boot.report()
 
     event_bus.loop = asyncio.get_running_loop()
     event_bus.loop.call_soon(stepper_ctrl.start_tasks)
+    core.monitor.monitor.start(stepper_ctrl.engine)
+    # A service stop (SIGTERM) takes the same cleanup path as Ctrl-C, so the
+    # journal is closed cleanly and the next start stays warm
+    event_bus.loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
 
     try:
         while True:
             await asyncio.sleep(1)
-    except KeyboardInterrupt:
+    except (KeyboardInterrupt, asyncio.CancelledError):
         print("Exiting menu...")
     finally:
         try:
             stepper_ctrl.disable_all()
         except Exception:
             pass
+        core.monitor.monitor.stop()
+        display_pipeline.stop()
+        adc_sampler.stop()
+        telemetry.stop()
         try:
             getattr(input_manager, "cleanup", lambda: None)()
         except Exception:
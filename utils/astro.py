@@ -0,0 +1,43 @@
+# utils/astro.py
+"""Sky coordinates for tracking and GOTO. Angles in degrees, times in UTC seconds.
+
+Functions accept scalars or NumPy arrays and broadcast.
+"""
+import numpy as np
+
+SIDEREAL_DAY_S = 86164.0905
+SIDEREAL_RATE_DEG_S = 360.0 / SIDEREAL_DAY_S   # ~15.04 arcsec/s
+
+
+def julian_date(t):
+    return np.asarray(t, dtype=np.float64) / 86400.0 + 2440587.5
+
+
+def local_sidereal_time(t, lon_deg):
+    """Local mean sidereal time in degrees (east longitude positive)."""
+    gmst = 280.46061837 + 360.98564736629 * (julian_date(t) - 2451545.0)
+    return np.mod(gmst + lon_deg, 360.0)
+
+
+def radec_to_altaz(ra_deg, dec_deg, lst_deg, lat_deg):
+    """Equatorial -> horizontal. Azimuth from north through east."""
+    ha = np.radians(np.asarray(lst_deg) - ra_deg)
+    dec = np.radians(dec_deg)
+    lat = np.radians(lat_deg)
+    sin_dec, cos_dec = np.sin(dec), np.cos(dec)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    alt = np.arcsin(np.clip(sin_dec * sin_lat + cos_dec * cos_lat * np.cos(ha), -1.0, 1.0))
+    az = np.arctan2(-np.sin(ha) * cos_dec, sin_dec * cos_lat - cos_dec * sin_lat * np.cos(ha))
+    return np.degrees(alt), np.mod(np.degrees(az), 360.0)
+
+
+def altaz_to_radec(alt_deg, az_deg, lst_deg, lat_deg):
+    """Horizontal -> equatorial (inverse of ``radec_to_altaz``)."""
+    alt = np.radians(alt_deg)
+    az = np.radians(az_deg)
+    lat = np.radians(lat_deg)
+    sin_alt, cos_alt = np.sin(alt), np.cos(alt)
+    sin_lat, cos_lat = np.sin(lat), np.cos(lat)
+    dec = np.arcsin(np.clip(sin_alt * sin_lat + cos_alt * cos_lat * np.cos(az), -1.0, 1.0))
+    ha = np.arctan2(-np.sin(az) * cos_alt, sin_alt * cos_lat - cos_alt * sin_lat * np.cos(az))
+    return np.mod(np.asarray(lst_deg) - np.degrees(ha), 360.0), np.degrees(dec)
@@ -0,0 +1,54 @@
+# utils/boot_timer.py
+import os
+import time
+from contextlib import contextmanager
+
+_IMPORTED = time.perf_counter()
+
+
+def process_age():
+    """Seconds since this process was created, interpreter start-up included.
+
+    Read from /proc on Linux (10 ms resolution); elsewhere, time since this
+    module was imported.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter() - _IMPORTED
+
+
+class BootTimer:
+    """Where start-up time goes: named phases and marks, in seconds from process start."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter() - process_age()
+        self.phases = []            # (name, start_s, duration_s)
+        self.marks = {}             # name -> s
+
+    def now(self):
+        return time.perf_counter() - self.t0
+
+    @contextmanager
+    def phase(self, name):
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start, self.now() - start))
+
+    def mark(self, name):
+        self.marks[name] = self.now()
+
+    def report(self):
+        first = min((start for _, start, _ in self.phases), default=self.now())
+        print(f"[Boot] {'before phases':16s} {first * 1000:7.0f} ms  (interpreter and module imports)")
+        for name, start, duration in self.phases:
+            print(f"[Boot] {name:16s} {duration * 1000:7.0f} ms  (at {start * 1000:.0f} ms)")
+        for name, t in self.marks.items():
+            print(f"[Boot] {name:16s} at {t * 1000:.0f} ms")
+
+
+boot = BootTimer()
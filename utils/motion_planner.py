@@ -0,0 +1,162 @@
+# utils/motion_planner.py
+import itertools
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+_SCURVE_SAMPLES = 2048   # time samples per S-curve acceleration phase
+
+
+class MotionProfile(NamedTuple):
+    v_max: float                   # steps/s
+    accel: float                   # steps/s^2
+    jerk: Optional[float] = None   # steps/s^3; None = trapezoidal
+    v_start: float = 0.0           # start/stop speed the motor can jump to (steps/s)
+
+
+def plan_move(start: int, end: int, profile: MotionProfile):
+    """Return ``(forward, times)`` for a point-to-point move.
+
+    ``times[k]`` is the time (s, from move start) of step ``k + 1``; the
+    array is shared through the cache and must not be modified.
+    """
+    return end >= start, step_times(abs(end - start), profile)
+
+
+def scale_profile(profile: MotionProfile, share: float) -> MotionProfile:
+    """``profile`` slowed to ``share`` of its speed and acceleration (the shorter axis of a slew)."""
+    if share >= 1.0:
+        return profile
+    v_max = profile.v_max * share
+    return MotionProfile(v_max, profile.accel * share, None if profile.jerk is None else profile.jerk * share,
+                         min(profile.v_start, v_max))
+
+
+def seek_times(profile: MotionProfile, stop, max_steps: int):
+    """Open-ended schedule for seeking a switch, consumed one step at a time.
+
+    Ramps from ``v_start`` up to ``v_max``; from the first step at which
+    ``stop()`` is true it decelerates back to ``v_start`` and ends, which
+    takes ``(v**2 - v_start**2) / (2 * accel)`` steps. Gives up after
+    ``max_steps``.
+    """
+    a2 = 2.0 * float(profile.accel)
+    v0_sq = min(float(profile.v_start), float(profile.v_max)) ** 2
+    vmax_sq = float(profile.v_max) ** 2
+    v_sq, t = v0_sq, 0.0
+    for _ in range(max_steps):
+        if stop():
+            v_sq -= a2
+            if v_sq < v0_sq:
+                return
+        else:
+            v_sq = min(v_sq + a2, vmax_sq)
+        t += 1.0 / np.sqrt(v_sq)
+        yield t
+
+
+class SeekSchedule:
+    """``seek_times`` as a description, iterated by whichever engine runs it.
+
+    ``stop`` is a callable or the name of a step engine stop condition,
+    which lets an engine in another process brake on its own endstop.
+    """
+
+    __slots__ = ("profile", "stop", "max_steps")
+
+    def __init__(self, profile: MotionProfile, stop, max_steps: int):
+        self.profile = profile
+        self.stop = stop
+        self.max_steps = max_steps
+
+    def __iter__(self):
+        return seek_times(self.profile, self.stop, self.max_steps)
+
+
+class ConstantSchedule:
+    """Endless fixed-rate step times; pair with ``until`` to stop."""
+
+    __slots__ = ("delay",)
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def __iter__(self):
+        return (k * self.delay for k in itertools.count(1))
+
+
+@lru_cache(maxsize=32)
+def step_times(distance: int, profile: MotionProfile):
+    if distance <= 0:
+        times = np.empty(0)
+    elif profile.jerk:
+        times = _scurve_times(distance, profile)
+    else:
+        times = _trapezoid_times(distance, profile)
+    times.flags.writeable = False
+    return times
+
+
+def _trapezoid_times(n, p):
+    a = float(p.accel)
+    v0 = min(float(p.v_start), float(p.v_max))
+    vp = min(float(p.v_max), np.sqrt(v0 * v0 + a * n))    # triangle if short
+    s_acc = (vp * vp - v0 * v0) / (2 * a)
+    t_acc = (vp - v0) / a
+    t_total = 2 * t_acc + (n - 2 * s_acc) / vp
+
+    k = np.arange(1, n + 1, dtype=np.float64)
+    accel = (np.sqrt(v0 * v0 + 2 * a * k) - v0) / a
+    cruise = t_acc + (k - s_acc) / vp
+    decel = t_total - (np.sqrt(v0 * v0 + 2 * a * (n - k)) - v0) / a
+    return np.where(k <= s_acc, accel, np.where(k < n - s_acc, cruise, decel))
+
+
+def _scurve_phase(v0, vp, a_max, jerk):
+    """Duration of a symmetric jerk-limited ramp from v0 to vp."""
+    dv = vp - v0
+    if dv <= 0:
+        return 0.0
+    if dv >= a_max * a_max / jerk:
+        return a_max / jerk + dv / a_max
+    return 2 * np.sqrt(dv / jerk)
+
+
+def _scurve_times(n, p):
+    a_max, jerk = float(p.accel), float(p.jerk)
+    v0 = min(float(p.v_start), float(p.v_max))
+    ramp_dist = lambda vp: (v0 + vp) / 2 * _scurve_phase(v0, vp, a_max, jerk)
+
+    vp = float(p.v_max)
+    if 2 * ramp_dist(vp) > n:
+        lo, hi = v0, vp
+        for _ in range(60):
+            mid = (lo + hi) / 2
+            if 2 * ramp_dist(mid) > n:
+                hi = mid
+            else:
+                lo = mid
+        vp = lo
+    t_ramp = _scurve_phase(v0, vp, a_max, jerk)
+    s_ramp = ramp_dist(vp)
+    t_total = 2 * t_ramp + (n - 2 * s_ramp) / vp
+
+    # Sample the ramp's acceleration, integrate twice, then invert s(t)
+    t = np.linspace(0.0, t_ramp, _SCURVE_SAMPLES)
+    a_peak = min(a_max, np.sqrt(max(vp - v0, 0.0) * jerk))
+    t_j = a_peak / jerk
+    acc = np.minimum(np.minimum(jerk * t, a_peak), jerk * (t_ramp - t))
+    dt = np.diff(t)
+    vel = v0 + np.concatenate(([0.0], np.cumsum((acc[1:] + acc[:-1]) / 2 * dt)))
+    pos = np.concatenate(([0.0], np.cumsum((vel[1:] + vel[:-1]) / 2 * dt)))
+    if t_j == 0.0 or pos[-1] == 0.0:
+        pos = np.linspace(0.0, s_ramp, _SCURVE_SAMPLES)
+    else:
+        pos *= s_ramp / pos[-1]   # absorb integration error
+
+    k = np.arange(1, n + 1, dtype=np.float64)
+    accel = np.interp(k, pos, t)
+    cruise = t_ramp + (k - s_ramp) / vp
+    decel = t_total - np.interp(n - k, pos, t)
+    return np.where(k <= s_ramp, accel, np.where(k < n - s_ramp, cruise, decel))
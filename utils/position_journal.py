@@ -0,0 +1,85 @@
+# utils/position_journal.py
+import mmap
+import os
+import struct
+import time
+import zlib
+
+# ---- Optional config ----
+try:
+    from config.settings import JOURNAL_PATH
+except Exception:
+    JOURNAL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "data", "position.journal")
+
+MAGIC = b"OSPJ"
+VERSION = 2
+# magic, version, clean, homed, seq, az, alt, az offset, alt offset, az phase, alt phase, UTC written
+RECORD = struct.Struct("<4sHBBQqqqqqqd")
+SLOT = 96                                   # record + CRC32, padded
+AXES = ("az", "alt")
+
+
+class PositionJournal:
+    """Last known axis state in a small memory-mapped file.
+
+    Two fixed-size slots are written alternately, each a record plus its
+    CRC32 and a sequence number. A write torn by a crash or power cut
+    fails its CRC, so ``read`` falls back to the other slot: the file
+    always holds either the new record or the previous one.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.seq = 0
+        self._mm = None
+
+    def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != 2 * SLOT:
+                os.ftruncate(fd, 2 * SLOT)
+            self._mm = mmap.mmap(fd, 2 * SLOT)
+        finally:
+            os.close(fd)            # the mapping keeps the file open
+        return self
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+
+    def _slot(self, i):
+        raw = self._mm[i * SLOT:i * SLOT + RECORD.size + 4]
+        body, crc = raw[:RECORD.size], struct.unpack_from("<I", raw, RECORD.size)[0]
+        if zlib.crc32(body) != crc:
+            return None
+        magic, version, clean, homed, seq, az, alt, az_off, alt_off, az_ph, alt_ph, t = RECORD.unpack(body)
+        if magic != MAGIC or version != VERSION:
+            return None
+        return {"seq": seq, "clean": bool(clean), "homed": bool(homed), "time": t,
+                "positions": dict(zip(AXES, (az, alt))), "offsets": dict(zip(AXES, (az_off, alt_off))),
+                "phases": dict(zip(AXES, (az_ph, alt_ph)))}
+
+    def read(self):
+        """Newest intact record, or None for a new or unreadable file."""
+        if self._mm is None:
+            self.open()
+        records = [r for r in (self._slot(0), self._slot(1)) if r is not None]
+        if not records:
+            return None
+        latest = max(records, key=lambda r: r["seq"])
+        self.seq = latest["seq"]
+        return latest
+
+    def write(self, positions, offsets, phases, clean=False, homed=True):
+        if self._mm is None:
+            self.open()
+        self.seq += 1
+        body = RECORD.pack(MAGIC, VERSION, clean, homed, self.seq, *(int(positions[a]) for a in AXES),
+                           *(int(offsets[a]) for a in AXES), *(int(phases[a]) for a in AXES), time.time())
+        start = (self.seq % 2) * SLOT
+        self._mm[start:start + RECORD.size + 4] = body + struct.pack("<I", zlib.crc32(body))
+        self._mm.flush()            # msync: the whole file is a single page
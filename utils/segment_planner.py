@@ -0,0 +1,204 @@
+# utils/segment_planner.py
+import math
+from collections import deque
+from itertools import islice
+
+
+class Segment:
+    """One point-to-point command for the planner: go to ``target`` (fine steps).
+
+    ``fine`` is its profile in the fine microstep mode and ``coarse``, if
+    given, the one for the part that may run at ``coarse_units`` per
+    pulse (both in fine steps). ``token`` belongs to the caller and comes
+    back once the target is reached.
+    """
+
+    __slots__ = ("target", "fine", "coarse", "token")
+
+    def __init__(self, target, fine, coarse=None, token=None):
+        self.target = int(target)
+        self.fine = fine
+        self.coarse = coarse
+        self.token = token
+
+    def v_cap(self, coarse_units):
+        return (self.coarse if self.coarse is not None and coarse_units > 1 else self.fine).v_max
+
+
+def _start_speed(profile, units):
+    # Speed a pulse can start or stop at: v_start, or what one pulse of accel reaches
+    return min(profile.v_max, max(profile.v_start, math.sqrt(2.0 * profile.accel * units)))
+
+
+class SegmentPlanner:
+    """Online trapezoidal ramp through a queue of point-to-point segments.
+
+    Pulse by pulse it accelerates, cruises or brakes so the axis can still
+    stop where it has to: at the last segment, or where the next one turns
+    back. Segments that keep the direction are passed through at speed
+    (capped by the next one's ``v_max``), and replacing the queue
+    mid-move carries on from the current velocity, braking past the old
+    target first when the new one is behind.
+
+    With ``coarse_units`` > 1 the bulk of a segment that has a coarse
+    profile runs at that many fine steps per pulse. The coarse mode is
+    only entered where ``phase`` is a whole coarse step and at least
+    ``coarse_min`` from the stop, and left ``fine_approach`` steps before
+    it at no more than the fine ``v_max``.
+    """
+
+    def __init__(self, coarse_units=1, fine_approach=32, coarse_min=1000):
+        self.coarse_units = coarse_units
+        self.fine_approach = fine_approach
+        self.coarse_min = coarse_min
+        self.segments = deque()
+        self._reached = []
+        self._profile = None        # profile of the last pulse, for braking with nothing queued
+        self.reset(0)
+
+    def reset(self, position, phase=0):
+        """At rest at ``position`` (driver ``phase``); queued segments are kept."""
+        self.position = int(position)
+        self.phase = int(phase)
+        self.speed = 0.0            # fine steps/s
+        self.direction = 1
+        self.units = 1
+
+    def follow(self, position, phase, direction, speed, units, profile):
+        """Carry on from motion planned elsewhere (a linked slew's minor axis)."""
+        self.position, self.phase = int(position), int(phase)
+        self.direction, self.speed, self.units = direction, speed, units
+        self._profile = profile
+
+    @property
+    def idle(self):
+        return not self.speed and not self.segments
+
+    def append(self, segment):
+        self.segments.append(segment)
+
+    def stop(self):
+        """Drop every segment (the axis brakes to rest); returns them."""
+        dropped = list(self.segments)
+        self.segments.clear()
+        return dropped
+
+    def plan(self, duration):
+        """Pulses for about ``duration`` seconds: ``(chunks, reached)``.
+
+        Each chunk is ``[forward, units, times, reached]``: one direction
+        and microstep mode, with step times relative to the chunk's start
+        (the previous pulse). A chunk's ``reached`` are the segments it
+        ends on or runs through; ``reached`` on its own lists those done
+        with pulses planned by an earlier call.
+        """
+        chunks, earlier = [], []
+        t = base = 0.0
+        while t < duration:
+            pulse = self._next()
+            (chunks[-1][3] if chunks else earlier).extend(self._reached)
+            self._reached.clear()
+            if pulse is None:
+                break
+            units, dt = pulse
+            forward = self.direction > 0
+            if not chunks or chunks[-1][0] != forward or chunks[-1][1] != units:
+                base = t
+                chunks.append([forward, units, [], []])
+            t += dt
+            chunks[-1][2].append(t - base)
+        return chunks, earlier
+
+    # ---- Pulse by pulse ----
+    def _next(self):
+        segments = self.segments
+        while True:
+            if not segments:
+                return self._brake() if self.speed else None
+            seg = segments[0]
+            if not self.speed:
+                delta = seg.target - self.position
+                if delta == 0:
+                    self._reached.append(segments.popleft())
+                    continue
+                self.direction = 1 if delta > 0 else -1
+                return self._step(seg, start=True)
+
+            ahead = (seg.target - self.position) * self.direction
+            if ahead > 0:
+                return self._step(seg)
+            # ---- On or past the target while moving ----
+            if len(segments) > 1 and (segments[1].target - seg.target) * self.direction > 0:
+                self._reached.append(segments.popleft())        # junction: carry on at speed
+                continue
+            if ahead == 0 and self.speed ** 2 - 2.0 * self._profile.accel * self.units \
+                    < _start_speed(self._profile, self.units) ** 2:
+                self.speed = 0.0
+                self._reached.append(segments.popleft())
+                continue
+            pulse = self._brake()                               # overshoot, then turn back
+            if pulse is not None:
+                return pulse
+
+    def _step(self, seg, start=False):
+        limit, junctions = self._lookahead(seg)
+        units = self._units_for(seg, limit)
+        profile = (seg.coarse or self._profile) if units > 1 else seg.fine
+        self._profile = profile
+        accel, v0 = profile.accel, _start_speed(profile, units)
+        if start:
+            return self._pulse(units, v0)
+
+        # Brake where any stop or speed cap ahead would otherwise be overrun
+        limits = [(limit, v0)] + junctions
+        if units > 1:
+            limits.append((limit - self.fine_approach, seg.fine.v_max))
+        fits = lambda v2: all(v2 - v * v <= 2.0 * accel * (d - units) for d, v in limits)
+        v2, dv2, vmax2 = self.speed ** 2, 2.0 * accel * units, profile.v_max ** 2
+        faster = min(vmax2, v2 + dv2)
+        if faster >= v2 and fits(faster):
+            v2 = faster
+        elif v2 > vmax2 or not fits(v2):
+            v2 = max(v0 * v0, v2 - dv2)
+        return self._pulse(units, math.sqrt(v2))
+
+    def _brake(self):
+        profile, units = self._profile, self.units
+        v2 = self.speed ** 2 - 2.0 * profile.accel * units
+        if v2 < _start_speed(profile, units) ** 2:
+            self.speed = 0.0
+            return None
+        return self._pulse(units, math.sqrt(v2))
+
+    def _lookahead(self, seg):
+        # Distance to where the motion must stop, and (distance, v_max) of each junction on the way
+        d = self.direction
+        limit = (seg.target - self.position) * d
+        junctions = []
+        prev = seg.target
+        for nxt in islice(self.segments, 1, None):
+            run = (nxt.target - prev) * d
+            if run <= 0:
+                break
+            junctions.append((limit, nxt.v_cap(self.coarse_units)))
+            limit += run
+            prev = nxt.target
+        return limit, junctions
+
+    def _units_for(self, seg, limit):
+        u = self.coarse_units
+        coarse = u > 1 and seg.coarse is not None and limit - u >= self.fine_approach
+        if coarse and self.units == 1:
+            coarse = limit >= self.coarse_min and self.phase % u == 0
+        if coarse:
+            return u
+        if self.units > 1 and self.speed > seg.fine.v_max:
+            return self.units       # still too fast for the fine mode: brake in this one
+        return 1
+
+    def _pulse(self, units, speed):
+        self.units = units
+        self.speed = speed
+        self.position += self.direction * units
+        self.phase += self.direction * units
+        return units, units / speed
@@ -0,0 +1,62 @@
+# utils/target_filter.py
+from bisect import bisect_left, insort
+from collections import deque
+
+
+class TargetFilter:
+    """Streaming median -> hysteresis -> EMA -> EMA chain for axis targets.
+
+    Work happens only in ``push`` (new sample) and ``advance`` (one EMA
+    pass toward the current median while still converging); readers just
+    take the cached ``value``.
+    """
+
+    def __init__(self, window=5, input_alpha=0.18, hyst_steps=8, target_alpha=0.15, initial=0):
+        self.input_alpha = input_alpha      # EMA on input (0..1). Lower = smoother
+        self.hyst_steps = hyst_steps        # ignore input changes smaller than this (steps)
+        self.target_alpha = target_alpha    # 0.0 to bypass the second EMA
+        self._window = deque(maxlen=window)
+        self._sorted = []                   # same samples, kept ordered for the median
+        self.reset(initial)
+
+    def reset(self, value):
+        """Drop history and pin every stage to ``value``."""
+        value = int(value)
+        self._window.clear()
+        self._window.append(value)
+        self._sorted = [value]
+        self.median = value
+        self.input_filtered = float(value)
+        self.value = value
+        self.settled = True
+
+    def push(self, sample):
+        sample = int(sample)
+        if len(self._window) == self._window.maxlen:
+            oldest = self._window[0]
+            del self._sorted[bisect_left(self._sorted, oldest)]
+        self._window.append(sample)
+        insort(self._sorted, sample)
+        self.median = self._sorted[len(self._sorted) // 2]
+        self.advance()
+
+    def advance(self):
+        """One filter pass toward the latest median; sets ``settled`` when nothing moved."""
+        f_in = self.input_filtered
+        if abs(self.median - f_in) >= self.hyst_steps:
+            f_in = f_in + self.input_alpha * (self.median - f_in)
+        f_in = float(int(round(f_in)))  # quantize to whole steps
+
+        if self.target_alpha <= 0.0:
+            value = int(f_in)
+        else:
+            value = int(round(self.value + self.target_alpha * (f_in - self.value)))
+
+        self.settled = f_in == self.input_filtered and value == self.value
+        self.input_filtered = f_in
+        self.value = value
+        return value
+
+    def snap(self, value):
+        """Pin the output stage (e.g. to the current position) without touching the input stage."""
+        self.value = int(value)
@@ -0,0 +1,116 @@
+# utils/velocity_follower.py
+import math
+
+import numpy as np
+
+
+def _clamp(x, limit):
+    return max(-limit, min(x, limit))
+
+
+class VelocityFollower:
+    """Jerk-limited velocity loop that follows a moving position target.
+
+    Call ``update`` once per control tick with the latest target. It
+    estimates the target's velocity, aims at where the target will be
+    ``lookahead`` seconds from now, and slews its own velocity toward that
+    with bounded acceleration and jerk. The commanded position is
+    integrated in fractional steps; ``update`` returns the whole steps that
+    fall inside the tick, so the step rate stays continuous across ticks
+    instead of restarting a ramp for every chunk. With ``limits`` (the
+    axis travel, in steps) the aim point never leads past either end.
+    """
+
+    BRAKE_MARGIN = 0.7      # fraction of ``accel`` budgeted for stopping (jerk ramps eat the rest)
+
+    def __init__(self, v_max, accel, jerk, v_start=0.0, lookahead=0.06, gain=6.0,
+                 velocity_alpha=0.35, hold_steps=4, limits=None):
+        self.v_max = v_max                      # steps/s
+        self.v_start = v_start                  # steps/s the motor can start/stop at directly
+        self.accel = accel                      # steps/s^2
+        self.jerk = jerk                        # steps/s^3
+        self.lookahead = lookahead              # s of target motion to lead by
+        self.gain = gain                        # 1/s, position error -> velocity
+        self.velocity_alpha = velocity_alpha    # EMA on the target velocity estimate
+        self.hold_steps = hold_steps            # at rest inside this error band
+        self.limits = limits                    # (low, high) travel for the aim point, or None
+        self.reset(0, 0)
+
+    def reset(self, position, target):
+        """Stop dead at ``position`` (e.g. after an endstop or on entry)."""
+        self.position = float(position)     # commanded, fractional steps
+        self.emitted = int(position)        # last whole step handed out
+        self.velocity = 0.0
+        self.acceleration = 0.0
+        self.target_velocity = 0.0
+        self._last_target = target
+
+    def resync(self, position):
+        """Re-base the commanded position on the real one, keeping velocity."""
+        self.position = float(position)
+        self.emitted = int(position)
+
+    def at_rest(self, target):
+        """True when stopped with ``target`` inside the hold band."""
+        return self.velocity == 0.0 and abs(target - self.emitted) < self.hold_steps
+
+    def update(self, target, dt):
+        """Advance one tick; returns ``(forward, times)`` with step times relative to its start."""
+        # ---- Target velocity from successive samples ----
+        measured = _clamp((target - self._last_target) / dt, self.v_max)   # jumps aren't motion
+        self._last_target = target
+        self.target_velocity += self.velocity_alpha * (measured - self.target_velocity)
+        if abs(self.target_velocity) < 1.0:
+            self.target_velocity = 0.0
+
+        # ---- Desired velocity: feed-forward + look-ahead error ----
+        # Capped so the axis can always stop at the aim point, which is kept
+        # inside ``limits``: if the knob stops dead, the axis pulls up at
+        # the aim point instead of running on past it.
+        aim = target + self.target_velocity * self.lookahead
+        if self.limits is not None:
+            aim = max(self.limits[0], min(aim, self.limits[1]))
+        error = aim - self.position
+        braking = False
+        if abs(error) < self.hold_steps and self.target_velocity == 0.0:
+            desired = 0.0
+        else:
+            # Fastest speed that still stops within ``error``: v**2 / 2a of
+            # braking plus the a / jerk it takes to build up the deceleration
+            a, t_jerk = self.BRAKE_MARGIN * self.accel, self.accel / self.jerk
+            brake = a * (math.sqrt(t_jerk * t_jerk + 2.0 * abs(error) / a) - t_jerk)
+            desired = _clamp(self.target_velocity + self.gain * error, min(brake, self.v_max))
+            braking = brake < abs(self.velocity) and desired * self.velocity > 0.0
+
+        # ---- Jerk-limited approach to the desired velocity ----
+        v = self.velocity
+        if v == 0.0 and desired != 0.0:
+            v = math.copysign(min(self.v_start, abs(desired)), desired)
+        wanted = _clamp((desired - v) / max(dt, 2.0 * self.accel / self.jerk), self.accel)
+        if braking:
+            wanted = -math.copysign(self.accel, v)      # past the braking curve: full deceleration
+        self.acceleration += _clamp(wanted - self.acceleration, self.jerk * dt)
+        v_new = v + self.acceleration * dt
+        if (v_new - desired) * (v - desired) <= 0.0:     # reached or crossed it
+            v_new, self.acceleration = desired, 0.0
+        v_new = _clamp(v_new, self.v_max)
+        if desired == 0.0 and abs(v_new) <= max(self.v_start, self.accel * dt):
+            v_new, self.acceleration = 0.0, 0.0
+        self.velocity = v_new
+
+        # ---- Whole steps crossed this tick (one step of hysteresis on reversal) ----
+        p0 = self.position
+        self.position = p0 + v_new * dt
+        if v_new > 0.0:
+            last = math.floor(self.position)
+            ks = np.arange(self.emitted + 1, last + 1, dtype=np.float64)
+            times = (ks - p0) / v_new
+        elif v_new < 0.0:
+            last = math.ceil(self.position)
+            ks = np.arange(self.emitted - 1, last - 1, -1, dtype=np.float64)
+            times = (p0 - ks) / -v_new
+        else:
+            return True, np.empty(0)
+        if ks.size:
+            self.emitted = int(ks[-1])
+        return v_new > 0.0, np.clip(times, 0.0, dt)